@@ -0,0 +1,80 @@
+"""
+Сравнение поиска обработчика кнопки: словари, собираемые на каждое
+нажатие, с цепочкой startswith (как было в message_callback) и
+CallbackRouter, собранный один раз
+
+Обработчики не вызываются: замер показывает только стоимость выбора
+обработчика для payload. Для проверки масштабирования в обе схемы
+добавляются дополнительные префиксы; в цепочке startswith они идут после
+исходных, поэтому payload последнего добавленного префикса - худший случай.
+
+Запуск из корня репозитория:
+    python -m benchmarks.callback_router [количество_нажатий]
+"""
+import sys
+import timeit
+
+from messaging.router import CallbackRouter
+
+EXACT_PAYLOADS = 60
+PREFIXES = [
+    "approveDean_", "rejectDean_", "approveStudy_", "rejectStudy_", "approve_unban_", "reject_unban_",
+    "replyComplaint_", "closeComplaint_", "replyPass_", "autoReplyPass_", "rejectPass_",
+    "confirm_delete_news_", "confirm_delete_event_", "role_",
+]
+PAYLOADS = [("exact", "action_59"), ("approveDean_", "approveDean_1234567"), ("role_", "role_dean")]
+
+
+async def handler(*args):
+    pass
+
+
+def extra_prefixes(count):
+    return [f"extra{index}_" for index in range(count)]
+
+
+def legacy_dispatch(payload, prefixes):
+    # Словари собираются заново на каждое нажатие, лямбды создаются заново
+    navigation_handlers = {f"nav_{index}": (lambda: handler()) for index in range(14)}
+    action_handlers = {f"action_{index}": handler for index in range(EXACT_PAYLOADS - 14)}
+    action_handlers["action_59"] = handler
+
+    if payload in navigation_handlers:
+        return navigation_handlers[payload]
+    if payload in action_handlers:
+        return action_handlers[payload]
+    for prefix in prefixes:
+        if payload.startswith(prefix):
+            return handler, payload.split("_")[1]
+    return None
+
+
+def build_router(prefixes):
+    router = CallbackRouter()
+    for index in range(EXACT_PAYLOADS - 1):
+        router.add(f"action_{index}", handler)
+    router.add("action_59", handler)
+    for prefix in prefixes:
+        router.add_prefix(prefix, handler, str if prefix == "role_" else int)
+    return router
+
+
+def measure(func, number):
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e9
+
+
+def main(number=100000):
+    print(f"{'доп. префиксов':<16}{'payload':<16}{'было, нс':>12}{'стало, нс':>12}")
+    for extra in (0, 100, 1000):
+        # Новые префиксы в старой схеме дописывались бы в конец цепочки elif
+        legacy_prefixes = PREFIXES + extra_prefixes(extra)
+        router = build_router(extra_prefixes(extra) + PREFIXES)
+        payloads = PAYLOADS + ([("новый префикс", f"extra{extra - 1}_42")] if extra else [])
+        for name, payload in payloads:
+            legacy = measure(lambda: legacy_dispatch(payload, legacy_prefixes), number)
+            routed = measure(lambda: router.resolve(payload), number)
+            print(f"{extra:<16}{name:<16}{legacy:>12.0f}{routed:>12.0f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,88 @@
+"""
+Сравнение задержки обращений к базе: новое соединение на каждый вызов
+против общего пула соединений database.connection
+
+Запуск из корня репозитория:
+    python -m benchmarks.connection_pool [количество_пользователей]
+"""
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+from database.black_list import BlacklistDatabase
+from database.connection import connect, connection_manager
+from database.requests.unbun_request import UnbanRequestsDatabase
+from database.users.users import UsersDatabase
+
+
+# Запросы одного нажатия /menu до появления кэшей ролей и черного списка.
+# Оба варианта выполняют один и тот же SQL без кэшей, поэтому разница
+# показывает только стоимость открытия соединения.
+MENU_QUERIES = [
+    ('blacklist', 'SELECT * FROM blacklist WHERE user_id = ?', True),
+    ('users', 'SELECT role FROM users WHERE id = ?', True),
+    ('unban', 'SELECT COUNT(*) FROM unban_requests WHERE status = "pending"', False),
+]
+
+
+def press_menu_per_call_connection(paths, user_id):
+    """Повторяет запросы одного нажатия /menu со старым подходом: connect на каждый вызов"""
+    for name, query, by_user in MENU_QUERIES:
+        with sqlite3.connect(paths[name]) as conn:
+            conn.execute(query, (user_id,) if by_user else ()).fetchone()
+
+
+def press_menu_pooled(paths, user_id):
+    """Те же запросы через общий пул соединений database.connection"""
+    for name, query, by_user in MENU_QUERIES:
+        with connect(paths[name]) as conn:
+            conn.execute(query, (user_id,) if by_user else ()).fetchone()
+
+
+def measure(func, argument, user_ids):
+    timings = []
+    for user_id in user_ids:
+        started = time.perf_counter()
+        func(argument, user_id)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def report(title, timings):
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(
+        f"{title:<28} среднее {statistics.mean(timings) * 1e6:8.1f} мкс, "
+        f"медиана {statistics.median(timings) * 1e6:8.1f} мкс, p95 {p95 * 1e6:8.1f} мкс"
+    )
+
+
+def main(users_count=3000):
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = {
+            'users': os.path.join(tmp, 'users.db'),
+            'blacklist': os.path.join(tmp, 'blacklist.db'),
+            'unban': os.path.join(tmp, 'unban_requests.db'),
+        }
+        # Классы database/* создают таблицы и индексы
+        users = UsersDatabase(paths['users'])
+        BlacklistDatabase(paths['blacklist'])
+        UnbanRequestsDatabase(paths['unban'])
+        users.logger.disabled = True
+
+        for user_id in range(users_count):
+            users.add_user(user_id, 'student')
+
+        user_ids = list(range(users_count))
+        print(f"Пользователей: {users_count}, запросов на нажатие /menu: {len(MENU_QUERIES)}")
+        report("connect на каждый вызов", measure(press_menu_per_call_connection, paths, user_ids))
+        report("общий пул соединений", measure(press_menu_pooled, paths, user_ids))
+
+        connection_manager.close_all()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 3000)
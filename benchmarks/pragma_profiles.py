@@ -0,0 +1,54 @@
+"""
+Сравнение скорости записи add_complaint/add_request при разных профилях
+PRAGMA из database.connection.PRAGMA_PROFILES
+
+Запуск из корня репозитория:
+    python -m benchmarks.pragma_profiles [количество_записей]
+"""
+import logging
+import os
+import sys
+import tempfile
+import time
+
+from database.connection import PRAGMA_PROFILES, connection_manager
+from database.requests.dormitory_request import DormitoryRequestDatabase
+from database.requests.students_complaints import StudentComplaintsDatabase
+
+
+def write_complaints(database, count):
+    for user_id in range(count):
+        database.add_complaint(user_id, user_id, 'student', 'Не работает розетка', '1.101')
+
+
+def write_dormitory_requests(database, count):
+    for user_id in range(count):
+        database.add_request(user_id, user_id, 'student', 'ИВТ-21', '01.01.2005', 'Потерян пропуск')
+
+
+def measure(func, database, count):
+    started = time.perf_counter()
+    func(database, count)
+    return count / (time.perf_counter() - started)
+
+
+def main(records_count=2000):
+    logging.disable(logging.INFO)
+    print(f"Записей на каждый замер: {records_count}")
+    print(f"{'профиль':<14}{'add_complaint, зап/с':>24}{'add_request, зап/с':>24}")
+
+    for profile in PRAGMA_PROFILES:
+        connection_manager.set_pragma_profile(profile)
+        with tempfile.TemporaryDirectory() as tmp:
+            complaints = StudentComplaintsDatabase(os.path.join(tmp, 'student_complaints.db'))
+            dormitory = DormitoryRequestDatabase(os.path.join(tmp, 'dormitory_requests.db'))
+
+            complaints_rate = measure(write_complaints, complaints, records_count)
+            requests_rate = measure(write_dormitory_requests, dormitory, records_count)
+            print(f"{profile:<14}{complaints_rate:>24.0f}{requests_rate:>24.0f}")
+
+            connection_manager.close_all()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,86 @@
+"""
+Сравнение подготовки запросов рассылки: send_message с построением тела
+на каждого получателя и send_template с телом, сериализованным один раз
+
+Сеть не используется: сессия бота подменяется заглушкой, которая, как
+aiohttp, сериализует аргумент json и сразу отвечает, поэтому замер
+показывает только затраты процесса бота на одного получателя.
+
+Запуск из корня репозитория:
+    python -m benchmarks.template_fanout [количество_получателей]
+"""
+import asyncio
+import json
+import logging
+import sys
+import time
+
+from maxapi.types import CallbackButton
+from maxapi.utils.inline_keyboard import InlineKeyboardBuilder
+
+from messaging.templates import MessageTemplate, format_news_text
+from messaging.throttled_bot import ThrottledBot
+
+
+class StubResponse:
+    status = 400
+    ok = False
+
+    async def json(self):
+        return {'code': 'stub'}
+
+
+class StubSession:
+    async def request(self, method, url, **kwargs):
+        if 'json' in kwargs:
+            json.dumps(kwargs['json']).encode('utf-8')
+        return StubResponse()
+
+
+def build_keyboard():
+    builder = InlineKeyboardBuilder()
+    builder.row(
+        CallbackButton(text="Подробнее", payload="news_details"),
+        CallbackButton(text="Отписаться", payload="subscribe_news")
+    )
+    return builder.as_markup()
+
+
+async def send_per_recipient(bot, recipients, text):
+    attachments = [build_keyboard()]
+    for user_id in recipients:
+        await bot.send_message(user_id=user_id, text=text, attachments=attachments)
+
+
+async def send_template(bot, recipients, text):
+    template = MessageTemplate(text, attachments=[build_keyboard()])
+    for user_id in recipients:
+        await bot.send_template(template, user_id=user_id)
+
+
+async def measure(func, recipients, text):
+    bot = ThrottledBot(token='benchmark', retries=0)
+    bot.session = StubSession()
+    started = time.perf_counter()
+    await func(bot, recipients, text)
+    return time.perf_counter() - started
+
+
+async def run(recipients_count):
+    text = format_news_text("university", "Изменение расписания", "Занятия 1 сентября начинаются в 10:00. " * 20)
+    recipients = range(1, recipients_count + 1)
+
+    print(f"Получателей: {recipients_count}")
+    print(f"{'способ':<16}{'время, с':>12}{'мкс/получателя':>18}")
+    for name, func in (('send_message', send_per_recipient), ('send_template', send_template)):
+        elapsed = await measure(func, recipients, text)
+        print(f"{name:<16}{elapsed:>12.2f}{elapsed / recipients_count * 1e6:>18.1f}")
+
+
+def main(recipients_count=50000):
+    logging.disable(logging.CRITICAL)
+    asyncio.run(run(recipients_count))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
@@ -2,10 +2,12 @@ import os
 import sqlite3
 import logging
 
+from database.connection import connect, resolve_db_name
+
 class AdmissionNewsDatabase:
     def __init__(self, db_name='others/admission_news.db'):
-        os.makedirs(os.path.dirname(db_name), exist_ok=True)
-        self.db_name = db_name
+        self.db_name = resolve_db_name(db_name)
+        os.makedirs(os.path.dirname(self.db_name), exist_ok=True)
         self._create_tables()
         self._setup_logging()
 
@@ -14,10 +16,17 @@ class AdmissionNewsDatabase:
         self.logger = logging.getLogger(__name__)
 
     def _create_tables(self):
-        with sqlite3.connect(self.db_name) as conn:
+        with connect(self.db_name) as conn:
+            # Раньше таблица называлась news и конфликтовала с таблицей
+            # NewsDatabase при хранении всех данных в одной базе
+            columns = [row[1] for row in conn.execute('PRAGMA table_info(news)')]
+            if 'news_date' in columns:
+                conn.execute('ALTER TABLE news RENAME TO admission_news')
+                conn.execute('DROP INDEX IF EXISTS idx_user_id')
+
             # Таблица новостей о поступлении
             conn.execute('''
-                CREATE TABLE IF NOT EXISTS news (
+                CREATE TABLE IF NOT EXISTS admission_news (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     news_date TEXT NOT NULL,
                     text TEXT NOT NULL
@@ -32,31 +41,31 @@ class AdmissionNewsDatabase:
                     chat_id INTEGER NOT NULL,
                     username TEXT NOT NULL,
                     date_registered TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY(news_id) REFERENCES news(id)
+                    FOREIGN KEY(news_id) REFERENCES admission_news(id)
                 )
             ''')
             conn.execute('CREATE INDEX IF NOT EXISTS idx_news_id ON registrations(news_id)')
-            conn.execute('CREATE INDEX IF NOT EXISTS idx_user_id ON registrations(user_id)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_registrations_user_id ON registrations(user_id)')
 
     # Добавить новость
     def add_news(self, news_date, text):
-        with sqlite3.connect(self.db_name) as conn:
+        with connect(self.db_name) as conn:
             cursor = conn.execute(
-                'INSERT INTO news (news_date, text) VALUES (?, ?)',
+                'INSERT INTO admission_news (news_date, text) VALUES (?, ?)',
                 (news_date, text)
             )
             return cursor.lastrowid
 
     # Получить все новости
     def get_all_news(self):
-        with sqlite3.connect(self.db_name) as conn:
+        with connect(self.db_name) as conn:
             conn.row_factory = sqlite3.Row
-            cursor = conn.execute('SELECT * FROM news ORDER BY news_date ASC')
+            cursor = conn.execute('SELECT * FROM admission_news ORDER BY news_date ASC')
             return [dict(row) for row in cursor.fetchall()]
 
     # Записать абитуриента на событие
     def register_user(self, news_id, user_id, chat_id, username):
-        with sqlite3.connect(self.db_name) as conn:
+        with connect(self.db_name) as conn:
             cursor = conn.execute(
                 'INSERT INTO registrations (news_id, user_id, chat_id, username) VALUES (?, ?, ?, ?)',
                 (news_id, user_id, chat_id, username)
@@ -65,7 +74,7 @@ class AdmissionNewsDatabase:
 
     # Получить список записавшихся на событие
     def get_registrations(self, news_id):
-        with sqlite3.connect(self.db_name) as conn:
+        with connect(self.db_name) as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.execute(
                 'SELECT * FROM registrations WHERE news_id = ? ORDER BY date_registered ASC',
@@ -73,10 +82,10 @@ class AdmissionNewsDatabase:
             )
             return [dict(row) for row in cursor.fetchall()]
     def get_future_events(self):
-        with sqlite3.connect(self.db_name) as conn:
+        with connect(self.db_name) as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.execute(
-                "SELECT * FROM news WHERE date(news_date) >= date('now') ORDER BY news_date ASC"
+                "SELECT * FROM admission_news WHERE date(news_date) >= date('now') ORDER BY news_date ASC"
             )
             return [dict(row) for row in cursor.fetchall()]
 
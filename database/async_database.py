@@ -0,0 +1,61 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+# Все обращения к SQLite из обработчиков бота выполняются в одном выделенном
+# потоке: у него по одному соединению на файл базы, а цикл событий не
+# блокируется на дисковом вводе-выводе.
+database_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='database')
+
+
+async def run_in_database(func, *args, **kwargs):
+    """
+    Выполняет синхронную функцию работы с базой в потоке базы данных
+
+    Args:
+        func: Вызываемый объект
+        *args: Позиционные аргументы
+        **kwargs: Именованные аргументы
+
+    Returns:
+        Результат выполнения func
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(database_executor, functools.partial(func, *args, **kwargs))
+
+
+class AsyncDatabase:
+    def __init__(self, database, write_queue=None, queued_methods=()):
+        """
+        Асинхронная обертка над классом из пакета database
+
+        Каждый метод обернутого объекта становится корутиной, которая
+        выполняется в потоке базы данных, поэтому обработчики пишут
+        `await users.get_user_role(user_id)` вместо блокирующего вызова.
+
+        Args:
+            database: Экземпляр синхронного класса базы данных
+            write_queue: Очередь групповой записи (database.write_queue.WriteQueue)
+            queued_methods: Имена методов, которые выполняются через write_queue
+        """
+        self.sync = database
+        self.write_queue = write_queue
+        self.queued_methods = set(queued_methods) if write_queue is not None else set()
+
+    def __getattr__(self, name):
+        attribute = getattr(self.sync, name)
+        if not callable(attribute):
+            return attribute
+
+        if name in self.queued_methods:
+            @functools.wraps(attribute)
+            async def method(*args, **kwargs):
+                return await self.write_queue.submit(attribute, *args, **kwargs)
+        else:
+            @functools.wraps(attribute)
+            async def method(*args, **kwargs):
+                return await run_in_database(attribute, *args, **kwargs)
+
+        # Кэшируем обертку, чтобы не создавать ее при каждом обращении
+        setattr(self, name, method)
+        return method
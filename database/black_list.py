@@ -2,13 +2,17 @@ import os
 import sqlite3
 import logging
 
+from database.connection import connect, connection_manager, resolve_db_name
+from database.full_text import build_fts_query, create_fts_index
+
 
 class BlacklistDatabase:
     def __init__(self, db_name='others/blacklist.db'):
-        os.makedirs(os.path.dirname(db_name), exist_ok=True)
-        self.db_name = db_name
+        self.db_name = resolve_db_name(db_name)
+        os.makedirs(os.path.dirname(self.db_name), exist_ok=True)
         self._create_table()
         self._setup_logging()
+        self._load_members()
 
     def _setup_logging(self):
         """Настройка логирования"""
@@ -20,7 +24,7 @@ class BlacklistDatabase:
 
     def _create_table(self):
         """Создает таблицу черного списка"""
-        with sqlite3.connect(self.db_name) as conn:
+        with connect(self.db_name) as conn:
             conn.execute('''
                 CREATE TABLE IF NOT EXISTS blacklist (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -30,14 +34,57 @@ class BlacklistDatabase:
                     date_modified TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
             ''')
+            # Старое имя индекса совпадало с индексами других таблиц единой базы
+            conn.execute('DROP INDEX IF EXISTS idx_user_id')
             # Создаем индексы для быстрого поиска
-            conn.execute('CREATE INDEX IF NOT EXISTS idx_user_id ON blacklist(user_id)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_blacklist_user_id ON blacklist(user_id)')
             conn.execute('CREATE INDEX IF NOT EXISTS idx_date_added ON blacklist(date_added)')
+            # Полнотекстовый индекс для search_blacklist
+            self.fts_enabled = create_fts_index(conn, 'blacklist', ['user_id', 'reason'])
+            if self.fts_enabled:
+                # INSERT OR REPLACE в add_to_blacklist удаляет старую строку без
+                # срабатывания триггера удаления, поэтому убираем ее из индекса заранее
+                conn.execute('''
+                    CREATE TRIGGER IF NOT EXISTS blacklist_fts_bi BEFORE INSERT ON blacklist BEGIN
+                        INSERT INTO blacklist_fts(blacklist_fts, rowid, user_id, reason)
+                        SELECT 'delete', id, user_id, reason FROM blacklist WHERE user_id = new.user_id;
+                    END
+                ''')
+
+    def _load_members(self):
+        """Загружает в память множество user_id из черного списка
+
+        Множество всегда содержит всех заблокированных пользователей (и, возможно,
+        уже удаленных внутри незавершенной единицы работы), поэтому отсутствие
+        user_id в нем означает, что пользователя нет в черном списке.
+        """
+        with connect(self.db_name) as conn:
+            self._members = {row[0] for row in conn.execute('SELECT user_id FROM blacklist')}
+
+    def _forget_members(self, user_ids=None):
+        """Удаляет пользователей из множества после фиксации изменений (всех, если user_ids не указан)"""
+        # Удаление внутри единицы работы может быть откачено, поэтому
+        # множество обновляется только после ее коммита. Пользователя могли
+        # снова добавить позже в той же единице работы, поэтому из множества
+        # убираются только те, кого после коммита нет в таблице
+        def forget():
+            if user_ids is None:
+                self._load_members()
+                return
+            ids = list(user_ids)
+            with connect(self.db_name) as conn:
+                remaining = {row[0] for row in conn.execute(
+                    f'SELECT user_id FROM blacklist WHERE user_id IN ({", ".join("?" * len(ids))})', ids
+                )}
+            self._members.difference_update(set(ids) - remaining)
+
+        connection_manager.on_commit(forget)
 
     def add_to_blacklist(self, user_id, reason):
         """Добавляет пользователя в черный список"""
+        self._members.add(user_id)
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 conn.execute(
                     '''INSERT OR REPLACE INTO blacklist 
                     (user_id, reason, date_modified) 
@@ -53,25 +100,28 @@ class BlacklistDatabase:
     def remove_from_blacklist(self, user_id):
         """Удаляет пользователя из черного списка"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 cursor = conn.execute(
                     'DELETE FROM blacklist WHERE user_id = ?',
                     (user_id,)
                 )
-                if cursor.rowcount > 0:
-                    self.logger.info(f"Пользователь {user_id} удален из черного списка")
-                    return True
-                else:
-                    self.logger.warning(f"Пользователь {user_id} не найден в черном списке")
-                    return False
+            if cursor.rowcount > 0:
+                self._forget_members([user_id])
+                self.logger.info(f"Пользователь {user_id} удален из черного списка")
+                return True
+            else:
+                self.logger.warning(f"Пользователь {user_id} не найден в черном списке")
+                return False
         except sqlite3.Error as e:
             self.logger.error(f"Ошибка при удалении из черного списка: {e}")
             return False
 
     def is_in_blacklist(self, user_id):
         """Проверяет, находится ли пользователь в черном списке"""
+        if user_id not in self._members:
+            return None
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.execute(
                     'SELECT * FROM blacklist WHERE user_id = ?',
@@ -86,10 +136,10 @@ class BlacklistDatabase:
     def get_all_blacklisted(self, limit=100, offset=0):
         """Получает всех пользователей из черного списка с пагинацией"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.execute(
-                    'SELECT * FROM blacklist ORDER BY date_added DESC LIMIT ? OFFSET ?',
+                    'SELECT * FROM blacklist ORDER BY date_added DESC, id DESC LIMIT ? OFFSET ?',
                     (limit, offset)
                 )
                 return [dict(row) for row in cursor.fetchall()]
@@ -97,10 +147,31 @@ class BlacklistDatabase:
             self.logger.error(f"Ошибка при получении черного списка: {e}")
             return []
 
+    def get_all_blacklisted_after(self, after_date=None, after_id=None, limit=100):
+        """Получает пользователей из черного списка после курсора (after_date, after_id) - последней показанной записи"""
+        try:
+            with connect(self.db_name) as conn:
+                conn.row_factory = sqlite3.Row
+                if after_date is None:
+                    cursor = conn.execute(
+                        'SELECT * FROM blacklist ORDER BY date_added DESC, id DESC LIMIT ?',
+                        (limit,)
+                    )
+                else:
+                    cursor = conn.execute(
+                        '''SELECT * FROM blacklist WHERE (date_added, id) < (?, ?)
+                        ORDER BY date_added DESC, id DESC LIMIT ?''',
+                        (after_date, after_id, limit)
+                    )
+                return [dict(row) for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            self.logger.error(f"Ошибка при получении черного списка: {e}")
+            return []
+
     def update_reason(self, user_id, new_reason):
         """Обновляет причину нахождения в черном списке"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 cursor = conn.execute(
                     '''UPDATE blacklist 
                     SET reason = ?, date_modified = CURRENT_TIMESTAMP 
@@ -120,7 +191,7 @@ class BlacklistDatabase:
     def get_blacklist_count(self):
         """Возвращает количество пользователей в черном списке"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 cursor = conn.execute('SELECT COUNT(*) FROM blacklist')
                 return cursor.fetchone()[0]
         except sqlite3.Error as e:
@@ -128,16 +199,30 @@ class BlacklistDatabase:
             return 0
 
     def search_blacklist(self, search_term):
-        """Ищет в черном списке по user_id или причине"""
+        """Ищет в черном списке по user_id или причине, самые релевантные первыми"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 conn.row_factory = sqlite3.Row
-                cursor = conn.execute(
-                    '''SELECT * FROM blacklist 
-                    WHERE user_id LIKE ? OR reason LIKE ? 
-                    ORDER BY date_added DESC''',
-                    (f'%{search_term}%', f'%{search_term}%')
-                )
+                # FTS ищет только по началу слова, а ID пользователя ищут и по
+                # цифрам из середины, поэтому числовой запрос идет через LIKE
+                if self.fts_enabled and not search_term.strip().isdigit():
+                    query = build_fts_query(search_term)
+                    if query is None:
+                        return []
+                    cursor = conn.execute(
+                        '''SELECT blacklist.* FROM blacklist_fts
+                        JOIN blacklist ON blacklist.id = blacklist_fts.rowid
+                        WHERE blacklist_fts MATCH ?
+                        ORDER BY blacklist_fts.rank''',
+                        (query,)
+                    )
+                else:
+                    cursor = conn.execute(
+                        '''SELECT * FROM blacklist 
+                        WHERE user_id LIKE ? OR reason LIKE ? 
+                        ORDER BY date_added DESC''',
+                        (f'%{search_term.strip()}%', f'%{search_term.strip()}%')
+                    )
                 return [dict(row) for row in cursor.fetchall()]
         except sqlite3.Error as e:
             self.logger.error(f"Ошибка при поиске в черном списке: {e}")
@@ -146,10 +231,11 @@ class BlacklistDatabase:
     def clear_blacklist(self):
         """Очищает весь черный список"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 conn.execute('DELETE FROM blacklist')
-                self.logger.info("Черный список полностью очищен")
-                return True
+            self._forget_members()
+            self.logger.info("Черный список полностью очищен")
+            return True
         except sqlite3.Error as e:
             self.logger.error(f"Ошибка при очистке черного списка: {e}")
             return False
\ No newline at end of file
@@ -0,0 +1,219 @@
+import os
+import sqlite3
+import logging
+
+from database.connection import connect, resolve_db_name
+
+
+class BroadcastJobsDatabase:
+    def __init__(self, db_name='others/broadcast_jobs.db'):
+        self.db_name = resolve_db_name(db_name)
+        os.makedirs(os.path.dirname(self.db_name), exist_ok=True)
+        self._create_table()
+        self._setup_logging()
+
+    def _setup_logging(self):
+        """Настройка логирования"""
+        logging.basicConfig(
+            level=logging.INFO,
+            format='%(asctime)s - %(levelname)s - %(message)s'
+        )
+        self.logger = logging.getLogger(__name__)
+
+    def _create_table(self):
+        """Создает таблицы заданий рассылки и их получателей"""
+        with connect(self.db_name) as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS broadcast_jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    kind TEXT NOT NULL,
+                    news_id INTEGER,
+                    chat_id INTEGER,
+                    text TEXT NOT NULL,
+                    state TEXT NOT NULL DEFAULT 'pending' CHECK (state IN ('pending', 'running', 'done')),
+                    total INTEGER NOT NULL DEFAULT 0,
+                    cancelled INTEGER NOT NULL DEFAULT 0,
+                    date_created TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    date_finished TIMESTAMP
+                )
+            ''')
+            self._add_cancel_column(conn)
+            # Получатель задания: pending - еще не отправлено, sent/failed - итог отправки
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS broadcast_recipients (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    job_id INTEGER NOT NULL,
+                    user_id INTEGER NOT NULL,
+                    state TEXT NOT NULL DEFAULT 'pending' CHECK (state IN ('pending', 'sent', 'failed')),
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    message_id TEXT,
+                    error TEXT,
+                    date_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY(job_id) REFERENCES broadcast_jobs(id),
+                    UNIQUE(job_id, user_id)
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_broadcast_jobs_state ON broadcast_jobs(state)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_broadcast_jobs_news ON broadcast_jobs(news_id, state)')
+            conn.execute(
+                'CREATE INDEX IF NOT EXISTS idx_broadcast_recipients_job_state ON broadcast_recipients(job_id, state, id)'
+            )
+
+    def _add_cancel_column(self, conn):
+        """Добавляет столбец отмены в таблицу, созданную до его появления"""
+        columns = [row[1] for row in conn.execute('PRAGMA table_info(broadcast_jobs)')]
+        if 'cancelled' not in columns:
+            conn.execute('ALTER TABLE broadcast_jobs ADD COLUMN cancelled INTEGER NOT NULL DEFAULT 0')
+
+    def create_job(self, kind, text, user_ids, news_id=None, chat_id=None):
+        """Создает задание рассылки вместе со списком получателей, возвращает его id"""
+        try:
+            with connect(self.db_name) as conn:
+                cursor = conn.execute(
+                    'INSERT INTO broadcast_jobs (kind, news_id, chat_id, text) VALUES (?, ?, ?, ?)',
+                    (kind, news_id, chat_id, text)
+                )
+                job_id = cursor.lastrowid
+                cursor = conn.executemany(
+                    'INSERT OR IGNORE INTO broadcast_recipients (job_id, user_id) VALUES (?, ?)',
+                    [(job_id, user_id) for user_id in user_ids]
+                )
+                conn.execute('UPDATE broadcast_jobs SET total = ? WHERE id = ?', (cursor.rowcount, job_id))
+                self.logger.info(f"Создано задание рассылки {job_id} ({kind}): {cursor.rowcount} получателей")
+                return job_id
+        except sqlite3.Error as e:
+            self.logger.error(f"Ошибка при создании задания рассылки: {e}")
+            return None
+
+    def add_recipients(self, job_id, user_ids):
+        """Добавляет получателей в задание рассылки и увеличивает его total"""
+        try:
+            with connect(self.db_name) as conn:
+                cursor = conn.executemany(
+                    'INSERT OR IGNORE INTO broadcast_recipients (job_id, user_id) VALUES (?, ?)',
+                    [(job_id, user_id) for user_id in user_ids]
+                )
+                added = cursor.rowcount
+                conn.execute('UPDATE broadcast_jobs SET total = total + ? WHERE id = ?', (added, job_id))
+                return added
+        except sqlite3.Error as e:
+            self.logger.error(f"Ошибка при добавлении получателей задания {job_id}: {e}")
+            return 0
+
+    def get_job(self, job_id):
+        """Получает задание рассылки по ID"""
+        try:
+            with connect(self.db_name) as conn:
+                conn.row_factory = sqlite3.Row
+                cursor = conn.execute('SELECT * FROM broadcast_jobs WHERE id = ?', (job_id,))
+                result = cursor.fetchone()
+                return dict(result) if result else None
+        except sqlite3.Error as e:
+            self.logger.error(f"Ошибка при получении задания рассылки {job_id}: {e}")
+            return None
+
+    def get_unfinished_jobs(self, news_id=None):
+        """Получает незавершенные задания рассылки (всех или одной новости) в порядке создания"""
+        try:
+            with connect(self.db_name) as conn:
+                conn.row_factory = sqlite3.Row
+                if news_id is None:
+                    cursor = conn.execute("SELECT * FROM broadcast_jobs WHERE state != 'done' ORDER BY id")
+                else:
+                    cursor = conn.execute(
+                        "SELECT * FROM broadcast_jobs WHERE news_id = ? AND state != 'done' ORDER BY id",
+                        (news_id,)
+                    )
+                return [dict(row) for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            self.logger.error(f"Ошибка при получении незавершенных заданий рассылки: {e}")
+            return []
+
+    def set_job_state(self, job_id, state):
+        """Меняет состояние задания рассылки"""
+        try:
+            with connect(self.db_name) as conn:
+                if state == 'done':
+                    conn.execute(
+                        'UPDATE broadcast_jobs SET state = ?, date_finished = CURRENT_TIMESTAMP WHERE id = ?',
+                        (state, job_id)
+                    )
+                else:
+                    conn.execute('UPDATE broadcast_jobs SET state = ? WHERE id = ?', (state, job_id))
+                return True
+        except sqlite3.Error as e:
+            self.logger.error(f"Ошибка при обновлении задания рассылки {job_id}: {e}")
+            return False
+
+    def cancel_news_jobs(self, news_id):
+        """Отмечает отмененными незавершенные задания рассылки новости"""
+        try:
+            with connect(self.db_name) as conn:
+                cursor = conn.execute(
+                    "UPDATE broadcast_jobs SET cancelled = 1 WHERE news_id = ? AND state != 'done'",
+                    (news_id,)
+                )
+                return cursor.rowcount
+        except sqlite3.Error as e:
+            self.logger.error(f"Ошибка при отмене заданий рассылки новости {news_id}: {e}")
+            return 0
+
+    def update_news_jobs_text(self, news_id, text):
+        """Меняет текст незавершенных заданий рассылки новости для еще не отправленных получателей"""
+        try:
+            with connect(self.db_name) as conn:
+                cursor = conn.execute(
+                    "UPDATE broadcast_jobs SET text = ? WHERE news_id = ? AND state != 'done'",
+                    (text, news_id)
+                )
+                return cursor.rowcount
+        except sqlite3.Error as e:
+            self.logger.error(f"Ошибка при обновлении текста заданий рассылки новости {news_id}: {e}")
+            return 0
+
+    def get_pending_recipients(self, job_id, after_id=0, limit=500):
+        """Получает неотправленных получателей задания после курсора after_id"""
+        try:
+            with connect(self.db_name) as conn:
+                conn.row_factory = sqlite3.Row
+                cursor = conn.execute(
+                    '''SELECT * FROM broadcast_recipients
+                    WHERE job_id = ? AND state = 'pending' AND id > ?
+                    ORDER BY id LIMIT ?''',
+                    (job_id, after_id, limit)
+                )
+                return [dict(row) for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            self.logger.error(f"Ошибка при получении получателей задания {job_id}: {e}")
+            return []
+
+    def mark_recipients(self, job_id, outcomes):
+        """Сохраняет итоги отправки пачкой: список (user_id, state, message_id, error)"""
+        try:
+            with connect(self.db_name) as conn:
+                conn.executemany(
+                    '''UPDATE broadcast_recipients
+                    SET state = ?, message_id = ?, error = ?, attempts = attempts + 1,
+                        date_updated = CURRENT_TIMESTAMP
+                    WHERE job_id = ? AND user_id = ?''',
+                    [(state, message_id, error, job_id, user_id) for user_id, state, message_id, error in outcomes]
+                )
+                return True
+        except sqlite3.Error as e:
+            self.logger.error(f"Ошибка при сохранении итогов задания {job_id}: {e}")
+            return False
+
+    def get_job_counts(self, job_id):
+        """Возвращает количество получателей задания по состояниям"""
+        try:
+            with connect(self.db_name) as conn:
+                cursor = conn.execute(
+                    'SELECT state, COUNT(*) FROM broadcast_recipients WHERE job_id = ? GROUP BY state',
+                    (job_id,)
+                )
+                counts = {'pending': 0, 'sent': 0, 'failed': 0}
+                counts.update(dict(cursor.fetchall()))
+                return counts
+        except sqlite3.Error as e:
+            self.logger.error(f"Ошибка при подсчете получателей задания {job_id}: {e}")
+            return {}
@@ -0,0 +1,295 @@
+import os
+import sqlite3
+import threading
+import logging
+from contextlib import contextmanager
+
+# Путь к единой базе данных. Если задан, все классы database/* хранят свои
+# таблицы в этом файле, а многошаговые операции фиксируются одним коммитом.
+DATABASE_PATH = os.getenv('DATABASE_PATH')
+
+# Профили PRAGMA, применяемые к каждому новому соединению.
+# journal_mode=WAL позволяет читателям не ждать писателя, synchronous=NORMAL
+# в режиме WAL синхронизирует диск только при контрольной точке,
+# mmap_size и cache_size (в КиБ при отрицательном значении) уменьшают число
+# системных вызовов чтения, busy_timeout ждет освобождения блокировки
+# вместо немедленной ошибки "database is locked".
+PRAGMA_PROFILES = {
+    # Поведение SQLite по умолчанию: журнал отката и полная синхронизация
+    'legacy': {
+        'journal_mode': 'DELETE',
+        'synchronous': 'FULL',
+        'busy_timeout': 5000,
+    },
+    # WAL с полной синхронизацией каждого коммита
+    'durable': {
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'cache_size': -16000,
+        'busy_timeout': 5000,
+    },
+    # WAL без синхронизации на каждом коммите, отображение файла в память
+    'performance': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 64 * 1024 * 1024,
+        'cache_size': -16000,
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000,
+    },
+}
+
+# Профиль выбирается переменной окружения DB_PRAGMA_PROFILE
+DB_PRAGMA_PROFILE = os.getenv('DB_PRAGMA_PROFILE', 'performance')
+
+
+def resolve_db_name(db_name: str) -> str:
+    """
+    Возвращает файл базы данных с учетом режима единой базы
+
+    Args:
+        db_name: Имя файла базы данных класса по умолчанию
+
+    Returns:
+        Абсолютный путь DATABASE_PATH, если он задан, иначе db_name
+    """
+    return os.path.abspath(DATABASE_PATH) if DATABASE_PATH else db_name
+
+
+class Transaction:
+    def __init__(self, atomic: bool):
+        """
+        Состояние единицы работы, открытой в текущем потоке
+
+        Args:
+            atomic: Откатывать ли всю единицу работы при ошибке любого шага
+        """
+        self.atomic = atomic
+        self.connections = []
+        self.failed = False
+        self.committed = False
+        self.savepoint_counter = 0
+        self.after_commit = []
+
+
+class ConnectionManager:
+    def __init__(self, cached_statements: int = 256, pragma_profile: str = DB_PRAGMA_PROFILE):
+        """
+        Менеджер постоянных соединений с базами данных SQLite
+
+        Для каждого потока и каждого файла базы данных держит одно открытое
+        соединение, поэтому вызовы методов классов database/* не платят
+        за открытие файла и разбор схемы при каждом обращении.
+
+        Args:
+            cached_statements: Размер кэша подготовленных выражений соединения
+            pragma_profile: Имя профиля PRAGMA из PRAGMA_PROFILES
+        """
+        self.cached_statements = cached_statements
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._all_connections = []
+        self.logger = logging.getLogger(__name__)
+        self.pragmas = {}
+        self.set_pragma_profile(pragma_profile)
+
+    def set_pragma_profile(self, name: str) -> None:
+        """
+        Выбирает профиль PRAGMA для соединений, открываемых после вызова
+
+        Args:
+            name: Имя профиля из PRAGMA_PROFILES
+        """
+        if name not in PRAGMA_PROFILES:
+            raise ValueError(f"Неизвестный профиль PRAGMA: {name}. Доступны: {', '.join(PRAGMA_PROFILES)}")
+        self.pragma_profile = name
+        self.pragmas = PRAGMA_PROFILES[name]
+
+    def _apply_pragmas(self, conn: sqlite3.Connection, db_name: str) -> None:
+        """Применяет выбранный профиль PRAGMA к новому соединению"""
+        for pragma, value in self.pragmas.items():
+            try:
+                conn.execute(f'PRAGMA {pragma} = {value}')
+            except sqlite3.Error as e:
+                self.logger.error(f"Не удалось применить PRAGMA {pragma} = {value} к {db_name}: {e}")
+
+    def get_connection(self, db_name: str) -> sqlite3.Connection:
+        """
+        Возвращает соединение текущего потока с указанной базой
+
+        Args:
+            db_name: Имя файла базы данных
+
+        Returns:
+            Открытое соединение sqlite3
+        """
+        connections = getattr(self._local, 'connections', None)
+        if connections is None:
+            connections = self._local.connections = {}
+
+        conn = connections.get(db_name)
+        if conn is None:
+            conn = sqlite3.connect(
+                db_name,
+                cached_statements=self.cached_statements,
+                check_same_thread=False
+            )
+            self._apply_pragmas(conn, db_name)
+            connections[db_name] = conn
+            with self._lock:
+                self._all_connections.append(conn)
+            self.logger.debug(f"Открыто соединение с {db_name} в потоке {threading.current_thread().name}")
+        return conn
+
+    @contextmanager
+    def connection(self, db_name: str):
+        """
+        Выдает соединение на время блока with
+
+        Ведет себя как `with sqlite3.connect(...) as conn`: при успешном
+        выходе фиксирует транзакцию, при исключении откатывает ее.
+        Соединение при этом не закрывается и переиспользуется.
+
+        Args:
+            db_name: Имя файла базы данных
+        """
+        conn = self.get_connection(db_name)
+        previous_row_factory = conn.row_factory
+        conn.row_factory = None
+        try:
+            transaction = getattr(self._local, 'transaction', None)
+            if transaction is None:
+                with conn:
+                    yield conn
+            else:
+                with self._savepoint(transaction, conn):
+                    yield conn
+        finally:
+            conn.row_factory = previous_row_factory
+
+    def in_transaction(self) -> bool:
+        """Проверяет, открыта ли в текущем потоке единица работы"""
+        return getattr(self._local, 'transaction', None) is not None
+
+    def on_commit(self, callback) -> None:
+        """
+        Выполняет callback после фиксации изменений
+
+        Вне единицы работы callback вызывается сразу (изменения уже
+        зафиксированы), внутри - после коммита единицы работы; при откате
+        не вызывается.
+
+        Args:
+            callback: Функция без аргументов
+        """
+        transaction = getattr(self._local, 'transaction', None)
+        if transaction is None:
+            callback()
+        else:
+            transaction.after_commit.append(callback)
+
+    @contextmanager
+    def _savepoint(self, transaction: Transaction, conn: sqlite3.Connection):
+        """Выполняет блок внутри единицы работы под отдельной точкой сохранения"""
+        if conn not in transaction.connections:
+            if not conn.in_transaction:
+                conn.execute('BEGIN')
+            transaction.connections.append(conn)
+
+        transaction.savepoint_counter += 1
+        name = f'sp_{transaction.savepoint_counter}'
+        conn.execute(f'SAVEPOINT {name}')
+        try:
+            yield
+        except BaseException:
+            conn.execute(f'ROLLBACK TO {name}')
+            conn.execute(f'RELEASE {name}')
+            transaction.failed = True
+            raise
+        conn.execute(f'RELEASE {name}')
+
+    @contextmanager
+    def transaction(self, atomic: bool = True):
+        """
+        Объединяет вызовы методов database/* в одну единицу работы
+
+        Все изменения внутри блока фиксируются одним коммитом на каждый
+        затронутый файл. В режиме единой базы (DATABASE_PATH) это один
+        коммит и одна синхронизация с диском, а сама операция атомарна.
+        Каждый вызов метода выполняется под своей точкой сохранения, поэтому
+        ошибка шага откатывает его изменения; при atomic=True откатывается
+        вся единица работы, при atomic=False сохраняются успешные шаги.
+        Вложенный вызов присоединяется к уже открытой единице работы.
+
+        Args:
+            atomic: Откатывать ли все изменения при ошибке любого шага
+        """
+        current = getattr(self._local, 'transaction', None)
+        if current is not None:
+            yield current
+            return
+
+        transaction = self._local.transaction = Transaction(atomic)
+        commit = False
+        try:
+            yield transaction
+            commit = not (transaction.atomic and transaction.failed)
+        finally:
+            # Обработчики on_commit выполняются уже вне единицы работы и могут сами читать базу
+            self._local.transaction = None
+            self._finish(transaction, commit)
+
+    def _finish(self, transaction: Transaction, commit: bool) -> None:
+        """Фиксирует или откатывает все соединения единицы работы"""
+        for conn in transaction.connections:
+            if commit:
+                conn.commit()
+            else:
+                conn.rollback()
+        transaction.committed = commit
+        if commit:
+            for callback in transaction.after_commit:
+                try:
+                    callback()
+                except Exception as e:
+                    self.logger.error(f"Ошибка в обработчике фиксации единицы работы: {e}")
+        if len(transaction.connections) > 1:
+            self.logger.debug(
+                f"Единица работы затронула {len(transaction.connections)} файла баз данных, "
+                f"атомарность между файлами не гарантируется (задайте DATABASE_PATH)"
+            )
+
+    def close_all(self) -> None:
+        """Закрывает все открытые соединения всех потоков"""
+        with self._lock:
+            connections = self._all_connections
+            self._all_connections = []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error as e:
+                self.logger.error(f"Ошибка при закрытии соединения: {e}")
+        self._local = threading.local()
+
+
+connection_manager = ConnectionManager()
+
+
+def connect(db_name: str):
+    """
+    Возвращает контекстный менеджер соединения из общего пула
+
+    Args:
+        db_name: Имя файла базы данных
+    """
+    return connection_manager.connection(db_name)
+
+
+def transaction(atomic: bool = True):
+    """
+    Открывает единицу работы в общем пуле соединений
+
+    Args:
+        atomic: Откатывать ли все изменения при ошибке любого шага
+    """
+    return connection_manager.transaction(atomic)
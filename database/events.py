@@ -3,11 +3,14 @@ import sqlite3
 import logging
 from datetime import datetime
 
+from database.connection import connect, resolve_db_name
+from database.full_text import build_fts_query, create_fts_index
+
 
 class EventsDatabase:
     def __init__(self, db_name='others/events.db'):
-        os.makedirs(os.path.dirname(db_name), exist_ok=True)
-        self.db_name = db_name
+        self.db_name = resolve_db_name(db_name)
+        os.makedirs(os.path.dirname(self.db_name), exist_ok=True)
         self._create_table()
         self._setup_logging()
 
@@ -21,7 +24,7 @@ class EventsDatabase:
 
     def _create_table(self):
         """Создает таблицу событий"""
-        with sqlite3.connect(self.db_name) as conn:
+        with connect(self.db_name) as conn:
             conn.execute('''
                 CREATE TABLE IF NOT EXISTS events (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -33,15 +36,19 @@ class EventsDatabase:
                     date_modified TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
             ''')
+            # Старое имя индекса совпадало с индексами других таблиц единой базы
+            conn.execute('DROP INDEX IF EXISTS idx_date_created')
             # Создаем индексы для быстрого поиска
             conn.execute('CREATE INDEX IF NOT EXISTS idx_event_date ON events(event_date)')
-            conn.execute('CREATE INDEX IF NOT EXISTS idx_date_created ON events(date_created)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_events_date_created ON events(date_created)')
             conn.execute('CREATE INDEX IF NOT EXISTS idx_title ON events(title)')
+            # Полнотекстовый индекс для search_events
+            self.fts_enabled = create_fts_index(conn, 'events', ['title', 'description', 'location'])
 
     def add_event(self, title, description, event_date, location):
         """Добавляет новое событие"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 cursor = conn.execute(
                     '''INSERT INTO events 
                     (title, description, event_date, location) 
@@ -58,7 +65,7 @@ class EventsDatabase:
     def get_event(self, event_id):
         """Получает событие по ID"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.execute(
                     'SELECT * FROM events WHERE id = ?',
@@ -73,7 +80,7 @@ class EventsDatabase:
     def get_all_events(self, limit=100, offset=0):
         """Получает все события с пагинацией"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.execute(
                     'SELECT * FROM events ORDER BY event_date DESC LIMIT ? OFFSET ?',
@@ -88,7 +95,7 @@ class EventsDatabase:
         """Получает предстоящие события"""
         try:
             current_date = datetime.now().strftime('%d-%m-%Y %H:%M:%S')
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.execute(
                     'SELECT * FROM events WHERE event_date >= ? ORDER BY event_date ASC LIMIT ?',
@@ -103,7 +110,7 @@ class EventsDatabase:
         """Получает прошедшие события"""
         try:
             current_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.execute(
                     'SELECT * FROM events WHERE event_date < ? ORDER BY event_date DESC LIMIT ?',
@@ -117,7 +124,7 @@ class EventsDatabase:
     def update_event(self, event_id, title=None, description=None, event_date=None, location=None):
         """Обновляет событие"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 updates = []
                 params = []
 
@@ -154,7 +161,7 @@ class EventsDatabase:
     def delete_event(self, event_id):
         """Удаляет событие"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 cursor = conn.execute(
                     'DELETE FROM events WHERE id = ?',
                     (event_id,)
@@ -170,16 +177,28 @@ class EventsDatabase:
             return False
 
     def search_events(self, search_term):
-        """Ищет события по заголовку или описанию"""
+        """Ищет события по заголовку, описанию или месту, самые релевантные первыми"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 conn.row_factory = sqlite3.Row
-                cursor = conn.execute(
-                    '''SELECT * FROM events 
-                    WHERE title LIKE ? OR description LIKE ? 
-                    ORDER BY event_date DESC''',
-                    (f'%{search_term}%', f'%{search_term}%')
-                )
+                if self.fts_enabled:
+                    query = build_fts_query(search_term)
+                    if query is None:
+                        return []
+                    cursor = conn.execute(
+                        '''SELECT events.* FROM events_fts
+                        JOIN events ON events.id = events_fts.rowid
+                        WHERE events_fts MATCH ?
+                        ORDER BY events_fts.rank''',
+                        (query,)
+                    )
+                else:
+                    cursor = conn.execute(
+                        '''SELECT * FROM events 
+                        WHERE title LIKE ? OR description LIKE ? 
+                        ORDER BY event_date DESC''',
+                        (f'%{search_term}%', f'%{search_term}%')
+                    )
                 return [dict(row) for row in cursor.fetchall()]
         except sqlite3.Error as e:
             self.logger.error(f"Ошибка при поиске событий: {e}")
@@ -188,7 +207,7 @@ class EventsDatabase:
     def get_events_by_date_range(self, start_date, end_date):
         """Получает события в указанном диапазоне дат"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.execute(
                     'SELECT * FROM events WHERE event_date BETWEEN ? AND ? ORDER BY event_date ASC',
@@ -202,7 +221,7 @@ class EventsDatabase:
     def get_events_count(self):
         """Возвращает общее количество событий"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 cursor = conn.execute('SELECT COUNT(*) FROM events')
                 return cursor.fetchone()[0]
         except sqlite3.Error as e:
@@ -213,7 +232,7 @@ class EventsDatabase:
         """Возвращает количество предстоящих событий"""
         try:
             current_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 cursor = conn.execute(
                     'SELECT COUNT(*) FROM events WHERE event_date >= ?',
                     (current_date,)
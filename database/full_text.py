@@ -0,0 +1,88 @@
+import re
+import sqlite3
+import logging
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def create_fts_index(conn: sqlite3.Connection, table: str, columns: List[str]) -> bool:
+    """
+    Создает полнотекстовый индекс FTS5 для таблицы и триггеры его синхронизации
+
+    Индекс хранится во внешней таблице {table}_fts (content='{table}'),
+    поэтому тексты не дублируются: в индексе только токены. Триггеры
+    обновляют индекс при вставке, удалении и изменении индексируемых
+    столбцов. При первом создании индекс заполняется существующими строками.
+
+    Args:
+        conn: Соединение с базой данных
+        table: Имя таблицы с первичным ключом id
+        columns: Индексируемые столбцы
+
+    Returns:
+        True если индекс готов, False если SQLite собран без FTS5
+    """
+    fts_table = f'{table}_fts'
+    column_list = ', '.join(columns)
+    new_values = ', '.join(f'new.{column}' for column in columns)
+    old_values = ', '.join(f'old.{column}' for column in columns)
+
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+        (fts_table,)
+    ).fetchone() is not None
+
+    try:
+        conn.execute(f'''
+            CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5(
+                {column_list},
+                content='{table}',
+                content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            )
+        ''')
+    except sqlite3.OperationalError as e:
+        logger.warning(f"FTS5 недоступен, поиск по {table} будет выполняться через LIKE: {e}")
+        return False
+
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {fts_table}_ai AFTER INSERT ON {table} BEGIN
+            INSERT INTO {fts_table}(rowid, {column_list}) VALUES (new.id, {new_values});
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {fts_table}_ad AFTER DELETE ON {table} BEGIN
+            INSERT INTO {fts_table}({fts_table}, rowid, {column_list}) VALUES ('delete', old.id, {old_values});
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {fts_table}_au AFTER UPDATE OF {column_list} ON {table} BEGIN
+            INSERT INTO {fts_table}({fts_table}, rowid, {column_list}) VALUES ('delete', old.id, {old_values});
+            INSERT INTO {fts_table}(rowid, {column_list}) VALUES (new.id, {new_values});
+        END
+    ''')
+
+    if not exists:
+        conn.execute(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')")
+    return True
+
+
+def build_fts_query(search_term) -> Optional[str]:
+    """
+    Преобразует пользовательский ввод в запрос MATCH
+
+    Каждое слово ищется по префиксу, все слова должны встретиться в записи.
+    Слова берутся в кавычки, поэтому символы синтаксиса FTS5 во вводе
+    не приводят к ошибкам.
+
+    Args:
+        search_term: Строка поиска
+
+    Returns:
+        Запрос для MATCH или None, если во вводе нет слов
+    """
+    words = re.findall(r'\w+', str(search_term))
+    if not words:
+        return None
+    return ' '.join(f'"{word}"*' for word in words)
@@ -2,10 +2,12 @@ import os
 import sqlite3
 import logging
 
+from database.connection import connect, resolve_db_name
+
 class MailingDatabase:
     def __init__(self, db_name='others/mailing_subscriptions.db'):
-        os.makedirs(os.path.dirname(db_name), exist_ok=True)
-        self.db_name = db_name
+        self.db_name = resolve_db_name(db_name)
+        os.makedirs(os.path.dirname(self.db_name), exist_ok=True)
         self._create_table()
         self._setup_logging()
 
@@ -19,7 +21,7 @@ class MailingDatabase:
 
     def _create_table(self):
         """Создает таблицу подписок на рассылки"""
-        with sqlite3.connect(self.db_name) as conn:
+        with connect(self.db_name) as conn:
             conn.execute('''
                 CREATE TABLE IF NOT EXISTS mailing_subscriptions (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -27,19 +29,35 @@ class MailingDatabase:
                     chat_id INTEGER NOT NULL,
                     type TEXT NOT NULL CHECK (type IN ('university', 'dormitory')),
                     date_subscribed TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    failure_count INTEGER NOT NULL DEFAULT 0,
+                    active INTEGER NOT NULL DEFAULT 1,
                     UNIQUE(user_id, type)
                 )
             ''')
+            self._add_delivery_columns(conn)
+            # Старые имена индексов совпадали с индексами других таблиц единой базы
+            for index in ('idx_user_id', 'idx_chat_id'):
+                conn.execute(f'DROP INDEX IF EXISTS {index}')
             # Создаем индексы для быстрого поиска
-            conn.execute('CREATE INDEX IF NOT EXISTS idx_user_id ON mailing_subscriptions(user_id)')
-            conn.execute('CREATE INDEX IF NOT EXISTS idx_chat_id ON mailing_subscriptions(chat_id)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_mailing_user_id ON mailing_subscriptions(user_id)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_mailing_chat_id ON mailing_subscriptions(chat_id)')
             conn.execute('CREATE INDEX IF NOT EXISTS idx_type ON mailing_subscriptions(type)')
             conn.execute('CREATE INDEX IF NOT EXISTS idx_user_type ON mailing_subscriptions(user_id, type)')
+            # Для перебора подписчиков типа пачками по курсору id
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_mailing_type_id ON mailing_subscriptions(type, id)')
+
+    def _add_delivery_columns(self, conn):
+        """Добавляет столбцы учета недоставок в таблицу, созданную до их появления"""
+        columns = [row[1] for row in conn.execute('PRAGMA table_info(mailing_subscriptions)')]
+        if 'failure_count' not in columns:
+            conn.execute('ALTER TABLE mailing_subscriptions ADD COLUMN failure_count INTEGER NOT NULL DEFAULT 0')
+        if 'active' not in columns:
+            conn.execute('ALTER TABLE mailing_subscriptions ADD COLUMN active INTEGER NOT NULL DEFAULT 1')
 
     def add_subscription(self, user_id, chat_id, subscription_type):
         """Добавляет подписку на рассылку"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 conn.execute(
                     'INSERT OR REPLACE INTO mailing_subscriptions (user_id, chat_id, type) VALUES (?, ?, ?)',
                     (user_id, chat_id, subscription_type)
@@ -53,7 +71,7 @@ class MailingDatabase:
     def remove_subscription(self, user_id, subscription_type):
         """Удаляет подписку на рассылку"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 conn.execute(
                     'DELETE FROM mailing_subscriptions WHERE user_id = ? AND type = ?',
                     (user_id, subscription_type)
@@ -67,7 +85,7 @@ class MailingDatabase:
     def remove_all_user_subscriptions(self, user_id):
         """Удаляет все подписки пользователя"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 conn.execute(
                     'DELETE FROM mailing_subscriptions WHERE user_id = ?',
                     (user_id,)
@@ -81,9 +99,9 @@ class MailingDatabase:
     def is_subscribed(self, user_id, subscription_type):
         """Проверяет, подписан ли пользователь на указанный тип рассылки"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 cursor = conn.execute(
-                    'SELECT 1 FROM mailing_subscriptions WHERE user_id = ? AND type = ?',
+                    'SELECT 1 FROM mailing_subscriptions WHERE user_id = ? AND type = ? AND active = 1',
                     (user_id, subscription_type)
                 )
                 return cursor.fetchone() is not None
@@ -94,7 +112,7 @@ class MailingDatabase:
     def get_user_subscriptions(self, user_id):
         """Получает все подписки пользователя"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 cursor = conn.execute(
                     'SELECT type, chat_id, date_subscribed FROM mailing_subscriptions WHERE user_id = ? ORDER BY date_subscribed',
                     (user_id,)
@@ -107,9 +125,9 @@ class MailingDatabase:
     def get_subscribers_by_type(self, subscription_type):
         """Получает всех подписчиков указанного типа рассылки"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 cursor = conn.execute(
-                    'SELECT user_id, chat_id FROM mailing_subscriptions WHERE type = ? ORDER BY date_subscribed',
+                    'SELECT user_id, chat_id FROM mailing_subscriptions WHERE type = ? AND active = 1 ORDER BY date_subscribed',
                     (subscription_type,)
                 )
                 return [{'user_id': row[0], 'chat_id': row[1]} for row in cursor.fetchall()]
@@ -120,7 +138,7 @@ class MailingDatabase:
     def get_all_subscriptions(self):
         """Получает все подписки"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 cursor = conn.execute(
                     'SELECT user_id, chat_id, type, date_subscribed FROM mailing_subscriptions ORDER BY date_subscribed'
                 )
@@ -130,12 +148,97 @@ class MailingDatabase:
             self.logger.error(f"Ошибка при получении всех подписок: {e}")
             return []
 
+    def get_subscribers_batch(self, subscription_type, after_id=0, limit=500):
+        """Получает подписчиков указанного типа после курсора after_id (id подписки)"""
+        try:
+            with connect(self.db_name) as conn:
+                cursor = conn.execute(
+                    '''SELECT id, user_id, chat_id FROM mailing_subscriptions
+                    WHERE type = ? AND active = 1 AND id > ? ORDER BY id LIMIT ?''',
+                    (subscription_type, after_id, limit)
+                )
+                return [{'id': row[0], 'user_id': row[1], 'chat_id': row[2]} for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            self.logger.error(f"Ошибка при получении подписчиков по типу: {e}")
+            return []
+
+    def iter_subscribers_by_type(self, subscription_type, batch_size=500):
+        """Перебирает подписчиков указанного типа пачками по batch_size, не загружая всех в память"""
+        after_id = 0
+        while True:
+            batch = self.get_subscribers_batch(subscription_type, after_id, batch_size)
+            if not batch:
+                return
+            yield batch
+            after_id = batch[-1]['id']
+
+    def get_subscriptions_batch(self, after_id=0, limit=500):
+        """Получает подписки после курсора after_id (id подписки)"""
+        try:
+            with connect(self.db_name) as conn:
+                cursor = conn.execute(
+                    'SELECT id, user_id, chat_id, type, date_subscribed FROM mailing_subscriptions WHERE id > ? ORDER BY id LIMIT ?',
+                    (after_id, limit)
+                )
+                return [{'id': row[0], 'user_id': row[1], 'chat_id': row[2], 'type': row[3], 'date_subscribed': row[4]}
+                        for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            self.logger.error(f"Ошибка при получении всех подписок: {e}")
+            return []
+
+    def iter_all_subscriptions(self, batch_size=500):
+        """Перебирает все подписки пачками по batch_size, не загружая все в память"""
+        after_id = 0
+        while True:
+            batch = self.get_subscriptions_batch(after_id, batch_size)
+            if not batch:
+                return
+            yield batch
+            after_id = batch[-1]['id']
+
+    def record_delivery_results(self, delivered_user_ids, failed_user_ids, threshold=3):
+        """
+        Учитывает итоги рассылки: успешная доставка обнуляет счетчик недоставок,
+        а подписки пользователя, которому не удалось доставить threshold раз подряд,
+        отключаются. Возвращает количество отключенных подписок
+        """
+        try:
+            with connect(self.db_name) as conn:
+                conn.executemany(
+                    'UPDATE mailing_subscriptions SET failure_count = 0 WHERE user_id = ? AND failure_count > 0',
+                    [(user_id,) for user_id in delivered_user_ids]
+                )
+                conn.executemany(
+                    'UPDATE mailing_subscriptions SET failure_count = failure_count + 1 WHERE user_id = ? AND active = 1',
+                    [(user_id,) for user_id in failed_user_ids]
+                )
+                cursor = conn.executemany(
+                    'UPDATE mailing_subscriptions SET active = 0 WHERE user_id = ? AND active = 1 AND failure_count >= ?',
+                    [(user_id, threshold) for user_id in failed_user_ids]
+                )
+                if cursor.rowcount:
+                    self.logger.info(f"Отключено недоступных подписок: {cursor.rowcount}")
+                return cursor.rowcount
+        except sqlite3.Error as e:
+            self.logger.error(f"Ошибка при учете итогов рассылки: {e}")
+            return 0
+
+    def get_inactive_count(self):
+        """Возвращает количество подписок, отключенных из-за недоставок"""
+        try:
+            with connect(self.db_name) as conn:
+                cursor = conn.execute('SELECT COUNT(*) FROM mailing_subscriptions WHERE active = 0')
+                return cursor.fetchone()[0]
+        except sqlite3.Error as e:
+            self.logger.error(f"Ошибка при подсчете отключенных подписок: {e}")
+            return 0
+
     def get_count_by_type(self, subscription_type):
         """Возвращает количество подписчиков указанного типа"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 cursor = conn.execute(
-                    'SELECT COUNT(*) FROM mailing_subscriptions WHERE type = ?',
+                    'SELECT COUNT(*) FROM mailing_subscriptions WHERE type = ? AND active = 1',
                     (subscription_type,)
                 )
                 return cursor.fetchone()[0]
@@ -146,7 +249,7 @@ class MailingDatabase:
     def get_total_count(self):
         """Возвращает общее количество подписок"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 cursor = conn.execute('SELECT COUNT(*) FROM mailing_subscriptions')
                 return cursor.fetchone()[0]
         except sqlite3.Error as e:
@@ -156,7 +259,7 @@ class MailingDatabase:
     def clear_all(self):
         """Очищает всю таблицу подписок"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 conn.execute('DELETE FROM mailing_subscriptions')
                 self.logger.info("Таблица подписок очищена")
                 return True
@@ -3,11 +3,14 @@ import sqlite3
 import logging
 import json
 
+from database.connection import connect, resolve_db_name
+from database.full_text import build_fts_query, create_fts_index
+
 
 class NewsDatabase:
     def __init__(self, db_name='others/news.db'):
-        os.makedirs(os.path.dirname(db_name), exist_ok=True)
-        self.db_name = db_name
+        self.db_name = resolve_db_name(db_name)
+        os.makedirs(os.path.dirname(self.db_name), exist_ok=True)
         self._create_table()
         self._setup_logging()
 
@@ -21,7 +24,7 @@ class NewsDatabase:
 
     def _create_table(self):
         """Создает таблицу новостей с оптимальной структурой"""
-        with sqlite3.connect(self.db_name) as conn:
+        with connect(self.db_name) as conn:
             conn.execute('''
                 CREATE TABLE IF NOT EXISTS news (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -29,27 +32,116 @@ class NewsDatabase:
                     description TEXT NOT NULL,
                     publication_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     news_type TEXT NOT NULL CHECK (news_type IN ('university', 'dormitory')),
-                    message_ids TEXT DEFAULT '[]'
+                    publish_at TIMESTAMP,
+                    published INTEGER NOT NULL DEFAULT 1,
+                    author_chat_id INTEGER
+                )
+            ''')
+            self._add_schedule_columns(conn)
+            # Доставки новости подписчикам: по строке на каждое отправленное сообщение
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS news_deliveries (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    news_id INTEGER NOT NULL,
+                    user_id INTEGER,
+                    message_id TEXT,
+                    status TEXT NOT NULL DEFAULT 'sent',  -- sent, failed, deleted, recall_failed
+                    date_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY(news_id) REFERENCES news(id)
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_news_deliveries_news_id ON news_deliveries(news_id, status)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_news_deliveries_message_id ON news_deliveries(message_id)')
+            self._migrate_message_ids(conn)
+            # Метрики каждой рассылки, правки и отзыва новости
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS news_broadcast_stats (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    news_id INTEGER NOT NULL,
+                    kind TEXT NOT NULL CHECK (kind IN ('publish', 'edit', 'recall')),
+                    attempted INTEGER NOT NULL DEFAULT 0,
+                    delivered INTEGER NOT NULL DEFAULT 0,
+                    failed INTEGER NOT NULL DEFAULT 0,
+                    failures TEXT NOT NULL DEFAULT '{}',
+                    latency_p50 REAL,
+                    latency_p95 REAL,
+                    messages_per_second REAL,
+                    duration REAL,
+                    date_finished TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    job_id INTEGER
                 )
             ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_news_broadcast_stats_news_id ON news_broadcast_stats(news_id)')
+            self._add_stats_job_column(conn)
+            # Задание рассылки, выполненное в несколько запусков, дает одну строку метрик
+            conn.execute(
+                'CREATE UNIQUE INDEX IF NOT EXISTS idx_news_broadcast_stats_job_id ON news_broadcast_stats(job_id)'
+            )
             # Создаем индексы для быстрого поиска
             conn.execute('CREATE INDEX IF NOT EXISTS idx_news_type ON news(news_type)')
             conn.execute('CREATE INDEX IF NOT EXISTS idx_publication_date ON news(publication_date)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_news_scheduled ON news(published, publish_at)')
+            # Полнотекстовый индекс для search_news
+            self.fts_enabled = create_fts_index(conn, 'news', ['title', 'description'])
+
+    def _add_schedule_columns(self, conn):
+        """Добавляет столбцы отложенной публикации в таблицу, созданную до их появления"""
+        columns = [row[1] for row in conn.execute('PRAGMA table_info(news)')]
+        if 'publish_at' not in columns:
+            conn.execute('ALTER TABLE news ADD COLUMN publish_at TIMESTAMP')
+        if 'published' not in columns:
+            conn.execute('ALTER TABLE news ADD COLUMN published INTEGER NOT NULL DEFAULT 1')
+        if 'author_chat_id' not in columns:
+            conn.execute('ALTER TABLE news ADD COLUMN author_chat_id INTEGER')
 
-    def add_news(self, title, description, news_type, message_ids=None):
-        """Добавляет новость в базу"""
+    def _migrate_message_ids(self, conn):
+        """Переносит message_ids из JSON-столбца news.message_ids в таблицу news_deliveries"""
+        columns = [row[1] for row in conn.execute('PRAGMA table_info(news)')]
+        if 'message_ids' not in columns:
+            return
+
+        deliveries = []
+        for news_id, message_ids in conn.execute(
+            "SELECT id, message_ids FROM news WHERE message_ids NOT IN ('', '[]')"
+        ):
+            try:
+                deliveries.extend((news_id, str(message_id)) for message_id in json.loads(message_ids))
+            except (ValueError, TypeError) as e:
+                # Логгер еще не настроен: таблицы создаются раньше _setup_logging
+                logging.getLogger(__name__).error(
+                    f"Пропущены некорректные message_ids новости {news_id} ({message_ids!r}): {e}"
+                )
+        conn.executemany('INSERT INTO news_deliveries (news_id, message_id) VALUES (?, ?)', deliveries)
         try:
-            with sqlite3.connect(self.db_name) as conn:
-                # Сериализуем массив message_ids в JSON строку
-                message_ids_json = json.dumps(message_ids if message_ids else [])
+            conn.execute('ALTER TABLE news DROP COLUMN message_ids')
+        except sqlite3.OperationalError:
+            # SQLite до 3.35 не умеет удалять столбцы - просто очищаем его
+            conn.execute("UPDATE news SET message_ids = '[]'")
 
+    @staticmethod
+    def _news_row(row):
+        """Преобразует строку таблицы news в словарь"""
+        news_dict = dict(row)
+        # Столбец message_ids остается в базах, созданных до news_deliveries на старых SQLite
+        news_dict.pop('message_ids', None)
+        return news_dict
+
+    def add_news(self, title, description, news_type, message_ids=None, publish_at=None, author_chat_id=None):
+        """Добавляет новость в базу (с publish_at - отложенную, до публикации published = 0)"""
+        try:
+            with connect(self.db_name) as conn:
                 cursor = conn.execute(
                     '''INSERT INTO news 
-                    (title, description, news_type, message_ids) 
-                    VALUES (?, ?, ?, ?)''',
-                    (title, description, news_type, message_ids_json)
+                    (title, description, news_type, publish_at, published, author_chat_id) 
+                    VALUES (?, ?, ?, ?, ?, ?)''',
+                    (title, description, news_type, publish_at, 0 if publish_at else 1, author_chat_id)
                 )
                 news_id = cursor.lastrowid
+                if message_ids:
+                    conn.executemany(
+                        'INSERT INTO news_deliveries (news_id, message_id) VALUES (?, ?)',
+                        [(news_id, str(message_id)) for message_id in message_ids]
+                    )
                 self.logger.info(f"Добавлена новость: {news_id} - {title}, тип: {news_type}")
                 return news_id
         except sqlite3.Error as e:
@@ -59,19 +151,14 @@ class NewsDatabase:
     def get_news(self, news_id):
         """Ищет новость по ID"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.execute(
                     'SELECT * FROM news WHERE id = ?',
                     (news_id,)
                 )
                 result = cursor.fetchone()
-                if result:
-                    news_dict = dict(result)
-                    # Десериализуем JSON строку обратно в массив
-                    news_dict['message_ids'] = json.loads(news_dict['message_ids'])
-                    return news_dict
-                return None
+                return self._news_row(result) if result else None
         except sqlite3.Error as e:
             self.logger.error(f"Ошибка при поиске новости: {e}")
             return None
@@ -79,19 +166,13 @@ class NewsDatabase:
     def get_news_by_type(self, news_type, limit=50, offset=0):
         """Получает новости по типу"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.execute(
                     'SELECT * FROM news WHERE news_type = ? ORDER BY publication_date DESC LIMIT ? OFFSET ?',
                     (news_type, limit, offset)
                 )
-                news_list = []
-                for row in cursor.fetchall():
-                    news_dict = dict(row)
-                    # Десериализуем JSON строку обратно в массив
-                    news_dict['message_ids'] = json.loads(news_dict['message_ids'])
-                    news_list.append(news_dict)
-                return news_list
+                return [self._news_row(row) for row in cursor.fetchall()]
         except sqlite3.Error as e:
             self.logger.error(f"Ошибка при получении новостей по типу: {e}")
             return []
@@ -99,19 +180,34 @@ class NewsDatabase:
     def get_all_news(self, limit=100, offset=0):
         """Получает все новости с пагинацией"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.execute(
-                    'SELECT * FROM news ORDER BY publication_date DESC LIMIT ? OFFSET ?',
+                    'SELECT * FROM news ORDER BY publication_date DESC, id DESC LIMIT ? OFFSET ?',
                     (limit, offset)
                 )
-                news_list = []
-                for row in cursor.fetchall():
-                    news_dict = dict(row)
-                    # Десериализуем JSON строку обратно в массив
-                    news_dict['message_ids'] = json.loads(news_dict['message_ids'])
-                    news_list.append(news_dict)
-                return news_list
+                return [self._news_row(row) for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            self.logger.error(f"Ошибка при получении всех новостей: {e}")
+            return []
+
+    def get_all_news_after(self, after_date=None, after_id=None, limit=100):
+        """Получает новости после курсора (after_date, after_id) - последней показанной записи"""
+        try:
+            with connect(self.db_name) as conn:
+                conn.row_factory = sqlite3.Row
+                if after_date is None:
+                    cursor = conn.execute(
+                        'SELECT * FROM news ORDER BY publication_date DESC, id DESC LIMIT ?',
+                        (limit,)
+                    )
+                else:
+                    cursor = conn.execute(
+                        '''SELECT * FROM news WHERE (publication_date, id) < (?, ?)
+                        ORDER BY publication_date DESC, id DESC LIMIT ?''',
+                        (after_date, after_id, limit)
+                    )
+                return [self._news_row(row) for row in cursor.fetchall()]
         except sqlite3.Error as e:
             self.logger.error(f"Ошибка при получении всех новостей: {e}")
             return []
@@ -119,7 +215,7 @@ class NewsDatabase:
     def get_latest_news(self, news_type=None, limit=10):
         """Получает последние новости (все или по типу)"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 conn.row_factory = sqlite3.Row
                 if news_type:
                     cursor = conn.execute(
@@ -131,21 +227,56 @@ class NewsDatabase:
                         'SELECT * FROM news ORDER BY publication_date DESC LIMIT ?',
                         (limit,)
                     )
-                news_list = []
-                for row in cursor.fetchall():
-                    news_dict = dict(row)
-                    # Десериализуем JSON строку обратно в массив
-                    news_dict['message_ids'] = json.loads(news_dict['message_ids'])
-                    news_list.append(news_dict)
-                return news_list
+                return [self._news_row(row) for row in cursor.fetchall()]
         except sqlite3.Error as e:
             self.logger.error(f"Ошибка при получении последних новостей: {e}")
             return []
 
-    def update_news(self, news_id, title=None, description=None, news_type=None, message_ids=None):
+    def get_due_news(self, now):
+        """Получает отложенные новости, время публикации которых наступило к now"""
+        try:
+            with connect(self.db_name) as conn:
+                conn.row_factory = sqlite3.Row
+                cursor = conn.execute(
+                    'SELECT * FROM news WHERE published = 0 AND publish_at <= ? ORDER BY publish_at, id',
+                    (now,)
+                )
+                return [self._news_row(row) for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            self.logger.error(f"Ошибка при получении отложенных новостей: {e}")
+            return []
+
+    def get_scheduled_news(self, limit=50):
+        """Получает еще не опубликованные отложенные новости в порядке публикации"""
+        try:
+            with connect(self.db_name) as conn:
+                conn.row_factory = sqlite3.Row
+                cursor = conn.execute(
+                    'SELECT * FROM news WHERE published = 0 ORDER BY publish_at, id LIMIT ?',
+                    (limit,)
+                )
+                return [self._news_row(row) for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            self.logger.error(f"Ошибка при получении отложенных новостей: {e}")
+            return []
+
+    def mark_published(self, news_id):
+        """Отмечает отложенную новость опубликованной, возвращает False если она уже опубликована"""
+        try:
+            with connect(self.db_name) as conn:
+                cursor = conn.execute(
+                    'UPDATE news SET published = 1, publication_date = CURRENT_TIMESTAMP WHERE id = ? AND published = 0',
+                    (news_id,)
+                )
+                return cursor.rowcount > 0
+        except sqlite3.Error as e:
+            self.logger.error(f"Ошибка при публикации новости {news_id}: {e}")
+            return False
+
+    def update_news(self, news_id, title=None, description=None, news_type=None):
         """Обновляет новость"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 updates = []
                 params = []
 
@@ -158,11 +289,6 @@ class NewsDatabase:
                 if news_type:
                     updates.append("news_type = ?")
                     params.append(news_type)
-                if message_ids is not None:
-                    # Сериализуем массив message_ids в JSON строку
-                    message_ids_json = json.dumps(message_ids)
-                    updates.append("message_ids = ?")
-                    params.append(message_ids_json)
 
                 if updates:
                     params.append(news_id)
@@ -175,42 +301,198 @@ class NewsDatabase:
             self.logger.error(f"Ошибка при обновлении новости: {e}")
             return False
 
-    def add_message_id(self, news_id, message_id):
-        """Добавляет message_id к существующей новости"""
+    def add_deliveries(self, news_id, deliveries):
+        """Сохраняет доставки новости одной пачкой: список (user_id, message_id, status)"""
         try:
-            news = self.get_news(news_id)
-            if not news:
-                return False
+            with connect(self.db_name) as conn:
+                conn.executemany(
+                    'INSERT INTO news_deliveries (news_id, user_id, message_id, status) VALUES (?, ?, ?, ?)',
+                    [(news_id, user_id, message_id, status) for user_id, message_id, status in deliveries]
+                )
+                return True
+        except sqlite3.Error as e:
+            self.logger.error(f"Ошибка при сохранении доставок новости {news_id}: {e}")
+            return False
 
-            message_ids = news.get('message_ids', [])
-            if message_id not in message_ids:
-                message_ids.append(message_id)
-                return self.update_news(news_id, message_ids=message_ids)
-            return True
-        except Exception as e:
-            self.logger.error(f"Ошибка при добавлении message_id: {e}")
+    def get_deliveries(self, news_id, status=None):
+        """Получает доставки новости (все или с указанным статусом)"""
+        try:
+            with connect(self.db_name) as conn:
+                conn.row_factory = sqlite3.Row
+                if status:
+                    cursor = conn.execute(
+                        'SELECT * FROM news_deliveries WHERE news_id = ? AND status = ? ORDER BY id',
+                        (news_id, status)
+                    )
+                else:
+                    cursor = conn.execute(
+                        'SELECT * FROM news_deliveries WHERE news_id = ? ORDER BY id',
+                        (news_id,)
+                    )
+                return [dict(row) for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            self.logger.error(f"Ошибка при получении доставок новости {news_id}: {e}")
+            return []
+
+    def get_message_ids(self, news_id):
+        """Возвращает id доставленных сообщений новости"""
+        try:
+            with connect(self.db_name) as conn:
+                cursor = conn.execute(
+                    "SELECT message_id FROM news_deliveries WHERE news_id = ? AND status = 'sent' ORDER BY id",
+                    (news_id,)
+                )
+                return [row[0] for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            self.logger.error(f"Ошибка при получении сообщений новости {news_id}: {e}")
+            return []
+
+    def update_delivery_status(self, news_id, message_id, status):
+        """Обновляет статус доставки сообщения новости"""
+        try:
+            with connect(self.db_name) as conn:
+                cursor = conn.execute(
+                    '''UPDATE news_deliveries 
+                    SET status = ?, date_updated = CURRENT_TIMESTAMP 
+                    WHERE news_id = ? AND message_id = ?''',
+                    (status, news_id, message_id)
+                )
+                return cursor.rowcount > 0
+        except sqlite3.Error as e:
+            self.logger.error(f"Ошибка при обновлении доставки {message_id}: {e}")
             return False
 
+    def update_deliveries_status(self, news_id, updates):
+        """Обновляет статусы доставок новости пачкой: список (message_id, status)"""
+        try:
+            with connect(self.db_name) as conn:
+                conn.executemany(
+                    '''UPDATE news_deliveries 
+                    SET status = ?, date_updated = CURRENT_TIMESTAMP 
+                    WHERE news_id = ? AND message_id = ?''',
+                    [(status, news_id, message_id) for message_id, status in updates]
+                )
+                return True
+        except sqlite3.Error as e:
+            self.logger.error(f"Ошибка при обновлении доставок новости {news_id}: {e}")
+            return False
+
+    def delete_deliveries(self, news_id, status=None):
+        """Удаляет доставки новости (все или с указанным статусом)"""
+        try:
+            with connect(self.db_name) as conn:
+                if status:
+                    conn.execute('DELETE FROM news_deliveries WHERE news_id = ? AND status = ?', (news_id, status))
+                else:
+                    conn.execute('DELETE FROM news_deliveries WHERE news_id = ?', (news_id,))
+                return True
+        except sqlite3.Error as e:
+            self.logger.error(f"Ошибка при удалении доставок новости {news_id}: {e}")
+            return False
+
+    def _add_stats_job_column(self, conn):
+        """Добавляет столбец задания рассылки в таблицу метрик, созданную до его появления"""
+        columns = [row[1] for row in conn.execute('PRAGMA table_info(news_broadcast_stats)')]
+        if 'job_id' not in columns:
+            conn.execute('ALTER TABLE news_broadcast_stats ADD COLUMN job_id INTEGER')
+
+    def add_broadcast_stats(self, news_id, kind, attempted, delivered, failed, failures,
+                            latency_p50=None, latency_p95=None, messages_per_second=None, duration=None,
+                            job_id=None):
+        """
+        Сохраняет метрики рассылки новости (failures - словарь причина: количество)
+
+        Метрики задания рассылки (job_id) хранятся одной строкой: итоги очередного
+        запуска после остановки или перезапуска бота прибавляются к ней, а задержки
+        берутся из последнего запуска.
+        """
+        try:
+            with connect(self.db_name) as conn:
+                previous = None
+                if job_id is not None:
+                    previous = conn.execute(
+                        'SELECT id, attempted, delivered, failed, failures, duration '
+                        'FROM news_broadcast_stats WHERE job_id = ?',
+                        (job_id,)
+                    ).fetchone()
+                if previous:
+                    stats_id, prev_attempted, prev_delivered, prev_failed, prev_failures, prev_duration = previous
+                    merged = json.loads(prev_failures)
+                    for reason, count in failures.items():
+                        merged[reason] = merged.get(reason, 0) + count
+                    attempted += prev_attempted
+                    duration = (duration or 0) + (prev_duration or 0)
+                    conn.execute(
+                        '''UPDATE news_broadcast_stats SET
+                        attempted = ?, delivered = ?, failed = ?, failures = ?,
+                        latency_p50 = COALESCE(?, latency_p50), latency_p95 = COALESCE(?, latency_p95),
+                        messages_per_second = ?, duration = ?, date_finished = CURRENT_TIMESTAMP
+                        WHERE id = ?''',
+                        (attempted, delivered + prev_delivered, failed + prev_failed, json.dumps(merged),
+                         latency_p50, latency_p95, attempted / duration if duration > 0 else 0.0, duration,
+                         stats_id)
+                    )
+                    return stats_id
+                cursor = conn.execute(
+                    '''INSERT INTO news_broadcast_stats 
+                    (news_id, kind, attempted, delivered, failed, failures,
+                     latency_p50, latency_p95, messages_per_second, duration, job_id) 
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+                    (news_id, kind, attempted, delivered, failed, json.dumps(failures),
+                     latency_p50, latency_p95, messages_per_second, duration, job_id)
+                )
+                return cursor.lastrowid
+        except sqlite3.Error as e:
+            self.logger.error(f"Ошибка при сохранении метрик рассылки новости {news_id}: {e}")
+            return None
+
+    def get_broadcast_stats(self, news_id=None, limit=10):
+        """Получает последние метрики рассылок (всех новостей или одной) с заголовком новости"""
+        try:
+            with connect(self.db_name) as conn:
+                conn.row_factory = sqlite3.Row
+                query = '''SELECT news_broadcast_stats.*, news.title FROM news_broadcast_stats
+                    LEFT JOIN news ON news.id = news_broadcast_stats.news_id'''
+                if news_id is not None:
+                    cursor = conn.execute(
+                        f'{query} WHERE news_broadcast_stats.news_id = ? ORDER BY news_broadcast_stats.id DESC LIMIT ?',
+                        (news_id, limit)
+                    )
+                else:
+                    cursor = conn.execute(f'{query} ORDER BY news_broadcast_stats.id DESC LIMIT ?', (limit,))
+                stats = []
+                for row in cursor.fetchall():
+                    item = dict(row)
+                    item['failures'] = json.loads(item['failures'])
+                    stats.append(item)
+                return stats
+        except sqlite3.Error as e:
+            self.logger.error(f"Ошибка при получении метрик рассылок: {e}")
+            return []
+
+    def add_message_id(self, news_id, message_id):
+        """Добавляет message_id к существующей новости"""
+        return self.add_deliveries(news_id, [(None, str(message_id), 'sent')])
+
     def remove_message_id(self, news_id, message_id):
         """Удаляет message_id из новости"""
         try:
-            news = self.get_news(news_id)
-            if not news:
-                return False
-
-            message_ids = news.get('message_ids', [])
-            if message_id in message_ids:
-                message_ids.remove(message_id)
-                return self.update_news(news_id, message_ids=message_ids)
-            return True
-        except Exception as e:
+            with connect(self.db_name) as conn:
+                conn.execute(
+                    'DELETE FROM news_deliveries WHERE news_id = ? AND message_id = ?',
+                    (news_id, str(message_id))
+                )
+                return True
+        except sqlite3.Error as e:
             self.logger.error(f"Ошибка при удалении message_id: {e}")
             return False
 
-    def delete_news(self, news_id):
-        """Удаляет новость из базы"""
+    def delete_news(self, news_id, keep_deliveries=False):
+        """Удаляет новость из базы (keep_deliveries - оставить доставки для отзыва сообщений)"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
+                if not keep_deliveries:
+                    conn.execute('DELETE FROM news_deliveries WHERE news_id = ?', (news_id,))
                 conn.execute('DELETE FROM news WHERE id = ?', (news_id,))
                 self.logger.info(f"Удалена новость: {news_id}")
                 return True
@@ -221,7 +503,7 @@ class NewsDatabase:
     def get_news_count(self, news_type=None):
         """Возвращает количество новостей (всех или по типу)"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 if news_type:
                     cursor = conn.execute('SELECT COUNT(*) FROM news WHERE news_type = ?', (news_type,))
                 else:
@@ -232,22 +514,28 @@ class NewsDatabase:
             return 0
 
     def search_news(self, search_term, limit=20):
-        """Ищет новости по заголовку или описанию"""
+        """Ищет новости по заголовку или описанию, самые релевантные первыми"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 conn.row_factory = sqlite3.Row
-                search_pattern = f'%{search_term}%'
-                cursor = conn.execute(
-                    'SELECT * FROM news WHERE title LIKE ? OR description LIKE ? ORDER BY publication_date DESC LIMIT ?',
-                    (search_pattern, search_pattern, limit)
-                )
-                news_list = []
-                for row in cursor.fetchall():
-                    news_dict = dict(row)
-                    # Десериализуем JSON строку обратно в массив
-                    news_dict['message_ids'] = json.loads(news_dict['message_ids'])
-                    news_list.append(news_dict)
-                return news_list
+                if self.fts_enabled:
+                    query = build_fts_query(search_term)
+                    if query is None:
+                        return []
+                    cursor = conn.execute(
+                        '''SELECT news.* FROM news_fts
+                        JOIN news ON news.id = news_fts.rowid
+                        WHERE news_fts MATCH ?
+                        ORDER BY news_fts.rank LIMIT ?''',
+                        (query, limit)
+                    )
+                else:
+                    search_pattern = f'%{search_term}%'
+                    cursor = conn.execute(
+                        'SELECT * FROM news WHERE title LIKE ? OR description LIKE ? ORDER BY publication_date DESC LIMIT ?',
+                        (search_pattern, search_pattern, limit)
+                    )
+                return [self._news_row(row) for row in cursor.fetchall()]
         except sqlite3.Error as e:
             self.logger.error(f"Ошибка при поиске новостей: {e}")
             return []
@@ -255,7 +543,9 @@ class NewsDatabase:
     def clear_all(self):
         """Очищает всю таблицу новостей"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
+                conn.execute('DELETE FROM news_deliveries')
+                conn.execute('DELETE FROM news_broadcast_stats')
                 conn.execute('DELETE FROM news')
                 self.logger.info("Таблица новостей очищена")
                 return True
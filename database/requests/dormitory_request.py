@@ -2,13 +2,15 @@ import sqlite3
 import logging
 import os
 
+from database.connection import connect, resolve_db_name
+
 
 class DormitoryRequestDatabase:
     def __init__(self, db_name='others/dormitory_requests.db'):
+        self.db_name = resolve_db_name(db_name)
         # Создаем папку others, если она не существует
-        os.makedirs(os.path.dirname(db_name), exist_ok=True)
+        os.makedirs(os.path.dirname(self.db_name), exist_ok=True)
 
-        self.db_name = db_name
         self._create_table()
         self._setup_logging()
 
@@ -22,7 +24,7 @@ class DormitoryRequestDatabase:
 
     def _create_table(self):
         """Создает таблицу заявок с оптимальной структурой"""
-        with sqlite3.connect(self.db_name) as conn:
+        with connect(self.db_name) as conn:
             conn.execute('''
                 CREATE TABLE IF NOT EXISTS requests (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -36,32 +38,36 @@ class DormitoryRequestDatabase:
                     UNIQUE(user_id, submission_date)
                 )
             ''')
+            # Старые имена индексов совпадали с индексами других таблиц единой базы
+            for index in ('idx_user_id', 'idx_chat_id'):
+                conn.execute(f'DROP INDEX IF EXISTS {index}')
             # Создаем индексы для быстрого поиска
-            conn.execute('CREATE INDEX IF NOT EXISTS idx_user_id ON requests(user_id)')
-            conn.execute('CREATE INDEX IF NOT EXISTS idx_chat_id ON requests(chat_id)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_dormitory_user_id ON requests(user_id)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_dormitory_chat_id ON requests(chat_id)')
             conn.execute('CREATE INDEX IF NOT EXISTS idx_submission_date ON requests(submission_date)')
             conn.execute('CREATE INDEX IF NOT EXISTS idx_user_group ON requests(user_group)')
 
     def add_request(self, user_id, chat_id, username, user_group, date_of_birthday, reason):
-        """Добавляет заявку в базу данных"""
+        """Добавляет заявку в базу данных и возвращает ее ID"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
-                conn.execute(
+            with connect(self.db_name) as conn:
+                cursor = conn.execute(
                     '''INSERT INTO requests 
                     (user_id, chat_id, username, user_group, date_of_birthday, reason) 
                     VALUES (?, ?, ?, ?, ?, ?)''',
                     (user_id, chat_id, username, user_group, date_of_birthday, reason)
                 )
-                self.logger.info(f"Добавлена заявка от пользователя: {username} (ID: {user_id})")
-                return True
+                request_id = cursor.lastrowid
+                self.logger.info(f"Добавлена заявка {request_id} от пользователя: {username} (ID: {user_id})")
+                return request_id
         except sqlite3.Error as e:
             self.logger.error(f"Ошибка при добавлении заявки: {e}")
-            return False
+            return None
 
     def get_requests_by_user(self, user_id):
         """Ищет заявки по user_id"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.execute(
                     'SELECT * FROM requests WHERE user_id = ? ORDER BY submission_date DESC',
@@ -75,7 +81,7 @@ class DormitoryRequestDatabase:
     def get_requests_by_chat(self, chat_id):
         """Ищет заявки по chat_id"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.execute(
                     'SELECT * FROM requests WHERE chat_id = ? ORDER BY submission_date DESC',
@@ -89,10 +95,10 @@ class DormitoryRequestDatabase:
     def get_all_requests(self, limit=100, offset=0):
         """Получает все заявки с пагинацией"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.execute(
-                    'SELECT * FROM requests ORDER BY submission_date DESC LIMIT ? OFFSET ?',
+                    'SELECT * FROM requests ORDER BY submission_date DESC, id DESC LIMIT ? OFFSET ?',
                     (limit, offset)
                 )
                 return [dict(row) for row in cursor.fetchall()]
@@ -100,10 +106,53 @@ class DormitoryRequestDatabase:
             self.logger.error(f"Ошибка при получении заявок: {e}")
             return []
 
+    def get_all_requests_after(self, after_date=None, after_id=None, limit=100):
+        """Получает заявки после курсора (after_date, after_id) - последней показанной записи"""
+        try:
+            with connect(self.db_name) as conn:
+                conn.row_factory = sqlite3.Row
+                if after_date is None:
+                    cursor = conn.execute(
+                        'SELECT * FROM requests ORDER BY submission_date DESC, id DESC LIMIT ?',
+                        (limit,)
+                    )
+                else:
+                    cursor = conn.execute(
+                        '''SELECT * FROM requests WHERE (submission_date, id) < (?, ?)
+                        ORDER BY submission_date DESC, id DESC LIMIT ?''',
+                        (after_date, after_id, limit)
+                    )
+                return [dict(row) for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            self.logger.error(f"Ошибка при получении заявок: {e}")
+            return []
+
+    def get_request(self, request_id):
+        """Ищет заявку по ID"""
+        try:
+            with connect(self.db_name) as conn:
+                conn.row_factory = sqlite3.Row
+                cursor = conn.execute('SELECT * FROM requests WHERE id = ?', (request_id,))
+                result = cursor.fetchone()
+                return dict(result) if result else None
+        except sqlite3.Error as e:
+            self.logger.error(f"Ошибка при поиске заявки: {e}")
+            return None
+
+    def get_requests_count(self):
+        """Возвращает количество заявок"""
+        try:
+            with connect(self.db_name) as conn:
+                cursor = conn.execute('SELECT COUNT(*) FROM requests')
+                return cursor.fetchone()[0]
+        except sqlite3.Error as e:
+            self.logger.error(f"Ошибка при подсчете заявок: {e}")
+            return 0
+
     def delete_request(self, request_id):
         """Удаляет заявку по ID"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 conn.execute('DELETE FROM requests WHERE id = ?', (request_id,))
                 self.logger.info(f"Удалена заявка: {request_id}")
                 return True
@@ -114,7 +163,7 @@ class DormitoryRequestDatabase:
     def get_requests_by_group(self, user_group):
         """Ищет заявки по группе"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.execute(
                     'SELECT * FROM requests WHERE user_group = ? ORDER BY submission_date DESC',
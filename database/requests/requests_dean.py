@@ -2,11 +2,13 @@ import os
 import sqlite3
 import logging
 
+from database.connection import connect, resolve_db_name
+
 
 class DeanRequestDataBase:
     def __init__(self, db_name='others/requests_dean.db'):
-        os.makedirs(os.path.dirname(db_name), exist_ok=True)
-        self.db_name = db_name
+        self.db_name = resolve_db_name(db_name)
+        os.makedirs(os.path.dirname(self.db_name), exist_ok=True)
         self._create_table()
         self._setup_logging()
 
@@ -20,9 +22,17 @@ class DeanRequestDataBase:
 
     def _create_table(self):
         """Создает таблицу пользователей с оптимальной структурой"""
-        with sqlite3.connect(self.db_name) as conn:
+        with connect(self.db_name) as conn:
+            # Раньше таблица называлась users и конфликтовала с таблицей
+            # UsersDatabase при хранении всех данных в одной базе
+            columns = [row[1] for row in conn.execute('PRAGMA table_info(users)')]
+            if 'username' in columns and 'role' not in columns:
+                conn.execute('ALTER TABLE users RENAME TO dean_requests')
+                for index in ('idx_user_id', 'idx_username', 'idx_date_created'):
+                    conn.execute(f'DROP INDEX IF EXISTS {index}')
+
             conn.execute('''
-                CREATE TABLE IF NOT EXISTS users (
+                CREATE TABLE IF NOT EXISTS dean_requests (
                     id INTEGER PRIMARY KEY,
                     username TEXT NOT NULL,
                     date_created TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
@@ -31,16 +41,16 @@ class DeanRequestDataBase:
                 )
             ''')
             # Создаем индексы для быстрого поиска
-            conn.execute('CREATE INDEX IF NOT EXISTS idx_user_id ON users(id)')
-            conn.execute('CREATE INDEX IF NOT EXISTS idx_username ON users(username)')
-            conn.execute('CREATE INDEX IF NOT EXISTS idx_date_created ON users(date_created)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_dean_requests_user_id ON dean_requests(id)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_dean_requests_username ON dean_requests(username)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_dean_requests_date_created ON dean_requests(date_created)')
 
     def add_user(self, user_id, username):
         """Добавляет пользователя в базу"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 conn.execute(
-                    '''INSERT OR REPLACE INTO users 
+                    '''INSERT OR REPLACE INTO dean_requests 
                     (id, username, date_modified) 
                     VALUES (?, ?, CURRENT_TIMESTAMP)''',
                     (user_id, username)
@@ -54,17 +64,17 @@ class DeanRequestDataBase:
     def get_user(self, user_id=None, username=None):
         """Ищет пользователя по ID или username"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 conn.row_factory = sqlite3.Row  # Для доступа к столбцам по имени
 
                 if user_id:
                     cursor = conn.execute(
-                        'SELECT * FROM users WHERE id = ?',
+                        'SELECT * FROM dean_requests WHERE id = ?',
                         (user_id,)
                     )
                 elif username:
                     cursor = conn.execute(
-                        'SELECT * FROM users WHERE username = ?',
+                        'SELECT * FROM dean_requests WHERE username = ?',
                         (username,)
                     )
                 else:
@@ -79,10 +89,10 @@ class DeanRequestDataBase:
     def get_all_users(self, limit=100, offset=0):
         """Получает всех пользователей с пагинацией"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.execute(
-                    'SELECT * FROM users ORDER BY date_created DESC LIMIT ? OFFSET ?',
+                    'SELECT * FROM dean_requests ORDER BY date_created DESC, id DESC LIMIT ? OFFSET ?',
                     (limit, offset)
                 )
                 return [dict(row) for row in cursor.fetchall()]
@@ -90,13 +100,44 @@ class DeanRequestDataBase:
             self.logger.error(f"Ошибка при получении пользователей: {e}")
             return []
 
+    def get_all_users_after(self, after_date=None, after_id=None, limit=100):
+        """Получает пользователей после курсора (after_date, after_id) - последней показанной записи"""
+        try:
+            with connect(self.db_name) as conn:
+                conn.row_factory = sqlite3.Row
+                if after_date is None:
+                    cursor = conn.execute(
+                        'SELECT * FROM dean_requests ORDER BY date_created DESC, id DESC LIMIT ?',
+                        (limit,)
+                    )
+                else:
+                    cursor = conn.execute(
+                        '''SELECT * FROM dean_requests WHERE (date_created, id) < (?, ?)
+                        ORDER BY date_created DESC, id DESC LIMIT ?''',
+                        (after_date, after_id, limit)
+                    )
+                return [dict(row) for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            self.logger.error(f"Ошибка при получении пользователей: {e}")
+            return []
+
     def delete_user(self, user_id):
         """Удаляет пользователя из базы"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
-                conn.execute('DELETE FROM users WHERE id = ?', (user_id,))
+            with connect(self.db_name) as conn:
+                conn.execute('DELETE FROM dean_requests WHERE id = ?', (user_id,))
                 self.logger.info(f"Удален пользователь: {user_id}")
                 return True
         except sqlite3.Error as e:
             self.logger.error(f"Ошибка при удалении пользователя: {e}")
             return False
+
+    def get_users_count(self):
+        """Возвращает количество заявок"""
+        try:
+            with connect(self.db_name) as conn:
+                cursor = conn.execute('SELECT COUNT(*) FROM dean_requests')
+                return cursor.fetchone()[0]
+        except sqlite3.Error as e:
+            self.logger.error(f"Ошибка при подсчете заявок: {e}")
+            return 0
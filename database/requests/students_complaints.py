@@ -2,11 +2,13 @@ import os
 import sqlite3
 import logging
 
+from database.connection import connect, resolve_db_name
+
 
 class StudentComplaintsDatabase:
     def __init__(self, db_name='others/student_complaints.db'):
-        os.makedirs(os.path.dirname(db_name), exist_ok=True)
-        self.db_name = db_name
+        self.db_name = resolve_db_name(db_name)
+        os.makedirs(os.path.dirname(self.db_name), exist_ok=True)
         self._create_table()
         self._setup_logging()
 
@@ -20,7 +22,7 @@ class StudentComplaintsDatabase:
 
     def _create_table(self):
         """Создает таблицу жалоб студентов с оптимальной структурой"""
-        with sqlite3.connect(self.db_name) as conn:
+        with connect(self.db_name) as conn:
             conn.execute('''
                 CREATE TABLE IF NOT EXISTS complaints (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -32,17 +34,20 @@ class StudentComplaintsDatabase:
                     date_created TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
             ''')
+            # Старые имена индексов совпадали с индексами других таблиц единой базы
+            for index in ('idx_user_id', 'idx_chat_id', 'idx_username', 'idx_date_created'):
+                conn.execute(f'DROP INDEX IF EXISTS {index}')
             # Создаем индексы для быстрого поиска
-            conn.execute('CREATE INDEX IF NOT EXISTS idx_user_id ON complaints(user_id)')
-            conn.execute('CREATE INDEX IF NOT EXISTS idx_chat_id ON complaints(chat_id)')
-            conn.execute('CREATE INDEX IF NOT EXISTS idx_username ON complaints(username)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_complaints_user_id ON complaints(user_id)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_complaints_chat_id ON complaints(chat_id)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_complaints_username ON complaints(username)')
             conn.execute('CREATE INDEX IF NOT EXISTS idx_number_room ON complaints(number_room)')
-            conn.execute('CREATE INDEX IF NOT EXISTS idx_date_created ON complaints(date_created)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_complaints_date_created ON complaints(date_created)')
 
     def add_complaint(self, user_id, chat_id, username, description, number_room):
         """Добавляет жалобу студента в базу"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 cursor = conn.execute(
                     '''INSERT INTO complaints 
                     (user_id, chat_id, username, description, number_room) 
@@ -59,7 +64,7 @@ class StudentComplaintsDatabase:
     def get_complaint(self, complaint_id):
         """Ищет жалобу по ID"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.execute(
                     'SELECT * FROM complaints WHERE id = ?',
@@ -74,7 +79,7 @@ class StudentComplaintsDatabase:
     def get_complaints_by_user(self, user_id, limit=50, offset=0):
         """Получает все жалобы пользователя"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.execute(
                     'SELECT * FROM complaints WHERE user_id = ? ORDER BY date_created DESC LIMIT ? OFFSET ?',
@@ -88,7 +93,7 @@ class StudentComplaintsDatabase:
     def get_complaints_by_room(self, number_room, limit=50, offset=0):
         """Получает все жалобы по номеру комнаты"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.execute(
                     'SELECT * FROM complaints WHERE number_room = ? ORDER BY date_created DESC LIMIT ? OFFSET ?',
@@ -102,10 +107,10 @@ class StudentComplaintsDatabase:
     def get_all_complaints(self, limit=100, offset=0):
         """Получает все жалобы с пагинацией"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.execute(
-                    'SELECT * FROM complaints ORDER BY date_created DESC LIMIT ? OFFSET ?',
+                    'SELECT * FROM complaints ORDER BY date_created DESC, id DESC LIMIT ? OFFSET ?',
                     (limit, offset)
                 )
                 return [dict(row) for row in cursor.fetchall()]
@@ -113,10 +118,31 @@ class StudentComplaintsDatabase:
             self.logger.error(f"Ошибка при получении всех жалоб: {e}")
             return []
 
+    def get_all_complaints_after(self, after_date=None, after_id=None, limit=100):
+        """Получает жалобы после курсора (after_date, after_id) - последней показанной записи"""
+        try:
+            with connect(self.db_name) as conn:
+                conn.row_factory = sqlite3.Row
+                if after_date is None:
+                    cursor = conn.execute(
+                        'SELECT * FROM complaints ORDER BY date_created DESC, id DESC LIMIT ?',
+                        (limit,)
+                    )
+                else:
+                    cursor = conn.execute(
+                        '''SELECT * FROM complaints WHERE (date_created, id) < (?, ?)
+                        ORDER BY date_created DESC, id DESC LIMIT ?''',
+                        (after_date, after_id, limit)
+                    )
+                return [dict(row) for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            self.logger.error(f"Ошибка при получении всех жалоб: {e}")
+            return []
+
     def update_complaint(self, complaint_id, description=None, number_room=None):
         """Обновляет описание и/или номер комнаты в жалобе"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 if description and number_room:
                     conn.execute(
                         'UPDATE complaints SET description = ?, number_room = ? WHERE id = ?',
@@ -142,7 +168,7 @@ class StudentComplaintsDatabase:
     def delete_complaint(self, complaint_id):
         """Удаляет жалобу из базы"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 conn.execute('DELETE FROM complaints WHERE id = ?', (complaint_id,))
                 self.logger.info(f"Удалена жалоба: {complaint_id}")
                 return True
@@ -153,7 +179,7 @@ class StudentComplaintsDatabase:
     def get_complaints_count(self):
         """Возвращает количество жалоб"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 cursor = conn.execute('SELECT COUNT(*) FROM complaints')
                 return cursor.fetchone()[0]
         except sqlite3.Error as e:
@@ -163,7 +189,7 @@ class StudentComplaintsDatabase:
     def get_user_complaints_count(self, user_id):
         """Возвращает количество жалоб пользователя"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 cursor = conn.execute('SELECT COUNT(*) FROM complaints WHERE user_id = ?', (user_id,))
                 return cursor.fetchone()[0]
         except sqlite3.Error as e:
@@ -173,7 +199,7 @@ class StudentComplaintsDatabase:
     def clear_all(self):
         """Очищает всю таблицу жалоб"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 conn.execute('DELETE FROM complaints')
                 self.logger.info("Таблица жалоб очищена")
                 return True
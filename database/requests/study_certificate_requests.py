@@ -3,6 +3,8 @@ import sqlite3
 import logging
 from typing import List, Dict, Optional, Union
 
+from database.connection import connect, resolve_db_name
+
 
 class StudyCertificateRequestsDatabase:
     def __init__(self, db_name: str = 'others/study_certificate_requests.db'):
@@ -12,8 +14,8 @@ class StudyCertificateRequestsDatabase:
         Args:
             db_name: Имя файла базы данных
         """
-        os.makedirs(os.path.dirname(db_name), exist_ok=True)
-        self.db_name = db_name
+        self.db_name = resolve_db_name(db_name)
+        os.makedirs(os.path.dirname(self.db_name), exist_ok=True)
         self._create_table()
         self._setup_logging()
 
@@ -27,7 +29,7 @@ class StudyCertificateRequestsDatabase:
 
     def _create_table(self):
         """Создает таблицу заявок на справку об обучении"""
-        with sqlite3.connect(self.db_name) as conn:
+        with connect(self.db_name) as conn:
             conn.execute('''
                 CREATE TABLE IF NOT EXISTS certificate_requests (
                     id INTEGER PRIMARY KEY,
@@ -59,7 +61,7 @@ class StudyCertificateRequestsDatabase:
             True если успешно, False если ошибка
         """
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 conn.execute(
                     '''INSERT OR REPLACE INTO certificate_requests 
                     (id, username, full_name, group_name, count) 
@@ -83,7 +85,7 @@ class StudyCertificateRequestsDatabase:
             Словарь с информацией о заявке или None если не найдена
         """
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.execute(
                     'SELECT * FROM certificate_requests WHERE id = ?',
@@ -106,7 +108,7 @@ class StudyCertificateRequestsDatabase:
             Список заявок пользователя
         """
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.execute(
                     'SELECT * FROM certificate_requests WHERE username = ? ORDER BY date_created DESC',
@@ -128,7 +130,7 @@ class StudyCertificateRequestsDatabase:
             Список заявок группы
         """
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.execute(
                     'SELECT * FROM certificate_requests WHERE group_name = ? ORDER BY date_created DESC',
@@ -151,10 +153,10 @@ class StudyCertificateRequestsDatabase:
             Список всех заявок
         """
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.execute(
-                    'SELECT * FROM certificate_requests ORDER BY date_created DESC LIMIT ? OFFSET ?',
+                    'SELECT * FROM certificate_requests ORDER BY date_created DESC, id DESC LIMIT ? OFFSET ?',
                     (limit, offset)
                 )
                 return [dict(row) for row in cursor.fetchall()]
@@ -162,6 +164,41 @@ class StudyCertificateRequestsDatabase:
             self.logger.error(f"Ошибка при получении всех заявок: {e}")
             return []
 
+    def get_all_requests_after(self, after_date: Optional[str] = None, after_id: Optional[int] = None,
+               limit: int = 100) -> List[Dict[str, Union[int, str]]]:
+        """
+        Получает заявки после курсора - последней показанной записи
+
+        В отличие от OFFSET не перебирает пропущенные строки, поэтому
+        дальние страницы выбираются так же быстро, как первая.
+
+        Args:
+            after_date: date_created последней показанной записи (None - с начала)
+            after_id: id последней показанной записи
+            limit: Ограничение количества записей
+
+        Returns:
+            Список заявок
+        """
+        try:
+            with connect(self.db_name) as conn:
+                conn.row_factory = sqlite3.Row
+                if after_date is None:
+                    cursor = conn.execute(
+                        'SELECT * FROM certificate_requests ORDER BY date_created DESC, id DESC LIMIT ?',
+                        (limit,)
+                    )
+                else:
+                    cursor = conn.execute(
+                        '''SELECT * FROM certificate_requests WHERE (date_created, id) < (?, ?)
+                        ORDER BY date_created DESC, id DESC LIMIT ?''',
+                        (after_date, after_id, limit)
+                    )
+                return [dict(row) for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            self.logger.error(f"Ошибка при получении всех заявок: {e}")
+            return []
+
     def delete_request(self, request_id: int) -> bool:
         """
         Удаляет заявку
@@ -173,7 +210,7 @@ class StudyCertificateRequestsDatabase:
             True если успешно, False если ошибка
         """
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 cursor = conn.execute('DELETE FROM certificate_requests WHERE id = ?', (request_id,))
                 success = cursor.rowcount > 0
                 if success:
@@ -201,7 +238,7 @@ class StudyCertificateRequestsDatabase:
             True если успешно, False если ошибка
         """
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 # Строим запрос динамически в зависимости от переданных параметров
                 update_fields = []
                 params = []
@@ -252,7 +289,7 @@ class StudyCertificateRequestsDatabase:
             True если существует, False если нет
         """
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 cursor = conn.execute('SELECT 1 FROM certificate_requests WHERE id = ?', (request_id,))
                 return cursor.fetchone() is not None
         except sqlite3.Error as e:
@@ -267,7 +304,7 @@ class StudyCertificateRequestsDatabase:
             Количество заявок
         """
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 cursor = conn.execute('SELECT COUNT(*) FROM certificate_requests')
                 return cursor.fetchone()[0]
         except sqlite3.Error as e:
@@ -282,7 +319,7 @@ class StudyCertificateRequestsDatabase:
             Словарь со статистикой
         """
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 # Общее количество заявок
                 total_count = conn.execute('SELECT COUNT(*) FROM certificate_requests').fetchone()[0]
 
@@ -323,7 +360,7 @@ class StudyCertificateRequestsDatabase:
             True если успешно, False если ошибка
         """
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 conn.execute('DELETE FROM certificate_requests')
                 self.logger.info("Таблица заявок очищена")
                 return True
@@ -3,11 +3,13 @@ import sqlite3
 import logging
 from datetime import datetime
 
+from database.connection import connect, resolve_db_name
+
 
 class UnbanRequestsDatabase:
     def __init__(self, db_name='others/unban_requests.db'):
-        os.makedirs(os.path.dirname(db_name), exist_ok=True)
-        self.db_name = db_name
+        self.db_name = resolve_db_name(db_name)
+        os.makedirs(os.path.dirname(self.db_name), exist_ok=True)
         self._create_table()
         self._setup_logging()
 
@@ -21,7 +23,7 @@ class UnbanRequestsDatabase:
 
     def _create_table(self):
         """Создает таблицу заявок на разбан"""
-        with sqlite3.connect(self.db_name) as conn:
+        with connect(self.db_name) as conn:
             conn.execute('''
                 CREATE TABLE IF NOT EXISTS unban_requests (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -36,17 +38,22 @@ class UnbanRequestsDatabase:
                     review_notes TEXT
                 )
             ''')
+            # Старые имена индексов совпадали с индексами других таблиц единой базы
+            for index in ('idx_user_id', 'idx_chat_id'):
+                conn.execute(f'DROP INDEX IF EXISTS {index}')
             # Создаем индексы для быстрого поиска
-            conn.execute('CREATE INDEX IF NOT EXISTS idx_user_id ON unban_requests(user_id)')
-            conn.execute('CREATE INDEX IF NOT EXISTS idx_chat_id ON unban_requests(chat_id)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_unban_user_id ON unban_requests(user_id)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_unban_chat_id ON unban_requests(chat_id)')
             conn.execute('CREATE INDEX IF NOT EXISTS idx_date ON unban_requests(date)')
             conn.execute('CREATE INDEX IF NOT EXISTS idx_status ON unban_requests(status)')
+            # Для постраничного просмотра активных заявок по курсору
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_unban_status_date ON unban_requests(status, date)')
 
 
     def add_request(self, user_id, chat_id, username, description):
         """Добавляет заявку на разбан"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 # Проверяем, есть ли уже активная заявка от этого пользователя
                 existing_request = self.get_pending_request(user_id)
                 if existing_request:
@@ -68,7 +75,7 @@ class UnbanRequestsDatabase:
     def get_pending_request(self, user_id):
         """Получает активную заявку пользователя"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.execute(
                     'SELECT * FROM unban_requests WHERE user_id = ? AND status = "pending"',
@@ -83,10 +90,10 @@ class UnbanRequestsDatabase:
     def get_all_pending_requests(self, limit=100, offset=0):
         """Получает все активные заявки с пагинацией"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.execute(
-                    'SELECT * FROM unban_requests WHERE status = "pending" ORDER BY date DESC LIMIT ? OFFSET ?',
+                    'SELECT * FROM unban_requests WHERE status = "pending" ORDER BY date DESC, id DESC LIMIT ? OFFSET ?',
                     (limit, offset)
                 )
                 return [dict(row) for row in cursor.fetchall()]
@@ -94,13 +101,34 @@ class UnbanRequestsDatabase:
             self.logger.error(f"Ошибка при получении активных заявок: {e}")
             return []
 
+    def get_all_pending_requests_after(self, after_date=None, after_id=None, limit=100):
+        """Получает активные заявки после курсора (after_date, after_id) - последней показанной записи"""
+        try:
+            with connect(self.db_name) as conn:
+                conn.row_factory = sqlite3.Row
+                if after_date is None:
+                    cursor = conn.execute(
+                        'SELECT * FROM unban_requests WHERE status = "pending" ORDER BY date DESC, id DESC LIMIT ?',
+                        (limit,)
+                    )
+                else:
+                    cursor = conn.execute(
+                        '''SELECT * FROM unban_requests WHERE status = "pending" AND (date, id) < (?, ?)
+                        ORDER BY date DESC, id DESC LIMIT ?''',
+                        (after_date, after_id, limit)
+                    )
+                return [dict(row) for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            self.logger.error(f"Ошибка при получении активных заявок: {e}")
+            return []
+
     def get_all_requests(self, limit=100, offset=0):
         """Получает все заявки с пагинацией"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.execute(
-                    'SELECT * FROM unban_requests ORDER BY date DESC LIMIT ? OFFSET ?',
+                    'SELECT * FROM unban_requests ORDER BY date DESC, id DESC LIMIT ? OFFSET ?',
                     (limit, offset)
                 )
                 return [dict(row) for row in cursor.fetchall()]
@@ -111,7 +139,7 @@ class UnbanRequestsDatabase:
     def approve_request(self, request_id, admin_id, notes=None):
         """Одобряет заявку на разбан"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 cursor = conn.execute(
                     '''UPDATE unban_requests 
                     SET status = "approved", reviewed_by = ?, review_date = CURRENT_TIMESTAMP, review_notes = ?
@@ -131,7 +159,7 @@ class UnbanRequestsDatabase:
     def reject_request(self, request_id, admin_id, notes=None):
         """Отклоняет заявку на разбан"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 cursor = conn.execute(
                     '''UPDATE unban_requests 
                     SET status = "rejected", reviewed_by = ?, review_date = CURRENT_TIMESTAMP, review_notes = ?
@@ -151,7 +179,7 @@ class UnbanRequestsDatabase:
     def delete_request(self, request_id):
         """Удаляет заявку"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 cursor = conn.execute(
                     'DELETE FROM unban_requests WHERE id = ?',
                     (request_id,)
@@ -169,7 +197,7 @@ class UnbanRequestsDatabase:
     def get_request_by_id(self, request_id):
         """Получает заявку по ID"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.execute(
                     'SELECT * FROM unban_requests WHERE id = ?',
@@ -184,7 +212,7 @@ class UnbanRequestsDatabase:
     def get_requests_by_user(self, user_id):
         """Получает все заявки пользователя"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.execute(
                     'SELECT * FROM unban_requests WHERE user_id = ? ORDER BY date DESC',
@@ -198,7 +226,7 @@ class UnbanRequestsDatabase:
     def get_pending_requests_count(self):
         """Возвращает количество активных заявок"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 cursor = conn.execute('SELECT COUNT(*) FROM unban_requests WHERE status = "pending"')
                 return cursor.fetchone()[0]
         except sqlite3.Error as e:
@@ -208,7 +236,7 @@ class UnbanRequestsDatabase:
     def get_user_requests_count(self, user_id):
         """Возвращает количество заявок пользователя"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 cursor = conn.execute('SELECT COUNT(*) FROM unban_requests WHERE user_id = ?', (user_id,))
                 return cursor.fetchone()[0]
         except sqlite3.Error as e:
@@ -2,16 +2,18 @@ import os
 import sqlite3
 import logging
 
+from database.connection import connect, resolve_db_name
 from database.users.users import UsersDatabase
 
 
 class DeanRepresentativesDatabase:
-    def __init__(self, db_name='others/dean_representatives.db'):
-        os.makedirs(os.path.dirname(db_name), exist_ok=True)
-        self.db_name = db_name
+    def __init__(self, db_name='others/dean_representatives.db', users=None):
+        # users - общий экземпляр UsersDatabase: у каждого экземпляра свой кэш ролей
+        self.db_name = resolve_db_name(db_name)
+        os.makedirs(os.path.dirname(self.db_name), exist_ok=True)
         self._create_table()
         self._setup_logging()
-        self.users = UsersDatabase()
+        self.users = users if users is not None else UsersDatabase()
 
     def _setup_logging(self):
         """Настройка логирования"""
@@ -23,7 +25,7 @@ class DeanRepresentativesDatabase:
 
     def _create_table(self):
         """Создает таблицу представителей деканата только с ID"""
-        with sqlite3.connect(self.db_name) as conn:
+        with connect(self.db_name) as conn:
             conn.execute('''
                 CREATE TABLE IF NOT EXISTS dean_representatives (
                     id INTEGER PRIMARY KEY,
@@ -36,7 +38,7 @@ class DeanRepresentativesDatabase:
     def add_representative(self, user_id):
         """Добавляет представителя деканата по ID"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 conn.execute(
                     'INSERT OR IGNORE INTO dean_representatives (id) VALUES (?)',
                     (user_id,)
@@ -51,7 +53,7 @@ class DeanRepresentativesDatabase:
     def is_representative(self, user_id):
         """Проверяет, является ли пользователь представителем деканата"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 cursor = conn.execute(
                     'SELECT 1 FROM dean_representatives WHERE id = ?',
                     (user_id,)
@@ -64,7 +66,7 @@ class DeanRepresentativesDatabase:
     def remove_representative(self, user_id):
         """Удаляет представителя деканата"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 conn.execute('DELETE FROM dean_representatives WHERE id = ?', (user_id,))
                 self.logger.info(f"Удален представитель деканата: {user_id}")
                 self.users.update_user_role(user_id=user_id, new_role="user")
@@ -76,7 +78,7 @@ class DeanRepresentativesDatabase:
     def get_all_representatives(self):
         """Получает список всех представителей деканата"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 cursor = conn.execute('SELECT id FROM dean_representatives ORDER BY date_added')
                 return [row[0] for row in cursor.fetchall()]
         except sqlite3.Error as e:
@@ -86,7 +88,7 @@ class DeanRepresentativesDatabase:
     def get_count(self):
         """Возвращает количество представителей деканата"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 cursor = conn.execute('SELECT COUNT(*) FROM dean_representatives')
                 return cursor.fetchone()[0]
         except sqlite3.Error as e:
@@ -102,7 +104,7 @@ class DeanRepresentativesDatabase:
     def clear_all(self):
         """Очищает всю таблицу представителей"""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 conn.execute('DELETE FROM dean_representatives')
                 self.logger.info("Таблица представителей очищена")
                 return True
@@ -1,19 +1,40 @@
 import os
 import sqlite3
 import logging
+import threading
+from collections import OrderedDict
 from typing import List, Dict, Optional, Union
 
+from database.connection import connect, connection_manager, resolve_db_name
+
 
 class UsersDatabase:
-    def __init__(self, db_name: str = 'others/users.db'):
+    def __init__(self, db_name: str = 'others/users.db', cache_size: int = 10000):
         """
         База данных пользователей с ролями (только ID и роль)
 
+        Записи пользователей кэшируются в памяти (LRU на cache_size записей),
+        поэтому проверки роли при каждом нажатии не читают таблицу users.
+        Методы изменения пользователей сбрасывают запись в кэше, поэтому в
+        процессе все изменения таблицы users должны выполняться через один
+        экземпляр этого класса. Изменения из других соединений (например,
+        admin_manager.py в отдельном процессе) обнаруживаются по PRAGMA
+        data_version перед каждым чтением: если файл базы изменился, кэш
+        сбрасывается целиком.
+
         Args:
             db_name: Имя файла базы данных
-        """
-        os.makedirs(os.path.dirname(db_name), exist_ok=True)
-        self.db_name = db_name
+            cache_size: Максимальное количество пользователей в кэше
+        """
+        self.db_name = resolve_db_name(db_name)
+        os.makedirs(os.path.dirname(self.db_name), exist_ok=True)
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        # Последнее значение PRAGMA data_version соединения каждого потока
+        self._data_version = threading.local()
+        self._cache_hits = 0
+        self._cache_misses = 0
         self._create_table()
         self._setup_logging()
         self._initialize_default_roles()
@@ -28,7 +49,7 @@ class UsersDatabase:
 
     def _create_table(self):
         """Создает таблицу пользователей только с ID и ролью"""
-        with sqlite3.connect(self.db_name) as conn:
+        with connect(self.db_name) as conn:
             conn.execute('''
                 CREATE TABLE IF NOT EXISTS users (
                     id INTEGER PRIMARY KEY,
@@ -38,9 +59,13 @@ class UsersDatabase:
                     UNIQUE(id)
                 )
             ''')
+            # Старое имя индекса совпадало с индексами других таблиц единой базы
+            conn.execute('DROP INDEX IF EXISTS idx_user_id')
             # Создаем индексы для быстрого поиска
-            conn.execute('CREATE INDEX IF NOT EXISTS idx_user_id ON users(id)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_users_id ON users(id)')
             conn.execute('CREATE INDEX IF NOT EXISTS idx_user_role ON users(role)')
+            # Для постраничного вывода по курсору (date_created, id) без сортировки всей таблицы
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_users_date_created ON users(date_created, id)')
 
     def _initialize_default_roles(self):
         """Инициализирует доступные роли"""
@@ -54,6 +79,63 @@ class UsersDatabase:
             'user': 'Пользователь'  # Новая роль по умолчанию
         }
 
+    def _check_data_version(self) -> None:
+        """Сбрасывает кэш, если базу изменило другое соединение"""
+        # Значение data_version сравнимо только в пределах одного соединения,
+        # а соединения пула у каждого потока свои
+        with connect(self.db_name) as conn:
+            version = conn.execute('PRAGMA data_version').fetchone()[0]
+        previous = getattr(self._data_version, 'value', None)
+        self._data_version.value = version
+        if previous != version:
+            self._invalidate_user()
+
+    def _get_cached_user(self, user_id: int):
+        """Возвращает (найдено, запись) из кэша и обновляет счетчики"""
+        with self._cache_lock:
+            if user_id in self._cache:
+                self._cache.move_to_end(user_id)
+                self._cache_hits += 1
+                return True, self._cache[user_id]
+            self._cache_misses += 1
+            return False, None
+
+    def _cache_user(self, user_id: int, user: Optional[Dict[str, Union[int, str]]]) -> None:
+        """Сохраняет запись пользователя (или его отсутствие) в кэше"""
+        # Незафиксированные данные единицы работы могут быть откачены
+        if connection_manager.in_transaction():
+            return
+        with self._cache_lock:
+            self._cache[user_id] = user
+            self._cache.move_to_end(user_id)
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _invalidate_user(self, user_id: Optional[int] = None) -> None:
+        """Сбрасывает запись пользователя в кэше (или весь кэш, если user_id не указан)"""
+        with self._cache_lock:
+            if user_id is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(user_id, None)
+
+    def get_cache_stats(self) -> Dict[str, Union[int, float]]:
+        """
+        Возвращает статистику кэша пользователей
+
+        Returns:
+            Словарь с количеством попаданий, промахов, долей попаданий и размером кэша
+        """
+        with self._cache_lock:
+            total = self._cache_hits + self._cache_misses
+            return {
+                'hits': self._cache_hits,
+                'misses': self._cache_misses,
+                'hit_rate': self._cache_hits / total if total else 0.0,
+                'size': len(self._cache),
+                'max_size': self.cache_size
+            }
+
     def add_user(self, user_id: int, role: str = 'user') -> bool:
         """
         Добавляет пользователя в базу данных
@@ -71,13 +153,14 @@ class UsersDatabase:
                 self.logger.error(f"Недопустимая роль: {role}")
                 return False
 
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 conn.execute(
                     '''INSERT OR REPLACE INTO users 
                     (id, role, date_modified) 
                     VALUES (?, ?, CURRENT_TIMESTAMP)''',
                     (user_id, role)
                 )
+                self._invalidate_user(user_id)
                 self.logger.info(f"Добавлен пользователь: {user_id} с ролью {role}")
                 return True
         except sqlite3.Error as e:
@@ -95,14 +178,21 @@ class UsersDatabase:
             Словарь с информацией о пользователе или None если не найден
         """
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            self._check_data_version()
+            found, user = self._get_cached_user(user_id)
+            if found:
+                return dict(user) if user else None
+
+            with connect(self.db_name) as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.execute(
                     'SELECT * FROM users WHERE id = ?',
                     (user_id,)
                 )
                 result = cursor.fetchone()
-                return dict(result) if result else None
+                user = dict(result) if result else None
+            self._cache_user(user_id, user)
+            return dict(user) if user else None
         except sqlite3.Error as e:
             self.logger.error(f"Ошибка при получении пользователя {user_id}: {e}")
             return None
@@ -124,13 +214,14 @@ class UsersDatabase:
                 self.logger.error(f"Недопустимая роль: {new_role}")
                 return False
 
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 cursor = conn.execute(
                     '''UPDATE users 
                     SET role = ?, date_modified = CURRENT_TIMESTAMP 
                     WHERE id = ?''',
                     (new_role, user_id)
                 )
+                self._invalidate_user(user_id)
                 success = cursor.rowcount > 0
                 if success:
                     self.logger.info(f"Обновлена роль пользователя {user_id}: {new_role}")
@@ -152,8 +243,9 @@ class UsersDatabase:
             True если успешно, False если ошибка
         """
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 cursor = conn.execute('DELETE FROM users WHERE id = ?', (user_id,))
+                self._invalidate_user(user_id)
                 success = cursor.rowcount > 0
                 if success:
                     self.logger.info(f"Удален пользователь: {user_id}")
@@ -174,13 +266,7 @@ class UsersDatabase:
         Returns:
             True если существует, False если нет
         """
-        try:
-            with sqlite3.connect(self.db_name) as conn:
-                cursor = conn.execute('SELECT 1 FROM users WHERE id = ?', (user_id,))
-                return cursor.fetchone() is not None
-        except sqlite3.Error as e:
-            self.logger.error(f"Ошибка при проверке существования пользователя {user_id}: {e}")
-            return False
+        return self.get_user(user_id) is not None
 
     def get_user_role(self, user_id: int) -> Optional[str]:
         """
@@ -192,14 +278,8 @@ class UsersDatabase:
         Returns:
             Роль пользователя или None если не найден
         """
-        try:
-            with sqlite3.connect(self.db_name) as conn:
-                cursor = conn.execute('SELECT role FROM users WHERE id = ?', (user_id,))
-                result = cursor.fetchone()
-                return result[0] if result else None
-        except sqlite3.Error as e:
-            self.logger.error(f"Ошибка при получении роли пользователя {user_id}: {e}")
-            return None
+        user = self.get_user(user_id)
+        return user['role'] if user else None
 
     def has_role(self, user_id: int, role: str) -> bool:
         """
@@ -226,7 +306,7 @@ class UsersDatabase:
             Список пользователей с указанной ролью
         """
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.execute(
                     'SELECT * FROM users WHERE role = ? ORDER BY date_created',
@@ -249,10 +329,10 @@ class UsersDatabase:
             Список всех пользователей
         """
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 conn.row_factory = sqlite3.Row
                 cursor = conn.execute(
-                    'SELECT * FROM users ORDER BY date_created DESC LIMIT ? OFFSET ?',
+                    'SELECT * FROM users ORDER BY date_created DESC, id DESC LIMIT ? OFFSET ?',
                     (limit, offset)
                 )
                 return [dict(row) for row in cursor.fetchall()]
@@ -260,6 +340,41 @@ class UsersDatabase:
             self.logger.error(f"Ошибка при получении всех пользователей: {e}")
             return []
 
+    def get_all_users_after(self, after_date: Optional[str] = None, after_id: Optional[int] = None,
+                            limit: int = 100) -> List[Dict[str, Union[int, str]]]:
+        """
+        Получает пользователей после курсора - последней показанной записи
+
+        В отличие от OFFSET не перебирает пропущенные строки, поэтому
+        дальние страницы выбираются так же быстро, как первая.
+
+        Args:
+            after_date: date_created последней показанной записи (None - с начала)
+            after_id: id последней показанной записи
+            limit: Ограничение количества записей
+
+        Returns:
+            Список пользователей
+        """
+        try:
+            with connect(self.db_name) as conn:
+                conn.row_factory = sqlite3.Row
+                if after_date is None:
+                    cursor = conn.execute(
+                        'SELECT * FROM users ORDER BY date_created DESC, id DESC LIMIT ?',
+                        (limit,)
+                    )
+                else:
+                    cursor = conn.execute(
+                        '''SELECT * FROM users WHERE (date_created, id) < (?, ?)
+                        ORDER BY date_created DESC, id DESC LIMIT ?''',
+                        (after_date, after_id, limit)
+                    )
+                return [dict(row) for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            self.logger.error(f"Ошибка при получении всех пользователей: {e}")
+            return []
+
     def get_users_count(self) -> int:
         """
         Возвращает общее количество пользователей
@@ -268,7 +383,7 @@ class UsersDatabase:
             Количество пользователей
         """
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 cursor = conn.execute('SELECT COUNT(*) FROM users')
                 return cursor.fetchone()[0]
         except sqlite3.Error as e:
@@ -286,7 +401,7 @@ class UsersDatabase:
             Количество пользователей с указанной ролью
         """
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 cursor = conn.execute('SELECT COUNT(*) FROM users WHERE role = ?', (role,))
                 return cursor.fetchone()[0]
         except sqlite3.Error as e:
@@ -322,7 +437,7 @@ class UsersDatabase:
             Словарь со статистикой
         """
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 # Общее количество пользователей
                 total_count = conn.execute('SELECT COUNT(*) FROM users').fetchone()[0]
 
@@ -361,8 +476,9 @@ class UsersDatabase:
             True если успешно, False если ошибка
         """
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with connect(self.db_name) as conn:
                 conn.execute('DELETE FROM users')
+                self._invalidate_user()
                 self.logger.info("Таблица пользователей очищена")
                 return True
         except sqlite3.Error as e:
@@ -0,0 +1,94 @@
+import asyncio
+import logging
+from typing import List, Optional, Set
+
+from database.async_database import run_in_database
+from database.connection import transaction
+
+
+class WriteQueue:
+    def __init__(self, delay: float = 0.005, max_batch: int = 100):
+        """
+        Очередь отложенной записи с групповой фиксацией
+
+        Вызовы методов записи, поступившие в течение delay секунд, выполняются
+        в потоке базы данных одной единицей работы и фиксируются одним коммитом.
+        Каждый вызов выполняется под своей точкой сохранения, поэтому ошибка
+        одного не откатывает остальные, а каждый ожидающий обработчик получает
+        результат своего вызова (например, id новой строки).
+
+        Args:
+            delay: Сколько секунд собирать вызовы перед записью
+            max_batch: Максимальное количество вызовов в одной транзакции
+        """
+        self.delay = delay
+        self.max_batch = max_batch
+        self._pending = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        # Задачи записи пачек: цикл событий хранит на задачи только слабые ссылки
+        self._tasks: Set[asyncio.Task] = set()
+        self.logger = logging.getLogger(__name__)
+
+    async def submit(self, func, *args, **kwargs):
+        """
+        Ставит вызов в очередь и ждет результата после фиксации пачки
+
+        Args:
+            func: Синхронный метод записи класса из пакета database
+            *args: Позиционные аргументы
+            **kwargs: Именованные аргументы
+
+        Returns:
+            Результат выполнения func
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((func, args, kwargs, future))
+
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.delay, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        """Отправляет накопленные вызовы на запись"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._write(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _write(self, batch: List) -> None:
+        """Выполняет пачку в потоке базы данных и раздает результаты"""
+        try:
+            results = await run_in_database(self._write_batch, batch)
+        except Exception as e:
+            self.logger.error(f"Ошибка при групповой записи {len(batch)} вызовов: {e}")
+            for _, _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, _, _, future), (error, result) in zip(batch, results):
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    @staticmethod
+    def _write_batch(batch: List) -> List:
+        """Выполняет вызовы пачки одной единицей работы (в потоке базы данных)"""
+        results = []
+        with transaction(atomic=False):
+            for func, args, kwargs, _ in batch:
+                try:
+                    results.append((None, func(*args, **kwargs)))
+                except Exception as e:
+                    results.append((e, None))
+        return results
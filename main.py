@@ -2,14 +2,19 @@ import asyncio
 import logging
 import os
 import re
-from typing import Dict, Any, Optional
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Dict, Any, List, NamedTuple, Optional, Set, Tuple
 
 from maxapi import Bot, Dispatcher
 from maxapi.filters.command import Command
 from maxapi.types import BotStarted, MessageCreated, CallbackButton, MessageCallback
 from maxapi.utils.inline_keyboard import InlineKeyboardBuilder
 
+from database.async_database import AsyncDatabase, run_in_database
 from database.black_list import BlacklistDatabase
+from database.broadcast_jobs import BroadcastJobsDatabase
+from database.connection import transaction
 from database.events import EventsDatabase
 from database.mailing import MailingDatabase
 from database.news import NewsDatabase
@@ -21,45 +26,146 @@ from database.users.dean import DeanRepresentativesDatabase
 from database.requests.requests_dean import DeanRequestDataBase
 from database.requests.study_certificate_requests import StudyCertificateRequestsDatabase
 from database.users.users import UsersDatabase
+from database.write_queue import WriteQueue
+from messaging.broadcast import BroadcastEngine, BroadcastResult, check_response
+from messaging.jobs import BroadcastJobRunner
+from messaging.rate_limiter import RateLimiter
+from messaging.router import CallbackRouter
+from messaging.states import State, StateRegistry, UserState
+from messaging.templates import NEWS_TYPE_TITLES, MessageTemplate, format_news_preview, format_news_text
+from messaging.throttled_bot import ThrottledBot
+from messaging.user_lock import UserLockMiddleware
 
 logging.basicConfig(level=logging.INFO)
 
 BOT_TOKEN = os.getenv('BOT_TOKEN')
 if not BOT_TOKEN:
     raise ValueError("BOT_TOKEN не найден в переменных окружения")
-bot = Bot(token=BOT_TOKEN)
-dp = Dispatcher()
+
+# Период (в секундах) записи статистики кэша ролей в лог
+CACHE_STATS_INTERVAL = int(os.getenv('CACHE_STATS_INTERVAL', '3600'))
+
+# Окно (в секундах) групповой фиксации заявок и жалоб, 0 - запись без очереди
+WRITE_QUEUE_DELAY = float(os.getenv('WRITE_QUEUE_DELAY', '0.005'))
+
+# Период (в секундах) проверки отложенных новостей, время публикации которых наступило
+NEWS_SCHEDULER_INTERVAL = int(os.getenv('NEWS_SCHEDULER_INTERVAL', '30'))
+
+# Ограничения рассылок: запросов к API в секунду всего и в один чат, одновременных отправок
+OUTBOUND_RATE = float(os.getenv('OUTBOUND_RATE', '25'))
+PER_CHAT_RATE = float(os.getenv('PER_CHAT_RATE', '1'))
+BROADCAST_CONCURRENCY = int(os.getenv('BROADCAST_CONCURRENCY', '20'))
+
+# Все исходящие сообщения бота (ответы, рассылки, правки, удаления) проходят
+# через один ограничитель и повторяются ThrottledBot, поэтому движок рассылок
+# не использует свой ограничитель и считает ошибку от бота окончательной
+rate_limiter = RateLimiter(global_rate=OUTBOUND_RATE, per_chat_rate=PER_CHAT_RATE)
+bot = ThrottledBot(token=BOT_TOKEN, limiter=rate_limiter)
+broadcast_engine = BroadcastEngine(concurrency=BROADCAST_CONCURRENCY, retries=0)
+
+# Сколько рассылок подряд подписчику не удается доставить, прежде чем его подписки отключаются
+SUBSCRIBER_FAILURE_THRESHOLD = int(os.getenv('SUBSCRIBER_FAILURE_THRESHOLD', '3'))
+# Ошибки API, означающие, что пользователь недоступен (заблокировал бота или удалил чат)
+UNREACHABLE_REASONS = {"http_403", "http_404"}
+
+# Фоновые задачи (рассылки): храним ссылки, чтобы задачи не удалил сборщик мусора
+background_tasks: Set[asyncio.Task] = set()
+# Задачи выполняемых заданий рассылки по id задания: удаление и правка новости
+# останавливают ее рассылку и ждут завершения задачи
+broadcast_job_tasks: Dict[int, asyncio.Task] = {}
+# Обновления обрабатываются параллельно, чтобы медленный обработчик одного
+# пользователя не задерживал ответы остальным; обновления одного пользователя
+# идут по очереди, иначе они перемешали бы его user_states и user_temp_data
+dp = Dispatcher(use_create_task=True)
+dp.outer_middleware(UserLockMiddleware())
 
 # Словари для хранения состояния пользователей
-user_states: Dict[int, str] = {}
+user_states: Dict[int, UserState] = {}
 user_temp_data: Dict[int, Dict[str, Any]] = {}
-
-# Индексы для навигации по заявкам
-current_dean_request_index: Dict[int, int] = {}
-current_study_request_index: Dict[int, int] = {}
-current_complaint_index: Dict[int, int] = {}
-current_dorm_pass_index: Dict[int, int] = {}
-current_unban_request_index: Dict[int, int] = {}
+# Обработчики текстового ввода по состояниям (регистрируются декоратором conversation.on)
+conversation = StateRegistry()
+
+# Курсоры (дата, id) последней показанной заявки для навигации по заявкам
+current_dean_request_cursor: Dict[int, Tuple[str, int]] = {}
+current_study_request_cursor: Dict[int, Tuple[str, int]] = {}
+current_complaint_cursor: Dict[int, Tuple[str, int]] = {}
+current_dorm_pass_cursor: Dict[int, Tuple[str, int]] = {}
+current_unban_request_cursor: Dict[int, Tuple[str, int]] = {}
 current_admission_news_index: Dict[int, int] = {}
+# Курсоры (дата, id) последней записи показанной страницы списков новостей и черного списка
+current_news_list_cursor: Dict[int, Tuple[str, int]] = {}
+current_blacklist_cursor: Dict[int, Tuple[str, int]] = {}
+# Сколько записей показывать на одной странице списка
+LIST_PAGE_SIZE = 20
+
+# Инициализация баз данных (методы выполняются в потоке базы данных)
+write_queue = WriteQueue(delay=WRITE_QUEUE_DELAY) if WRITE_QUEUE_DELAY > 0 else None
+users = AsyncDatabase(UsersDatabase())
+# Роли меняются через один экземпляр UsersDatabase, иначе кэш users не увидел бы изменений
+admins = AsyncDatabase(AdminsDatabase(users=users.sync))
+request_dean = AsyncDatabase(DeanRequestDataBase())
+study_certificate_requests = AsyncDatabase(StudyCertificateRequestsDatabase(), write_queue, ['add_request'])
+dean_representatives = AsyncDatabase(DeanRepresentativesDatabase(users=users.sync))
+mailings = AsyncDatabase(MailingDatabase())
+news = AsyncDatabase(NewsDatabase())
+student_complaints = AsyncDatabase(StudentComplaintsDatabase(), write_queue, ['add_complaint'])
+dormitory_requests = AsyncDatabase(DormitoryRequestDatabase(), write_queue, ['add_request'])
+black_list = AsyncDatabase(BlacklistDatabase())
+unban_requests = AsyncDatabase(UnbanRequestsDatabase())
+events_db = AsyncDatabase(EventsDatabase())
+broadcast_jobs = AsyncDatabase(BroadcastJobsDatabase())
+broadcast_job_runner = BroadcastJobRunner(broadcast_jobs, broadcast_engine)
+
+
+class UserContext(NamedTuple):
+    """Данные пользователя, нужные обработчикам одного обновления"""
+    user_id: int
+    role: Optional[str]
+    blacklisted: Optional[Dict[str, Any]]
+
+
+# Контекст пользователя текущего обновления: каждое обновление обрабатывается
+# в своей задаче, поэтому значение не пересекается между пользователями
+current_user_context: ContextVar[Optional[UserContext]] = ContextVar('current_user_context', default=None)
+
+
+def load_user_context(user_id: int) -> UserContext:
+    """Собирает роль и запись черного списка за один заход в поток базы данных"""
+    return UserContext(
+        user_id=user_id,
+        role=users.sync.get_user_role(user_id),
+        blacklisted=black_list.sync.is_in_blacklist(user_id)
+    )
+
+
+async def get_user_context(user_id: int) -> UserContext:
+    """
+    Возвращает контекст пользователя текущего обновления
+
+    При первом обращении за обновление контекст загружается одним вызовом
+    в потоке базы данных, далее берется из current_user_context.
+
+    Args:
+        user_id: ID пользователя
+
+    Returns:
+        Контекст пользователя
+    """
+    context = current_user_context.get()
+    if context is None or context.user_id != user_id:
+        context = await run_in_database(load_user_context, user_id)
+        current_user_context.set(context)
+    return context
+
+
+def forget_user_context() -> None:
+    """Сбрасывает контекст обновления после изменения роли"""
+    current_user_context.set(None)
+
 
-# Инициализация баз данных
-users = UsersDatabase()
-admins = AdminsDatabase()
-request_dean = DeanRequestDataBase()
-study_certificate_requests = StudyCertificateRequestsDatabase()
-dean_representatives = DeanRepresentativesDatabase()
-mailings = MailingDatabase()
-news = NewsDatabase()
-student_complaints = StudentComplaintsDatabase()
-dormitory_requests = DormitoryRequestDatabase()
-black_list = BlacklistDatabase()
-unban_requests = UnbanRequestsDatabase()
-events_db = EventsDatabase()
-
-
-async def check_blacklist(user_id: int, chat_id: int, bot: Bot) -> bool:
+async def check_blacklist(context: UserContext, chat_id: int, bot: Bot) -> bool:
     """Проверяет, находится ли пользователь в черном списке"""
-    blacklisted_user = black_list.is_in_blacklist(user_id)
+    blacklisted_user = context.blacklisted
     if blacklisted_user:
         message = (
             f"Вы находитесь в черном списке и не можете использовать бота.\n"
@@ -74,14 +180,15 @@ async def check_blacklist(user_id: int, chat_id: int, bot: Bot) -> bool:
 
 async def show_menu(chat_id: int, user_id: int, bot: Bot) -> None:
     """Функция для отображения меню"""
-    role = users.get_user_role(user_id)
+    context = await get_user_context(user_id)
+    role = context.role
     if not role:
         return
 
     builder = InlineKeyboardBuilder()
 
     if role == "admin":
-        unban_count = unban_requests.get_pending_requests_count()
+        unban_count = await unban_requests.get_pending_requests_count()
         unban_text = f'Заявки на разбан ({unban_count})'
 
         builder.row(CallbackButton(text='Заявки от деканата', payload='requests_dean'))
@@ -120,6 +227,7 @@ async def show_menu(chat_id: int, user_id: int, bot: Bot) -> None:
             CallbackButton(text='Удалить новость', payload='delete_news')
         )
         builder.row(CallbackButton(text='Редактировать новость', payload='reedit_news'))
+        builder.row(CallbackButton(text='Статистика рассылок', payload='broadcast_stats'))
         builder.row(CallbackButton(text='Управление событиями', payload='manage_events'))
 
     elif role == "head_dormitory":
@@ -136,19 +244,77 @@ async def show_menu(chat_id: int, user_id: int, bot: Bot) -> None:
     )
 
 
-async def show_next_unban_request(chat_id: int, bot: Bot, index: int = 0) -> None:
+async def fetch_next_item(fetch_after, cursor: Optional[Tuple[str, int]]) -> Optional[Dict[str, Any]]:
+    """Возвращает запись после курсора, а после последней записи - снова первую"""
+    if cursor:
+        items = await fetch_after(*cursor, limit=1)
+        if items:
+            return items[0]
+    items = await fetch_after(limit=1)
+    return items[0] if items else None
+
+
+async def show_news_page(chat_id: int, bot: Bot, cursor: Optional[Tuple[str, int]] = None) -> bool:
+    """Показывает страницу списка новостей после курсора, возвращает False, если новостей нет"""
+    page = await news.get_all_news_after(*(cursor or ()), limit=LIST_PAGE_SIZE)
+    if not page:
+        return False
+
+    text = "Список новостей:\n\n" if cursor is None else "Следующие новости:\n\n"
+    for news_item in page:
+        text += f"ID: {news_item['id']}\n"
+        text += f"Заголовок: {news_item['title']}\n"
+        text += f"Дата: {news_item['publication_date']}\n"
+        text += "─" * 30 + "\n"
+
+    attachments = []
+    if len(page) == LIST_PAGE_SIZE:
+        current_news_list_cursor[chat_id] = (page[-1]['publication_date'], page[-1]['id'])
+        builder = InlineKeyboardBuilder()
+        builder.row(CallbackButton(text="Показать еще", payload="more_news"))
+        attachments = [builder.as_markup()]
+
+    await bot.send_message(chat_id=chat_id, text=text, attachments=attachments)
+    return True
+
+
+async def show_blacklist_page(chat_id: int, bot: Bot, cursor: Optional[Tuple[str, int]] = None) -> bool:
+    """Показывает страницу черного списка после курсора, возвращает False, если список пуст"""
+    page = await black_list.get_all_blacklisted_after(*(cursor or ()), limit=LIST_PAGE_SIZE)
+    if not page:
+        return False
+
+    text = "Черный список пользователей:\n\n" if cursor is None else "Следующие пользователи:\n\n"
+    for user in page:
+        text += f"ID: {user['user_id']}\n"
+        text += f"Причина: {user['reason']}\n"
+        text += f"Дата добавления: {user['date_added']}\n"
+        text += "─" * 30 + "\n"
+
+    attachments = []
+    if len(page) == LIST_PAGE_SIZE:
+        current_blacklist_cursor[chat_id] = (page[-1]['date_added'], page[-1]['id'])
+        builder = InlineKeyboardBuilder()
+        builder.row(CallbackButton(text="Показать еще", payload="more_blacklist"))
+        attachments = [builder.as_markup()]
+
+    await bot.send_message(chat_id=chat_id, text=text, attachments=attachments)
+    return True
+
+
+async def show_next_unban_request(chat_id: int, bot: Bot, cursor: Optional[Tuple[str, int]] = None) -> None:
     """Показывает следующую заявку на разбан с кнопками управления"""
-    all_requests = unban_requests.get_all_pending_requests()
+    request = await fetch_next_item(unban_requests.get_all_pending_requests_after, cursor)
 
-    if not all_requests:
+    if not request:
         await bot.send_message(chat_id=chat_id, text="Активных заявок на разбан нет.")
         return
 
-    current_unban_request_index[chat_id] = index
-    request = all_requests[index]
+    current_unban_request_cursor[chat_id] = (request['date'], request['id'])
+    requests_count = await unban_requests.get_pending_requests_count()
 
     message_text = (
-        f"Заявки на разбан ({len(all_requests)} активных)\n\n"
+        f"Заявки на разбан ({requests_count} активных)\n\n"
         f"ID заявки: {request['id']}\n"
         f"Пользователь: {request['username']}\n"
         f"User ID: {request['user_id']}\n"
@@ -173,18 +339,18 @@ async def show_next_unban_request(chat_id: int, bot: Bot, index: int = 0) -> Non
     )
 
 
-async def show_next_complaint(chat_id: int, bot: Bot, index: int = 0) -> None:
+async def show_next_complaint(chat_id: int, bot: Bot, cursor: Optional[Tuple[str, int]] = None) -> None:
     """Показывает следующую жалобу студента"""
-    complaints = student_complaints.get_all_complaints()
-    if not complaints:
+    complaint = await fetch_next_item(student_complaints.get_all_complaints_after, cursor)
+    if not complaint:
         await bot.send_message(chat_id=chat_id, text="На данный момент жалоб нет.")
         return
 
-    current_complaint_index[chat_id] = index
-    complaint = complaints[index]
+    current_complaint_cursor[chat_id] = (complaint['date_created'], complaint['id'])
+    complaints_count = await student_complaints.get_complaints_count()
 
     text = (
-        f"Всего жалоб {len(complaints)}\n\n"
+        f"Всего жалоб {complaints_count}\n\n"
         f"# {complaint['id']}\n"
         f"username: {complaint['username']}\n"
         f"Комната: {complaint['number_room']}\n"
@@ -205,18 +371,18 @@ async def show_next_complaint(chat_id: int, bot: Bot, index: int = 0) -> None:
     await bot.send_message(chat_id=chat_id, text=text, attachments=[builder.as_markup()])
 
 
-async def show_next_pass_request(chat_id: int, bot: Bot, index: int = 0) -> None:
+async def show_next_pass_request(chat_id: int, bot: Bot, cursor: Optional[Tuple[str, int]] = None) -> None:
     """Показывает следующую заявку на пропуск"""
-    all_requests = dormitory_requests.get_all_requests()
-    if not all_requests:
+    request = await fetch_next_item(dormitory_requests.get_all_requests_after, cursor)
+    if not request:
         await bot.send_message(chat_id=chat_id, text="На данный момент заявок на пропуск нет.")
         return
 
-    current_dorm_pass_index[chat_id] = index
-    request = all_requests[index]
+    current_dorm_pass_cursor[chat_id] = (request['submission_date'], request['id'])
+    requests_count = await dormitory_requests.get_requests_count()
 
     message_text = (
-        f"Всего заявок: {len(all_requests)}\n\n"
+        f"Всего заявок: {requests_count}\n\n"
         f"ID: {request['id']}\n"
         f"Имя: {request['username']}\n"
         f"Группа: {request['user_group']}\n"
@@ -239,19 +405,19 @@ async def show_next_pass_request(chat_id: int, bot: Bot, index: int = 0) -> None
     await bot.send_message(chat_id=chat_id, text=message_text, attachments=[builder.as_markup()])
 
 
-async def show_next_request_dean(chat_id: int, bot: Bot, index: int = 0) -> None:
+async def show_next_request_dean(chat_id: int, bot: Bot, cursor: Optional[Tuple[str, int]] = None) -> None:
     """Показывает следующую заявку деканата с кнопками управления"""
-    all_requests = request_dean.get_all_users()
+    request = await fetch_next_item(request_dean.get_all_users_after, cursor)
 
-    if not all_requests:
+    if not request:
         await bot.send_message(chat_id=chat_id, text="На данный момент заявок нет.")
         return
 
-    current_dean_request_index[chat_id] = index
-    request = all_requests[index]
+    current_dean_request_cursor[chat_id] = (request['date_created'], request['id'])
+    requests_count = await request_dean.get_users_count()
 
     message_text = (
-        f"Всего заявок {len(all_requests)}\n\n"
+        f"Всего заявок {requests_count}\n\n"
         f"ID: {request['id']}\n"
         f"Имя: {request['username']}\n"
         f"Дата подачи: {request['date_created']}\n"
@@ -274,19 +440,19 @@ async def show_next_request_dean(chat_id: int, bot: Bot, index: int = 0) -> None
     )
 
 
-async def show_next_request_student_info(chat_id: int, bot: Bot, index: int = 0) -> None:
+async def show_next_request_student_info(chat_id: int, bot: Bot, cursor: Optional[Tuple[str, int]] = None) -> None:
     """Показывает следующую заявку на справку об обучении"""
-    all_requests = study_certificate_requests.get_all_requests()
+    request = await fetch_next_item(study_certificate_requests.get_all_requests_after, cursor)
 
-    if not all_requests:
+    if not request:
         await bot.send_message(chat_id=chat_id, text="На данный момент заявок нет.")
         return
 
-    current_study_request_index[chat_id] = index
-    request = all_requests[index]
+    current_study_request_cursor[chat_id] = (request['date_created'], request['id'])
+    requests_count = await study_certificate_requests.get_requests_count()
 
     message_text = (
-        f"Всего заявок {len(all_requests)}\n\n"
+        f"Всего заявок {requests_count}\n\n"
         f"ID: {request['id']}\n"
         f"username: {request['username']}\n"
         f"ФИО: {request['full_name']}\n"
@@ -312,21 +478,224 @@ async def show_next_request_student_info(chat_id: int, bot: Bot, index: int = 0)
     )
 
 
-async def update_news_messages(bot: Bot, news_item: Dict[str, Any]) -> None:
-    """Обновляет сообщения новостей у подписчиков"""
-    try:
-        message_ids = news_item.get("message_ids", [])
-        news_text = f"Новость ВУЗа\n\nЗаголовок: {news_item['title']}\n\n{news_item['description']}"
+def run_in_background(coroutine) -> asyncio.Task:
+    """Запускает корутину фоновой задачей, не блокируя обработчик"""
+    task = asyncio.create_task(coroutine)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
 
-        for message_id in message_ids:
-            try:
-                await bot.edit_message(message_id=message_id, text=news_text)
-            except Exception as e:
-                logging.error(f"Ошибка при обновлении сообщения {message_id}: {e}")
-                continue
 
+def format_broadcast_progress(title: str, result: BroadcastResult, done_label: str = "Доставлено") -> str:
+    """Формирует текст о ходе рассылки"""
+    total = result.total if result.total is not None else "?"
+    text = (
+        f"{title}\n\n"
+        f"Обработано: {result.attempted} из {total}\n"
+        f"{done_label}: {result.delivered}\n"
+        f"Ошибок: {result.failed}"
+    )
+    if result.finished:
+        text += f"\nВремя: {result.duration:.1f} с"
+    return text
+
+
+def format_failures(failures: Dict[str, int]) -> str:
+    """Формирует строку с количеством ошибок по причинам"""
+    return ", ".join(f"{reason}: {count}" for reason, count in sorted(failures.items(), key=lambda item: -item[1]))
+
+
+async def save_broadcast_stats(news_id: int, kind: str, result: BroadcastResult,
+                               job_id: Optional[int] = None) -> None:
+    """Сохраняет метрики рассылки новости; запуски одного задания складываются в одну строку"""
+    await news.add_broadcast_stats(
+        news_id, kind, result.attempted, result.delivered, result.failed, result.failures,
+        latency_p50=result.latency_percentile(50),
+        latency_p95=result.latency_percentile(95),
+        messages_per_second=result.messages_per_second,
+        duration=result.duration,
+        job_id=job_id
+    )
+
+
+async def run_broadcast_job(bot: Bot, job: Dict[str, Any], resumed: bool = False) -> None:
+    """Выполняет сохраненное задание рассылки новости и показывает отправителю ход рассылки"""
+    # Текст задания мог измениться после правки новости, а само задание - завершиться
+    job = await broadcast_jobs.get_job(job['id'])
+    if not job or job['state'] == 'done':
+        return
+
+    chat_id = job['chat_id']
+    title = "Рассылка новости возобновлена" if resumed else "Рассылка новости"
+    status_id = None
+    if chat_id:
+        status = await bot.send_message(chat_id=chat_id, text=f"{title}\n\nПолучателей: {job['total']}")
+        status_id = status.message.body.mid if getattr(status, "message", None) else None
+
+    # Тело запроса сериализуется один раз на всю рассылку
+    template = MessageTemplate(job['text'])
+
+    async def deliver(recipient):
+        message = check_response(await bot.send_template(template, user_id=recipient['user_id']))
+        return str(message.message.body.mid)
+
+    async def record(outcomes):
+        # Доставки сохраняются по ходу рассылки, а не после ее окончания
+        await news.add_deliveries(job['news_id'], [
+            (user_id, message_id, state) for user_id, state, message_id, _ in outcomes
+        ])
+        await mailings.record_delivery_results(
+            [user_id for user_id, state, _, _ in outcomes if state == "sent"],
+            [user_id for user_id, _, _, error in outcomes if error in UNREACHABLE_REASONS],
+            SUBSCRIBER_FAILURE_THRESHOLD
+        )
+
+    async def report(result):
+        if status_id:
+            await bot.edit_message(message_id=status_id, text=format_broadcast_progress(title, result))
+
+    result = await broadcast_job_runner.run(job, deliver, on_record=record, on_progress=report)
+    await save_broadcast_stats(job['news_id'], "publish", result, job['id'])
+
+    current = await broadcast_jobs.get_job(job['id'])
+    if current and current['cancelled']:
+        if chat_id:
+            await bot.send_message(
+                chat_id=chat_id,
+                text=f"Рассылка новости остановлена: новость удалена. Доставлено до остановки: {result.delivered}."
+            )
+        return
+    if current and current['state'] != 'done':
+        # Рассылка приостановлена правкой новости и будет продолжена с новым текстом
+        return
+
+    if chat_id:
+        counts = await broadcast_jobs.get_job_counts(job['id'])
+        text = f"Новость опубликована: доставлено {counts.get('sent', 0)} из {job['total']} подписчиков."
+        if counts.get('failed'):
+            text += f"\nНе доставлено: {counts['failed']} ({format_failures(result.failures)})"
+        await bot.send_message(chat_id=chat_id, text=text)
+
+
+def start_broadcast_job(bot: Bot, job: Dict[str, Any], resumed: bool = False) -> asyncio.Task:
+    """Запускает задание рассылки фоновой задачей и запоминает ее до завершения"""
+    job_id = job['id']
+    task = run_in_background(run_broadcast_job(bot, job, resumed))
+    broadcast_job_tasks[job_id] = task
+
+    def forget(finished: asyncio.Task) -> None:
+        if broadcast_job_tasks.get(job_id) is finished:
+            del broadcast_job_tasks[job_id]
+
+    task.add_done_callback(forget)
+    return task
+
+
+async def stop_news_jobs(news_id: int, cancel: bool = False) -> List[Dict[str, Any]]:
+    """
+    Останавливает выполняемые задания рассылки новости и ждет их завершения
+
+    После возврата задания больше не отправляют сообщения, а все их
+    доставки записаны в news_deliveries, поэтому снимок доставок полон.
+
+    Args:
+        news_id: ID новости
+        cancel: Отменить задания (при удалении новости); иначе они остаются
+            незавершенными и могут быть запущены снова
+
+    Returns:
+        Задания, выполнение которых было остановлено
+    """
+    if cancel:
+        await broadcast_jobs.cancel_news_jobs(news_id)
+
+    stopped = []
+    for job in await broadcast_jobs.get_unfinished_jobs(news_id):
+        task = broadcast_job_tasks.get(job['id'])
+        if task is None:
+            continue
+        broadcast_job_runner.stop(job['id'])
+        try:
+            # asyncio.wait не отменяет задание, если отменят ожидающий обработчик
+            await asyncio.wait({task})
+        finally:
+            broadcast_job_runner.release(job['id'])
+        stopped.append(job)
+    return stopped
+
+
+async def resume_broadcast_jobs(bot: Bot) -> None:
+    """Продолжает задания рассылки, прерванные перезапуском бота"""
+    for job in await broadcast_jobs.get_unfinished_jobs():
+        logging.info(f"Возобновление задания рассылки {job['id']}")
+        start_broadcast_job(bot, job, resumed=True)
+
+
+async def update_news_messages(bot: Bot, news_item: Dict[str, Any]) -> Optional[BroadcastResult]:
+    """Параллельно обновляет сообщения новости у подписчиков, возвращает итоги"""
+    try:
+        text = format_news_text(news_item['news_type'], news_item['title'], news_item['description'])
+        # Незавершенная рассылка приостанавливается, чтобы снимок доставок был полным,
+        # и продолжается с новым текстом для еще не получивших новость
+        paused = await stop_news_jobs(news_item['id'])
+        await broadcast_jobs.update_news_jobs_text(news_item['id'], text)
+        deliveries = await news.get_deliveries(news_item['id'], status="sent")
+        for job in paused:
+            start_broadcast_job(bot, job, resumed=True)
+
+        template = MessageTemplate(text)
+
+        async def edit(delivery):
+            return check_response(await bot.edit_template(delivery['message_id'], template))
+
+        result = await broadcast_engine.run(deliveries, edit)
+        await save_broadcast_stats(news_item['id'], "edit", result)
+        return result
     except Exception as e:
         logging.error(f"Ошибка в update_news_messages: {e}")
+        return None
+
+
+def format_update_summary(result: Optional[BroadcastResult]) -> str:
+    """Формирует строку об обновлении копий новости у подписчиков"""
+    if result is None:
+        return "Не удалось обновить сообщения у подписчиков."
+    text = f"Обновлено сообщений у подписчиков: {result.delivered} из {result.attempted}"
+    if result.failed:
+        text += f", ошибок: {result.failed}"
+    return text
+
+
+async def recall_news_messages(bot: Bot, chat_id: int, news_id: int, deliveries) -> None:
+    """Удаляет у подписчиков сообщения удаленной новости и показывает SMM ход удаления"""
+    title = f"Удаление сообщений новости {news_id}"
+    status = await bot.send_message(chat_id=chat_id, text=f"{title}\n\nСообщений: {len(deliveries)}")
+    status_id = status.message.body.mid if getattr(status, "message", None) else None
+
+    async def recall(delivery):
+        return check_response(await bot.delete_message(message_id=delivery['message_id']))
+
+    async def report(result):
+        if status_id:
+            await bot.edit_message(
+                message_id=status_id, text=format_broadcast_progress(title, result, done_label="Удалено")
+            )
+
+    result = await broadcast_engine.run(deliveries, recall, on_progress=report)
+    await save_broadcast_stats(news_id, "recall", result)
+
+    # Удаленные копии больше не нужны, неудаленные остаются в news_deliveries
+    # со статусом recall_failed, чтобы их можно было найти и удалить позже
+    await news.update_deliveries_status(news_id, [
+        (delivery['message_id'], "deleted" if reason is None else "recall_failed")
+        for delivery, _, reason in result.deliveries
+    ])
+    await news.delete_deliveries(news_id, status="deleted")
+
+    text = f"Сообщения новости {news_id} удалены у подписчиков: {result.delivered} из {result.attempted}."
+    if result.failed:
+        text += f"\nНе удалось удалить: {result.failed}"
+    await bot.send_message(chat_id=chat_id, text=text)
 
 
 # Обработчики команд
@@ -339,12 +708,13 @@ async def bot_started(event: BotStarted):
 
 @dp.message_created(Command("getadmin"))
 async def getadmin(event: MessageCreated):
-    admins.add_admin(event.from_user.user_id)
+    await admins.add_admin(event.from_user.user_id)
 
 
 @dp.message_created(Command("unban_request"))
 async def unban_request(event: MessageCreated):
-    if black_list.is_in_blacklist(event.from_user.user_id) is None:
+    context = await get_user_context(event.from_user.user_id)
+    if context.blacklisted is None:
         await event.bot.send_message(
             user_id=event.from_user.user_id,
             text="Вы не в бане!"
@@ -353,7 +723,7 @@ async def unban_request(event: MessageCreated):
 
     user_input = " ".join(event.message.body.text.split()[1:])
 
-    if unban_requests.get_pending_request(user_id=event.from_user.user_id):
+    if await unban_requests.get_pending_request(user_id=event.from_user.user_id):
         await event.bot.send_message(
             user_id=event.from_user.user_id,
             text="У вас уже есть активная заявка! Ожидайте ответа!"
@@ -364,24 +734,24 @@ async def unban_request(event: MessageCreated):
         user_id=event.from_user.user_id,
         text="Ваша заявка отправлена на рассмотрение! Ожидайте ответа!"
     )
-    unban_requests.add_request(event.from_user.user_id, event.chat.chat_id, event.from_user.full_name, user_input)
+    await unban_requests.add_request(event.from_user.user_id, event.chat.chat_id, event.from_user.full_name, user_input)
 
 
 @dp.message_created(Command('setd'))
 async def set_dean(event: MessageCreated):
-    if await check_blacklist(event.from_user.user_id, event.chat.chat_id, event.bot):
+    context = await get_user_context(event.from_user.user_id)
+    if await check_blacklist(context, event.chat.chat_id, event.bot):
         return
 
     user_id = event.from_user.user_id
 
-    if (dean_representatives.is_representative(user_id) and
-            users.has_role(user_id, "dean")):
+    if context.role == "dean" and await dean_representatives.is_representative(user_id):
         await event.bot.send_message(
             chat_id=event.chat.chat_id,
             text="Вы уже являетесь представителем деканата!"
         )
-    elif request_dean.get_user(user_id=user_id) is None:
-        request_dean.add_user(user_id=user_id, username=event.from_user.full_name)
+    elif await request_dean.get_user(user_id=user_id) is None:
+        await request_dean.add_user(user_id=user_id, username=event.from_user.full_name)
         await event.bot.send_message(
             chat_id=event.chat.chat_id,
             text="Заявка отправлена на рассмотрение!"
@@ -395,14 +765,16 @@ async def set_dean(event: MessageCreated):
 
 @dp.message_created(Command('menu'))
 async def print_menu(event: MessageCreated):
-    if await check_blacklist(event.from_user.user_id, event.chat.chat_id, event.bot):
+    context = await get_user_context(event.from_user.user_id)
+    if await check_blacklist(context, event.chat.chat_id, event.bot):
         return
     await show_menu(event.chat.chat_id, event.from_user.user_id, event.bot)
 
 
 @dp.message_created(Command('start'))
 async def hello(event: MessageCreated):
-    if await check_blacklist(event.from_user.user_id, event.chat.chat_id, event.bot):
+    context = await get_user_context(event.from_user.user_id)
+    if await check_blacklist(context, event.chat.chat_id, event.bot):
         return
 
     builder = InlineKeyboardBuilder()
@@ -425,76 +797,25 @@ async def hello(event: MessageCreated):
 async def handle_text_input(event: MessageCreated):
     user_id = event.from_user.user_id
 
-    if await check_blacklist(user_id, event.chat.chat_id, event.bot):
+    if await check_blacklist(await get_user_context(user_id), event.chat.chat_id, event.bot):
         return
 
-    if user_id not in user_states:
+    user_state = user_states.get(user_id)
+    if user_state is None:
         return
 
-    current_state = user_states[user_id]
     user_input = event.message.body.text.strip()
-
-    # Обработка различных состояний
-    state_handlers = {
-        "waiting_user_id": handle_waiting_user_id,
-        "waiting_news_id_for_edit": handle_waiting_news_id_for_edit,
-        "waiting_news_title_edit": handle_waiting_news_title_edit,
-        "waiting_news_description_edit": handle_waiting_news_description_edit,
-        "waiting_news_title_edit_both": handle_waiting_news_title_edit_both,
-        "waiting_news_description_edit_both": handle_waiting_news_description_edit_both,
-        "waiting_news_id_for_delete": handle_waiting_news_id_for_delete,
-        "waiting_news_title": handle_waiting_news_title,
-        "waiting_news_description": handle_waiting_news_description,
-        "waiting_full_name": handle_waiting_full_name,
-        "waiting_group": handle_waiting_group,
-        "waiting_problem_room": handle_waiting_problem_room,
-        "waiting_problem_description": handle_waiting_problem_description,
-        "waiting_pass_group": handle_waiting_pass_group,
-        "waiting_pass_birthdate": handle_waiting_pass_birthdate,
-        "waiting_pass_reason": handle_waiting_pass_reason,
-        "waiting_count": handle_waiting_count,
-        "waiting_blacklist_user_id": handle_waiting_blacklist_user_id,
-        "waiting_blacklist_reason": handle_waiting_blacklist_reason,
-        "waiting_blacklist_remove_id": handle_waiting_blacklist_remove_id,
-        "waiting_unban_description": handle_waiting_unban_description,
-        "waiting_event_title": handle_waiting_event_title,
-        "waiting_event_description": handle_waiting_event_description,
-        "waiting_event_date": handle_waiting_event_date,
-        "waiting_event_location": handle_waiting_event_location,
-        "waiting_event_id_for_edit": handle_waiting_event_id_for_edit,
-        "waiting_event_id_for_delete": handle_waiting_event_id_for_delete,
-        "waiting_event_title_edit": handle_waiting_event_title_edit,
-        "waiting_event_description_edit": handle_waiting_event_description_edit,
-        "waiting_event_date_edit": handle_waiting_event_date_edit,
-        "waiting_event_location_edit": handle_waiting_event_location_edit,
-        "waiting_event_title_edit_all": handle_waiting_event_title_edit_all,
-        "waiting_event_description_edit_all": handle_waiting_event_description_edit_all,
-        "waiting_event_date_edit_all": handle_waiting_event_date_edit_all,
-        "waiting_event_location_edit_all": handle_waiting_event_location_edit_all,
-    }
-
-    # Динамически вызываем обработчик состояния, если он существует
-    state_handler = state_handlers.get(current_state)
-    if state_handler:
-        await state_handler(event, user_id, user_input)
-        return
-
-    # Обработка состояний с динамическими суффиксами
-    if current_state.startswith("waiting_reply_text_"):
-        await handle_waiting_reply_text(event, user_id, user_input, current_state)
-    elif current_state.startswith("waiting_pass_reply_"):
-        await handle_waiting_pass_reply(event, user_id, user_input, current_state)
-    elif current_state.startswith("waiting_unban_reject_reason_"):
-        await handle_waiting_unban_reject_reason(event, user_id, user_input, current_state)
+    await conversation.dispatch(user_state, event, user_id, user_input)
 
 
 # Функции-обработчики состояний
+@conversation.on(State.WAITING_USER_ID)
 async def handle_waiting_user_id(event: MessageCreated, user_id: int, user_input: str):
     """Обработка ввода ID пользователя"""
     try:
         target_user_id = int(user_input)
 
-        if not users.is_user_exists(target_user_id):
+        if not await users.is_user_exists(target_user_id):
             await event.bot.send_message(
                 chat_id=event.chat.chat_id,
                 text="Пользователь с таким ID не найден в базе. Введите ID пользователя снова:"
@@ -546,11 +867,12 @@ async def handle_waiting_user_id(event: MessageCreated, user_id: int, user_input
         )
 
 
+@conversation.on(State.WAITING_NEWS_ID_FOR_EDIT)
 async def handle_waiting_news_id_for_edit(event: MessageCreated, user_id: int, user_input: str):
     """Обработка ввода ID новости для редактирования"""
     try:
         news_id = int(user_input)
-        news_item = news.get_news(news_id)
+        news_item = await news.get_news(news_id)
         if not news_item:
             await event.bot.send_message(
                 chat_id=event.chat.chat_id,
@@ -597,6 +919,7 @@ async def handle_waiting_news_id_for_edit(event: MessageCreated, user_id: int, u
         )
 
 
+@conversation.on(State.WAITING_NEWS_TITLE_EDIT)
 async def handle_waiting_news_title_edit(event: MessageCreated, user_id: int, user_input: str):
     """Обработка редактирования заголовка новости"""
     user_data = user_temp_data.get(user_id, {})
@@ -604,14 +927,17 @@ async def handle_waiting_news_title_edit(event: MessageCreated, user_id: int, us
     new_title = user_input
 
     if news_id and new_title:
-        success = news.update_news(news_id, title=new_title)
+        success = await news.update_news(news_id, title=new_title)
         if success:
-            updated_news = news.get_news(news_id)
-            await update_news_messages(event.bot, updated_news)
+            updated_news = await news.get_news(news_id)
+            update_result = await update_news_messages(event.bot, updated_news)
 
             await event.bot.send_message(
                 chat_id=event.chat.chat_id,
-                text=f"Заголовок новости успешно обновлен!\n\nНовый заголовок: {new_title}"
+                text=(
+                    f"Заголовок новости успешно обновлен!\n\nНовый заголовок: {new_title}\n\n"
+                    f"{format_update_summary(update_result)}"
+                )
             )
             await show_menu(event.chat.chat_id, user_id, event.bot)
         else:
@@ -623,6 +949,7 @@ async def handle_waiting_news_title_edit(event: MessageCreated, user_id: int, us
     cleanup_user_state(user_id)
 
 
+@conversation.on(State.WAITING_NEWS_DESCRIPTION_EDIT)
 async def handle_waiting_news_description_edit(event: MessageCreated, user_id: int, user_input: str):
     """Обработка редактирования текста новости"""
     user_data = user_temp_data.get(user_id, {})
@@ -630,16 +957,17 @@ async def handle_waiting_news_description_edit(event: MessageCreated, user_id: i
     new_description = user_input
 
     if news_id and new_description:
-        success = news.update_news(news_id, description=new_description)
+        success = await news.update_news(news_id, description=new_description)
         if success:
-            updated_news = news.get_news(news_id)
-            await update_news_messages(event.bot, updated_news)
+            updated_news = await news.get_news(news_id)
+            update_result = await update_news_messages(event.bot, updated_news)
 
             message = (
                 f"Текст новости успешно обновлен!\n\nНовый текст: {new_description[:100]}..."
                 if len(new_description) > 100
                 else f"Текст новости успешно обновлен!\n\nНовый текст: {new_description}"
             )
+            message += f"\n\n{format_update_summary(update_result)}"
             await event.bot.send_message(chat_id=event.chat.chat_id, text=message)
             await show_menu(event.chat.chat_id, user_id, event.bot)
         else:
@@ -651,16 +979,18 @@ async def handle_waiting_news_description_edit(event: MessageCreated, user_id: i
     cleanup_user_state(user_id)
 
 
+@conversation.on(State.WAITING_NEWS_TITLE_EDIT_BOTH)
 async def handle_waiting_news_title_edit_both(event: MessageCreated, user_id: int, user_input: str):
     """Обработка редактирования заголовка (первый шаг для полного редактирования)"""
     user_temp_data[user_id]["new_title"] = user_input
-    user_states[user_id] = "waiting_news_description_edit_both"
+    user_states[user_id] = UserState(State.WAITING_NEWS_DESCRIPTION_EDIT_BOTH)
     await event.bot.send_message(
         chat_id=event.chat.chat_id,
         text="Новый заголовок сохранен. Теперь введите новый текст новости:"
     )
 
 
+@conversation.on(State.WAITING_NEWS_DESCRIPTION_EDIT_BOTH)
 async def handle_waiting_news_description_edit_both(event: MessageCreated, user_id: int, user_input: str):
     """Обработка редактирования текста (второй шаг для полного редактирования)"""
     user_data = user_temp_data.get(user_id, {})
@@ -669,16 +999,17 @@ async def handle_waiting_news_description_edit_both(event: MessageCreated, user_
     new_description = user_input
 
     if news_id and new_title and new_description:
-        success = news.update_news(news_id, title=new_title, description=new_description)
+        success = await news.update_news(news_id, title=new_title, description=new_description)
         if success:
-            updated_news = news.get_news(news_id)
-            await update_news_messages(event.bot, updated_news)
+            updated_news = await news.get_news(news_id)
+            update_result = await update_news_messages(event.bot, updated_news)
 
             message = (
                 f"Новость полностью обновлена!\n\nНовый заголовок: {new_title}\n\nНовый текст: {new_description[:100]}..."
                 if len(new_description) > 100
                 else f"Новость полностью обновлена!\n\nНовый заголовок: {new_title}\n\nНовый текст: {new_description}"
             )
+            message += f"\n\n{format_update_summary(update_result)}"
             await event.bot.send_message(chat_id=event.chat.chat_id, text=message)
             await show_menu(event.chat.chat_id, user_id, event.bot)
         else:
@@ -690,11 +1021,12 @@ async def handle_waiting_news_description_edit_both(event: MessageCreated, user_
     cleanup_user_state(user_id)
 
 
+@conversation.on(State.WAITING_NEWS_ID_FOR_DELETE)
 async def handle_waiting_news_id_for_delete(event: MessageCreated, user_id: int, user_input: str):
     """Обработка ввода ID новости для удаления"""
     try:
         news_id = int(user_input)
-        news_item = news.get_news(news_id)
+        news_item = await news.get_news(news_id)
         if not news_item:
             await event.bot.send_message(
                 chat_id=event.chat.chat_id,
@@ -732,10 +1064,11 @@ async def handle_waiting_news_id_for_delete(event: MessageCreated, user_id: int,
         )
 
 
+@conversation.on(State.WAITING_NEWS_TITLE)
 async def handle_waiting_news_title(event: MessageCreated, user_id: int, user_input: str):
     """Обработка ввода заголовка новости"""
     user_temp_data[user_id]["title"] = user_input
-    user_states[user_id] = "waiting_news_description"
+    user_states[user_id] = UserState(State.WAITING_NEWS_DESCRIPTION)
 
     await event.bot.send_message(
         chat_id=event.chat.chat_id,
@@ -743,23 +1076,23 @@ async def handle_waiting_news_title(event: MessageCreated, user_id: int, user_in
     )
 
 
+@conversation.on(State.WAITING_NEWS_DESCRIPTION)
 async def handle_waiting_news_description(event: MessageCreated, user_id: int, user_input: str):
     """Обработка ввода текста новости"""
     user_temp_data[user_id]["description"] = user_input
 
     title = user_temp_data[user_id]["title"]
     description = user_temp_data[user_id]["description"]
+    news_type = user_temp_data[user_id].get("news_type", "university")
 
-    preview_text = (
-        f"Предпросмотр новости ВУЗа\n\n"
-        f"Заголовок: {title}\n\n"
-        f"Текст:\n{description}\n\n"
-        "---\nВыберите действие:"
-    )
+    preview_text = format_news_preview(news_type, title, description)
 
     builder = InlineKeyboardBuilder()
     builder.row(
         CallbackButton(text="Разослать", payload="publish_news"),
+        CallbackButton(text="Запланировать", payload="schedule_news")
+    )
+    builder.row(
         CallbackButton(text="Редактировать", payload="edit_news"),
         CallbackButton(text="Отмена", payload="cancel_news")
     )
@@ -773,10 +1106,48 @@ async def handle_waiting_news_description(event: MessageCreated, user_id: int, u
     del user_states[user_id]
 
 
+@conversation.on(State.WAITING_NEWS_PUBLISH_AT)
+async def handle_waiting_news_publish_at(event: MessageCreated, user_id: int, user_input: str):
+    """Обработка ввода времени отложенной публикации новости"""
+    try:
+        publish_at = datetime.strptime(user_input.strip(), "%d.%m.%Y %H:%M")
+    except ValueError:
+        await event.bot.send_message(
+            chat_id=event.chat.chat_id,
+            text="Формат: ДД.ММ.ГГГГ ЧЧ:ММ (Например: 01.09.2025 21:30). Введите снова:"
+        )
+        return
+
+    if publish_at <= datetime.now():
+        await event.bot.send_message(
+            chat_id=event.chat.chat_id,
+            text="Время публикации уже прошло. Введите время в будущем:"
+        )
+        return
+
+    user_data = user_temp_data.get(user_id, {})
+    news_type = user_data.get("news_type", "university")
+    news_id = await news.add_news(
+        user_data.get("title"), user_data.get("description"), news_type,
+        publish_at=publish_at.strftime("%Y-%m-%d %H:%M:%S"), author_chat_id=event.chat.chat_id
+    )
+    if news_id:
+        await event.bot.send_message(
+            chat_id=event.chat.chat_id,
+            text=f"{NEWS_TYPE_TITLES[news_type]} будет разослана {publish_at.strftime('%d.%m.%Y в %H:%M')}."
+        )
+    else:
+        await event.bot.send_message(chat_id=event.chat.chat_id, text="Ошибка при сохранении новости.")
+
+    cleanup_user_state(user_id)
+    await show_menu(event.chat.chat_id, user_id, event.bot)
+
+
+@conversation.on(State.WAITING_FULL_NAME)
 async def handle_waiting_full_name(event: MessageCreated, user_id: int, user_input: str):
     """Обработка ввода ФИО для справки об обучении"""
     user_temp_data[user_id] = {"full_name": user_input}
-    user_states[user_id] = "waiting_group"
+    user_states[user_id] = UserState(State.WAITING_GROUP)
 
     await event.bot.send_message(
         chat_id=event.chat.chat_id,
@@ -784,10 +1155,11 @@ async def handle_waiting_full_name(event: MessageCreated, user_id: int, user_inp
     )
 
 
+@conversation.on(State.WAITING_GROUP)
 async def handle_waiting_group(event: MessageCreated, user_id: int, user_input: str):
     """Обработка ввода группы для справки об обучении"""
     user_temp_data[user_id]["group_name"] = user_input
-    user_states[user_id] = "waiting_count"
+    user_states[user_id] = UserState(State.WAITING_COUNT)
 
     await event.bot.send_message(
         chat_id=event.chat.chat_id,
@@ -795,11 +1167,12 @@ async def handle_waiting_group(event: MessageCreated, user_id: int, user_input:
     )
 
 
+@conversation.on(State.WAITING_PROBLEM_ROOM)
 async def handle_waiting_problem_room(event: MessageCreated, user_id: int, user_input: str):
     """Обработка ввода номера комнаты для жалобы"""
     user_temp_data[user_id] = user_temp_data.get(user_id, {})
     user_temp_data[user_id]["number_room"] = user_input
-    user_states[user_id] = "waiting_problem_description"
+    user_states[user_id] = UserState(State.WAITING_PROBLEM_DESCRIPTION)
 
     await event.bot.send_message(
         chat_id=event.chat.chat_id,
@@ -807,6 +1180,7 @@ async def handle_waiting_problem_room(event: MessageCreated, user_id: int, user_
     )
 
 
+@conversation.on(State.WAITING_PROBLEM_DESCRIPTION)
 async def handle_waiting_problem_description(event: MessageCreated, user_id: int, user_input: str):
     """Обработка ввода описания проблемы"""
     description = user_input
@@ -821,7 +1195,7 @@ async def handle_waiting_problem_description(event: MessageCreated, user_id: int
         cleanup_user_state(user_id)
         return
 
-    complaint_id = student_complaints.add_complaint(
+    complaint_id = await student_complaints.add_complaint(
         user_id=user_id,
         chat_id=event.chat.chat_id,
         username=event.from_user.full_name,
@@ -843,10 +1217,11 @@ async def handle_waiting_problem_description(event: MessageCreated, user_id: int
         )
 
 
+@conversation.on(State.WAITING_PASS_GROUP)
 async def handle_waiting_pass_group(event: MessageCreated, user_id: int, user_input: str):
     """Обработка ввода группы для заявки на пропуск"""
     user_temp_data[user_id] = {"user_group": user_input}
-    user_states[user_id] = "waiting_pass_birthdate"
+    user_states[user_id] = UserState(State.WAITING_PASS_BIRTHDATE)
 
     await event.bot.send_message(
         chat_id=event.chat.chat_id,
@@ -854,6 +1229,7 @@ async def handle_waiting_pass_group(event: MessageCreated, user_id: int, user_in
     )
 
 
+@conversation.on(State.WAITING_PASS_BIRTHDATE)
 async def handle_waiting_pass_birthdate(event: MessageCreated, user_id: int, user_input: str):
     """Обработка ввода даты рождения для заявки на пропуск"""
     pattern = r"^\d{2}\.\d{2}\.\d{4}$"
@@ -865,7 +1241,7 @@ async def handle_waiting_pass_birthdate(event: MessageCreated, user_id: int, use
         return
 
     user_temp_data[user_id]["date_of_birthday"] = user_input
-    user_states[user_id] = "waiting_pass_reason"
+    user_states[user_id] = UserState(State.WAITING_PASS_REASON)
 
     await event.bot.send_message(
         chat_id=event.chat.chat_id,
@@ -873,6 +1249,7 @@ async def handle_waiting_pass_birthdate(event: MessageCreated, user_id: int, use
     )
 
 
+@conversation.on(State.WAITING_PASS_REASON)
 async def handle_waiting_pass_reason(event: MessageCreated, user_id: int, user_input: str):
     """Обработка ввода причины для заявки на пропуск"""
     reason = user_input
@@ -880,7 +1257,7 @@ async def handle_waiting_pass_reason(event: MessageCreated, user_id: int, user_i
     user_group = data.get("user_group")
     date_of_birthday = data.get("date_of_birthday")
 
-    success = dormitory_requests.add_request(
+    success = await dormitory_requests.add_request(
         user_id=user_id,
         chat_id=event.chat.chat_id,
         username=event.from_user.full_name,
@@ -908,11 +1285,11 @@ async def handle_waiting_pass_reason(event: MessageCreated, user_id: int, user_i
         )
 
 
-async def handle_waiting_reply_text(event: MessageCreated, user_id: int, user_input: str, current_state: str):
+@conversation.on(State.WAITING_REPLY_TEXT)
+async def handle_waiting_reply_text(event: MessageCreated, user_id: int, user_input: str, complaint_id: int):
     """Обработка ввода текста ответа на жалобу"""
-    complaint_id = int(current_state.split("_")[-1])
     reply_text = user_input
-    complaint = student_complaints.get_complaint(complaint_id)
+    complaint = await student_complaints.get_complaint(complaint_id)
 
     cleanup_user_state(user_id)
 
@@ -925,22 +1302,21 @@ async def handle_waiting_reply_text(event: MessageCreated, user_id: int, user_in
         text=f"Ваше обращение рассмотрено.\nОтвет: {reply_text}"
     )
 
-    student_complaints.delete_complaint(complaint_id)
+    await student_complaints.delete_complaint(complaint_id)
     await event.bot.send_message(
         chat_id=event.chat.chat_id,
         text="Ответ отправлен студенту, жалоба закрыта."
     )
 
 
-async def handle_waiting_pass_reply(event: MessageCreated, user_id: int, user_input: str, current_state: str):
+@conversation.on(State.WAITING_PASS_REPLY)
+async def handle_waiting_pass_reply(event: MessageCreated, user_id: int, user_input: str, request_id: int):
     """Обработка ввода текста ответа на заявку о пропуске"""
-    request_id = int(current_state.split("_")[-1])
     reply_text = user_input
 
     cleanup_user_state(user_id)
 
-    all_requests = dormitory_requests.get_all_requests()
-    target = next((r for r in all_requests if r["id"] == request_id), None)
+    target = await dormitory_requests.get_request(request_id)
 
     if not target:
         await event.bot.send_message(chat_id=event.chat.chat_id, text="Заявка не найдена.")
@@ -951,13 +1327,14 @@ async def handle_waiting_pass_reply(event: MessageCreated, user_id: int, user_in
         text=f"Ваше обращение рассмотрено.\nОтвет: {reply_text}"
     )
 
-    dormitory_requests.delete_request(request_id)
+    await dormitory_requests.delete_request(request_id)
     await event.bot.send_message(
         chat_id=event.chat.chat_id,
         text="Ответ отправлен студенту, заявка закрыта."
     )
 
 
+@conversation.on(State.WAITING_COUNT)
 async def handle_waiting_count(event: MessageCreated, user_id: int, user_input: str):
     """Обработка ввода количества справок"""
     try:
@@ -987,7 +1364,7 @@ async def handle_waiting_count(event: MessageCreated, user_id: int, user_input:
             cleanup_user_state(user_id)
             return
 
-        success = study_certificate_requests.add_request(
+        success = await study_certificate_requests.add_request(
             user_id,
             event.from_user.full_name,
             full_name,
@@ -1022,19 +1399,20 @@ async def handle_waiting_count(event: MessageCreated, user_id: int, user_input:
         )
 
 
+@conversation.on(State.WAITING_BLACKLIST_USER_ID)
 async def handle_waiting_blacklist_user_id(event: MessageCreated, user_id: int, user_input: str):
     """Обработка ввода ID пользователя для добавления в черный список"""
     try:
         target_user_id = int(user_input)
 
-        if not users.is_user_exists(target_user_id):
+        if not await users.is_user_exists(target_user_id):
             await event.bot.send_message(
                 chat_id=event.chat.chat_id,
                 text="Пользователь с таким ID не найден в базе. Введите ID пользователя снова:"
             )
             return
 
-        if black_list.is_in_blacklist(target_user_id):
+        if await black_list.is_in_blacklist(target_user_id):
             await event.bot.send_message(
                 chat_id=event.chat.chat_id,
                 text="Этот пользователь уже находится в черном списке. Введите другой ID:"
@@ -1042,7 +1420,7 @@ async def handle_waiting_blacklist_user_id(event: MessageCreated, user_id: int,
             return
 
         user_temp_data[user_id] = {"target_user_id": target_user_id}
-        user_states[user_id] = "waiting_blacklist_reason"
+        user_states[user_id] = UserState(State.WAITING_BLACKLIST_REASON)
 
         await event.bot.send_message(
             chat_id=event.chat.chat_id,
@@ -1056,6 +1434,7 @@ async def handle_waiting_blacklist_user_id(event: MessageCreated, user_id: int,
         )
 
 
+@conversation.on(State.WAITING_BLACKLIST_REASON)
 async def handle_waiting_blacklist_reason(event: MessageCreated, user_id: int, user_input: str):
     """Обработка ввода причины для добавления в черный список"""
     reason = user_input
@@ -1070,7 +1449,7 @@ async def handle_waiting_blacklist_reason(event: MessageCreated, user_id: int, u
         cleanup_user_state(user_id)
         return
 
-    success = black_list.add_to_blacklist(target_user_id, reason)
+    success = await black_list.add_to_blacklist(target_user_id, reason)
 
     if success:
         await event.bot.send_message(
@@ -1095,19 +1474,20 @@ async def handle_waiting_blacklist_reason(event: MessageCreated, user_id: int, u
     await show_menu(event.chat.chat_id, user_id, event.bot)
 
 
+@conversation.on(State.WAITING_BLACKLIST_REMOVE_ID)
 async def handle_waiting_blacklist_remove_id(event: MessageCreated, user_id: int, user_input: str):
     """Обработка ввода ID пользователя для удаления из черного списка"""
     try:
         target_user_id = int(user_input)
 
-        if not black_list.is_in_blacklist(target_user_id):
+        if not await black_list.is_in_blacklist(target_user_id):
             await event.bot.send_message(
                 chat_id=event.chat.chat_id,
                 text="Пользователь с таким ID не найден в черном списке. Введите ID снова:"
             )
             return
 
-        success = black_list.remove_from_blacklist(target_user_id)
+        success = await black_list.remove_from_blacklist(target_user_id)
 
         if success:
             await event.bot.send_message(
@@ -1138,12 +1518,13 @@ async def handle_waiting_blacklist_remove_id(event: MessageCreated, user_id: int
         )
 
 
+@conversation.on(State.WAITING_UNBAN_DESCRIPTION)
 async def handle_waiting_unban_description(event: MessageCreated, user_id: int, user_input: str):
     """Обработка ввода описания для заявки на разбан"""
     description = user_input
     user_data = user_temp_data.get(user_id, {})
 
-    success = unban_requests.add_request(
+    success = await unban_requests.add_request(
         user_id=user_id,
         chat_id=event.chat.chat_id,
         username=event.from_user.full_name,
@@ -1164,19 +1545,19 @@ async def handle_waiting_unban_description(event: MessageCreated, user_id: int,
     cleanup_user_state(user_id)
 
 
-async def handle_waiting_unban_reject_reason(event: MessageCreated, user_id: int, user_input: str, current_state: str):
+@conversation.on(State.WAITING_UNBAN_REJECT_REASON)
+async def handle_waiting_unban_reject_reason(event: MessageCreated, user_id: int, user_input: str, request_id: int):
     """Обработка ввода причины отклонения заявки на разбан"""
-    request_id = int(current_state.split("_")[-1])
     reject_reason = user_input
 
-    success = unban_requests.reject_request(
+    success = await unban_requests.reject_request(
         request_id=request_id,
         admin_id=user_id,
         notes=reject_reason
     )
 
     if success:
-        request = unban_requests.get_request_by_id(request_id)
+        request = await unban_requests.get_request_by_id(request_id)
         if request:
             try:
                 await event.bot.send_message(
@@ -1198,19 +1579,19 @@ async def handle_waiting_unban_reject_reason(event: MessageCreated, user_id: int
 
     cleanup_user_state(user_id)
 
-    all_requests = unban_requests.get_all_pending_requests()
-    if all_requests:
-        current_index = current_unban_request_index.get(event.chat.chat_id, 0)
-        await show_next_unban_request(event.chat.chat_id, event.bot, current_index)
+    if await unban_requests.get_pending_requests_count():
+        cursor = current_unban_request_cursor.get(event.chat.chat_id)
+        await show_next_unban_request(event.chat.chat_id, event.bot, cursor)
     else:
         await event.bot.send_message(chat_id=event.chat.chat_id, text="Заявки на разбан закончились!")
         await show_menu(event.chat.chat_id, user_id, event.bot)
 
 
+@conversation.on(State.WAITING_EVENT_TITLE)
 async def handle_waiting_event_title(event: MessageCreated, user_id: int, user_input: str):
     """Обработка ввода заголовка события"""
     user_temp_data[user_id] = {"title": user_input}
-    user_states[user_id] = "waiting_event_description"
+    user_states[user_id] = UserState(State.WAITING_EVENT_DESCRIPTION)
 
     await event.bot.send_message(
         chat_id=event.chat.chat_id,
@@ -1218,10 +1599,11 @@ async def handle_waiting_event_title(event: MessageCreated, user_id: int, user_i
     )
 
 
+@conversation.on(State.WAITING_EVENT_DESCRIPTION)
 async def handle_waiting_event_description(event: MessageCreated, user_id: int, user_input: str):
     """Обработка ввода описания события"""
     user_temp_data[user_id]["description"] = user_input
-    user_states[user_id] = "waiting_event_date"
+    user_states[user_id] = UserState(State.WAITING_EVENT_DATE)
 
     await event.bot.send_message(
         chat_id=event.chat.chat_id,
@@ -1229,10 +1611,11 @@ async def handle_waiting_event_description(event: MessageCreated, user_id: int,
     )
 
 
+@conversation.on(State.WAITING_EVENT_DATE)
 async def handle_waiting_event_date(event: MessageCreated, user_id: int, user_input: str):
     """Обработка ввода даты события"""
     user_temp_data[user_id]["event_date"] = user_input
-    user_states[user_id] = "waiting_event_location"
+    user_states[user_id] = UserState(State.WAITING_EVENT_LOCATION)
 
     await event.bot.send_message(
         chat_id=event.chat.chat_id,
@@ -1240,6 +1623,7 @@ async def handle_waiting_event_date(event: MessageCreated, user_id: int, user_in
     )
 
 
+@conversation.on(State.WAITING_EVENT_LOCATION)
 async def handle_waiting_event_location(event: MessageCreated, user_id: int, user_input: str):
     """Обработка ввода места проведения события"""
     location = user_input
@@ -1256,7 +1640,7 @@ async def handle_waiting_event_location(event: MessageCreated, user_id: int, use
         cleanup_user_state(user_id)
         return
 
-    event_id = events_db.add_event(title, description, event_date, location)
+    event_id = await events_db.add_event(title, description, event_date, location)
 
     if event_id:
         await event.bot.send_message(
@@ -1279,11 +1663,12 @@ async def handle_waiting_event_location(event: MessageCreated, user_id: int, use
     await show_menu(event.chat.chat_id, user_id, event.bot)
 
 
+@conversation.on(State.WAITING_EVENT_ID_FOR_EDIT)
 async def handle_waiting_event_id_for_edit(event: MessageCreated, user_id: int, user_input: str):
     """Обработка ввода ID события для редактирования"""
     try:
         event_id = int(user_input)
-        event_item = events_db.get_event(event_id)
+        event_item = await events_db.get_event(event_id)
         if not event_item:
             await event.bot.send_message(
                 chat_id=event.chat.chat_id,
@@ -1333,11 +1718,12 @@ async def handle_waiting_event_id_for_edit(event: MessageCreated, user_id: int,
         )
 
 
+@conversation.on(State.WAITING_EVENT_ID_FOR_DELETE)
 async def handle_waiting_event_id_for_delete(event: MessageCreated, user_id: int, user_input: str):
     """Обработка ввода ID события для удаления"""
     try:
         event_id = int(user_input)
-        event_item = events_db.get_event(event_id)
+        event_item = await events_db.get_event(event_id)
         if not event_item:
             await event.bot.send_message(
                 chat_id=event.chat.chat_id,
@@ -1374,6 +1760,7 @@ async def handle_waiting_event_id_for_delete(event: MessageCreated, user_id: int
         )
 
 
+@conversation.on(State.WAITING_EVENT_TITLE_EDIT)
 async def handle_waiting_event_title_edit(event: MessageCreated, user_id: int, user_input: str):
     """Обработка редактирования заголовка события"""
     user_data = user_temp_data.get(user_id, {})
@@ -1381,7 +1768,7 @@ async def handle_waiting_event_title_edit(event: MessageCreated, user_id: int, u
     new_title = user_input
 
     if event_id and new_title:
-        success = events_db.update_event(event_id, title=new_title)
+        success = await events_db.update_event(event_id, title=new_title)
         if success:
             await event.bot.send_message(
                 chat_id=event.chat.chat_id,
@@ -1397,6 +1784,7 @@ async def handle_waiting_event_title_edit(event: MessageCreated, user_id: int, u
     await show_menu(event.chat.chat_id, user_id, event.bot)
 
 
+@conversation.on(State.WAITING_EVENT_DESCRIPTION_EDIT)
 async def handle_waiting_event_description_edit(event: MessageCreated, user_id: int, user_input: str):
     """Обработка редактирования описания события"""
     user_data = user_temp_data.get(user_id, {})
@@ -1404,7 +1792,7 @@ async def handle_waiting_event_description_edit(event: MessageCreated, user_id:
     new_description = user_input
 
     if event_id and new_description:
-        success = events_db.update_event(event_id, description=new_description)
+        success = await events_db.update_event(event_id, description=new_description)
         if success:
             await event.bot.send_message(
                 chat_id=event.chat.chat_id,
@@ -1420,6 +1808,7 @@ async def handle_waiting_event_description_edit(event: MessageCreated, user_id:
     await show_menu(event.chat.chat_id, user_id, event.bot)
 
 
+@conversation.on(State.WAITING_EVENT_DATE_EDIT)
 async def handle_waiting_event_date_edit(event: MessageCreated, user_id: int, user_input: str):
     """Обработка редактирования даты события"""
     user_data = user_temp_data.get(user_id, {})
@@ -1427,7 +1816,7 @@ async def handle_waiting_event_date_edit(event: MessageCreated, user_id: int, us
     new_date = user_input
 
     if event_id and new_date:
-        success = events_db.update_event(event_id, event_date=new_date)
+        success = await events_db.update_event(event_id, event_date=new_date)
         if success:
             await event.bot.send_message(
                 chat_id=event.chat.chat_id,
@@ -1443,6 +1832,7 @@ async def handle_waiting_event_date_edit(event: MessageCreated, user_id: int, us
     await show_menu(event.chat.chat_id, user_id, event.bot)
 
 
+@conversation.on(State.WAITING_EVENT_LOCATION_EDIT)
 async def handle_waiting_event_location_edit(event: MessageCreated, user_id: int, user_input: str):
     """Обработка редактирования места события"""
     user_data = user_temp_data.get(user_id, {})
@@ -1450,7 +1840,7 @@ async def handle_waiting_event_location_edit(event: MessageCreated, user_id: int
     new_location = user_input
 
     if event_id and new_location:
-        success = events_db.update_event(event_id, location=new_location)
+        success = await events_db.update_event(event_id, location=new_location)
         if success:
             await event.bot.send_message(
                 chat_id=event.chat.chat_id,
@@ -1466,10 +1856,11 @@ async def handle_waiting_event_location_edit(event: MessageCreated, user_id: int
     await show_menu(event.chat.chat_id, user_id, event.bot)
 
 
+@conversation.on(State.WAITING_EVENT_TITLE_EDIT_ALL)
 async def handle_waiting_event_title_edit_all(event: MessageCreated, user_id: int, user_input: str):
     """Обработка редактирования заголовка (первый шаг полного редактирования)"""
     user_temp_data[user_id]["new_title"] = user_input
-    user_states[user_id] = "waiting_event_description_edit_all"
+    user_states[user_id] = UserState(State.WAITING_EVENT_DESCRIPTION_EDIT_ALL)
 
     await event.bot.send_message(
         chat_id=event.chat.chat_id,
@@ -1477,10 +1868,11 @@ async def handle_waiting_event_title_edit_all(event: MessageCreated, user_id: in
     )
 
 
+@conversation.on(State.WAITING_EVENT_DESCRIPTION_EDIT_ALL)
 async def handle_waiting_event_description_edit_all(event: MessageCreated, user_id: int, user_input: str):
     """Обработка редактирования описания (второй шаг полного редактирования)"""
     user_temp_data[user_id]["new_description"] = user_input
-    user_states[user_id] = "waiting_event_date_edit_all"
+    user_states[user_id] = UserState(State.WAITING_EVENT_DATE_EDIT_ALL)
 
     await event.bot.send_message(
         chat_id=event.chat.chat_id,
@@ -1488,10 +1880,11 @@ async def handle_waiting_event_description_edit_all(event: MessageCreated, user_
     )
 
 
+@conversation.on(State.WAITING_EVENT_DATE_EDIT_ALL)
 async def handle_waiting_event_date_edit_all(event: MessageCreated, user_id: int, user_input: str):
     """Обработка редактирования даты (третий шаг полного редактирования)"""
     user_temp_data[user_id]["new_date"] = user_input
-    user_states[user_id] = "waiting_event_location_edit_all"
+    user_states[user_id] = UserState(State.WAITING_EVENT_LOCATION_EDIT_ALL)
 
     await event.bot.send_message(
         chat_id=event.chat.chat_id,
@@ -1499,6 +1892,7 @@ async def handle_waiting_event_date_edit_all(event: MessageCreated, user_id: int
     )
 
 
+@conversation.on(State.WAITING_EVENT_LOCATION_EDIT_ALL)
 async def handle_waiting_event_location_edit_all(event: MessageCreated, user_id: int, user_input: str):
     """Обработка редактирования места (четвертый шаг полного редактирования)"""
     user_data = user_temp_data.get(user_id, {})
@@ -1509,7 +1903,7 @@ async def handle_waiting_event_location_edit_all(event: MessageCreated, user_id:
     new_location = user_input
 
     if event_id and new_title and new_description and new_date and new_location:
-        success = events_db.update_event(
+        success = await events_db.update_event(
             event_id,
             title=new_title,
             description=new_description,
@@ -1545,6 +1939,75 @@ def cleanup_user_state(user_id: int) -> None:
         del user_temp_data[user_id]
 
 
+# Многошаговые операции с базами (выполняются в потоке базы данных одной единицей работы)
+def assign_role(target_user_id: int, role: str) -> bool:
+    """Назначает роль пользователю и добавляет его в таблицу роли"""
+    with transaction() as unit:
+        if role == "admin":
+            admins.sync.add_admin(target_user_id)
+        elif role == "dean":
+            dean_representatives.sync.add_representative(target_user_id)
+        users.sync.add_user(target_user_id, role)
+    return unit.committed
+
+
+def revoke_role(target_user_id: int) -> Tuple[bool, Optional[str]]:
+    """Снимает с пользователя роль, возвращает признак успеха и роль, которая была до этого (None - роли не было)"""
+    with transaction() as unit:
+        current_role = users.sync.get_user_role(target_user_id)
+        admins.sync.remove_admin(target_user_id)
+        dean_representatives.sync.remove_representative(target_user_id)
+        users.sync.update_user_role(target_user_id, "user")
+    return unit.committed, current_role
+
+
+def approve_dean_request(target_user_id: int) -> bool:
+    """Переносит пользователя из заявок в представители деканата"""
+    with transaction() as unit:
+        request_dean.sync.delete_user(user_id=target_user_id)
+        dean_representatives.sync.add_representative(user_id=target_user_id)
+        users.sync.add_user(target_user_id, "dean")
+    return unit.committed
+
+
+def create_news_job(news_id: int, news_type: str, news_text: str, chat_id: int) -> Optional[int]:
+    """Создает задание рассылки новости подписчикам ее типа, перебирая их пачками"""
+    with transaction() as unit:
+        job_id = broadcast_jobs.sync.create_job("news", news_text, (), news_id=news_id, chat_id=chat_id)
+        if job_id:
+            total = 0
+            for batch in mailings.sync.iter_subscribers_by_type(news_type):
+                total += broadcast_jobs.sync.add_recipients(job_id, [subscriber['user_id'] for subscriber in batch])
+            if not total:
+                # Подписчиков нет - задание сразу завершено, иначе его возобновляли бы при каждом запуске
+                broadcast_jobs.sync.set_job_state(job_id, "done")
+    # Внутри publish_scheduled_news единица работы еще не зафиксирована, поэтому проверяем failed
+    return None if unit.failed else job_id
+
+
+def publish_news(title: str, description: str, news_type: str, chat_id: int) -> Optional[int]:
+    """Сохраняет новость и создает задание ее рассылки одной единицей работы, возвращает id задания"""
+    job_id = None
+    with transaction() as unit:
+        news_id = news.sync.add_news(title, description, news_type)
+        if news_id:
+            job_id = create_news_job(news_id, news_type, format_news_text(news_type, title, description), chat_id)
+    return job_id if unit.committed else None
+
+
+def publish_scheduled_news(news_item: Dict[str, Any]) -> Optional[int]:
+    """Отмечает отложенную новость опубликованной и создает задание ее рассылки"""
+    job_id = None
+    with transaction() as unit:
+        if news.sync.mark_published(news_item['id']):
+            job_id = create_news_job(
+                news_item['id'], news_item['news_type'],
+                format_news_text(news_item['news_type'], news_item['title'], news_item['description']),
+                news_item['author_chat_id']
+            )
+    return job_id if unit.committed else None
+
+
 # Обработчики callback'ов
 @dp.message_callback()
 async def message_callback(callback: MessageCallback):
@@ -1558,169 +2021,79 @@ async def message_callback(callback: MessageCallback):
     except Exception as e:
         logging.error(f"Ошибка при удалении меню: {e}")
 
-    # Группируем обработчики по функциональности
-    navigation_handlers = {
-        "requests_dean": lambda: show_next_request_dean(chat_id, callback.bot, 0),
-        "requests_student": lambda: show_next_request_student_info(chat_id, callback.bot, 0),
-        "students_complaints": lambda: show_next_complaint(chat_id, callback.bot, 0),
-        "pass_requests": lambda: show_next_pass_request(chat_id, callback.bot, 0),
-        "show_unban_requests": lambda: show_next_unban_request(chat_id, callback.bot, 0),
-        "next_requestDean": handle_next_request_dean,
-        "next_requestStudy": handle_next_request_study,
-        "next_complaint": handle_next_complaint,
-        "next_pass_request": handle_next_pass_request,
-        "next_unban_request": lambda: handle_next_unban_request(callback, chat_id),
-        "stop_requests": lambda: callback.bot.send_message(chat_id=chat_id, text="Просмотр заявок остановлен."),
-        "stop_complaints": lambda: callback.message.answer("Просмотр жалоб остановлен."),
-        "stop_pass_requests": lambda: callback.message.answer("Просмотр заявок на пропуск остановлен."),
-        "stop_unban_requests": lambda: callback.bot.send_message(chat_id=chat_id,
-                                                                 text="Просмотр заявок на разбан остановлен."),
-    }
-
-    action_handlers = {
-        "information_about_training": handle_information_about_training,
-        "submit_problem": handle_submit_problem,
-        "submit_pass_request": handle_submit_pass_request,
-        "electronic_library": handle_electronic_library,
-        "about_university": handle_about_university,
-        "subscribe_news": handle_subscribe_news,
-        "subscribe_news_university": handle_subscribe_news_university,
-        "subscribe_news_dormitory": handle_subscribe_news_dormitory,
-        "add_news": handle_add_news,
-        "delete_news": handle_delete_news,
-        "reedit_news": handle_reedit_news,
-        "publish_news": handle_publish_news,
-        "edit_news": handle_edit_news,
-        "cancel_news": handle_cancel_news,
-        "edit_news_title": handle_edit_news_title,
-        "edit_news_description": handle_edit_news_description,
-        "edit_news_both": handle_edit_news_both,
-        "cancel_news_edit": handle_cancel_news_edit,
-        "add_user_to_black_list": handle_add_user_to_black_list,
-        "show_blacklist": handle_show_blacklist,
-        "remove_from_blacklist": handle_remove_from_blacklist,
-        "add_role": handle_add_role,
-        "remove_role": handle_remove_role,
-        "set_applicant": handle_set_applicant,
-        "set_student": handle_set_student,
-        "confirm_user": handle_confirm_user,
-        "deny_user": handle_deny_user,
-        "confirm_remove": handle_confirm_remove,
-        "deny_remove": handle_deny_remove,
-        "cancel_operation": handle_cancel_operation,
-        "future_events": handle_future_events,
-        "manage_events": handle_manage_events,
-        "add_event": handle_add_event,
-        "list_events": handle_list_events,
-        "edit_event": handle_edit_event,
-        "delete_event": handle_delete_event,
-        "edit_event_title": handle_edit_event_title,
-        "edit_event_description": handle_edit_event_description,
-        "edit_event_date": handle_edit_event_date,
-        "edit_event_location": handle_edit_event_location,
-        "edit_event_all": handle_edit_event_all,
-        "cancel_event_edit": handle_cancel_event_edit,
-        "cancel_delete_news": handle_cancel_delete_news,
-        "cancel_delete_event": handle_cancel_delete_event,
-    }
-
-    # Обработка навигационных callback'ов
-    if payload in navigation_handlers:
-        await navigation_handlers[payload]()
-        if payload.startswith("stop_"):
-            await show_menu(chat_id, user_id, callback.bot)
+    route = callback_router.resolve(payload)
+    if route is None:
         return
 
-    # Обработка action callback'ов
-    if payload in action_handlers:
-        await action_handlers[payload](callback, chat_id, user_id)
-        return
-
-    # Обработка callback'ов с префиксами
-    if payload.startswith("approveDean_"):
-        await handle_approve_dean(callback, payload, chat_id, user_id)
-    elif payload.startswith("rejectDean_"):
-        await handle_reject_dean(callback, payload, chat_id, user_id)
-    elif payload.startswith("approveStudy_"):
-        await handle_approve_study(callback, payload, chat_id, user_id)
-    elif payload.startswith("rejectStudy_"):
-        await handle_reject_study(callback, payload, chat_id, user_id)
-    elif payload.startswith("approve_unban_"):
-        await handle_approve_unban(callback, payload, chat_id, user_id)
-    elif payload.startswith("reject_unban_"):
-        await handle_reject_unban(callback, payload, chat_id, user_id)
-    elif payload.startswith("replyComplaint_"):
-        await handle_reply_complaint(callback, payload)
-    elif payload.startswith("closeComplaint_"):
-        await handle_close_complaint(callback, payload, chat_id)
-    elif payload.startswith("replyPass_"):
-        await handle_reply_pass(callback, payload)
-    elif payload.startswith("autoReplyPass_"):
-        await handle_auto_reply_pass(callback, payload)
-    elif payload.startswith("rejectPass_"):
-        await handle_reject_pass(callback, payload)
-    elif payload.startswith("confirm_delete_news_"):
-        await handle_confirm_delete_news(callback, payload, chat_id, user_id)
-    elif payload.startswith("confirm_delete_event_"):
-        await handle_confirm_delete_event(callback, payload, chat_id, user_id)
-    elif payload.startswith("role_"):
-        await handle_role_selection(callback, payload, chat_id, user_id)
+    handler, arguments = route
+    await handler(callback, *arguments, chat_id, user_id)
 
 
 # Навигационные обработчики
-async def handle_next_request_dean(callback, chat_id):
-    all_requests = request_dean.get_all_users()
-    if not all_requests:
-        await callback.bot.send_message(chat_id=chat_id, text="Заявок нет!")
-        return
-    current_index = current_dean_request_index.get(chat_id, 0)
-    next_index = (current_index + 1) % len(all_requests)
-    await show_next_request_dean(chat_id, callback.bot, next_index)
+async def handle_requests_dean(callback, chat_id, user_id):
+    await show_next_request_dean(chat_id, callback.bot)
 
 
-async def handle_next_request_study(callback, chat_id):
-    all_requests = study_certificate_requests.get_all_requests()
-    if not all_requests:
-        await callback.bot.send_message(chat_id=chat_id, text="Заявок нет!")
-        return
-    current_index = current_study_request_index.get(chat_id, 0)
-    next_index = (current_index + 1) % len(all_requests)
-    await show_next_request_student_info(chat_id, callback.bot, next_index)
+async def handle_requests_student(callback, chat_id, user_id):
+    await show_next_request_student_info(chat_id, callback.bot)
 
 
-async def handle_next_complaint(callback, chat_id):
-    complaints = student_complaints.get_all_complaints()
-    if not complaints:
-        await callback.message.answer("Жалоб нет!")
-        return
-    current_index = current_complaint_index.get(chat_id, 0)
-    next_index = (current_index + 1) % len(complaints)
-    await show_next_complaint(chat_id, callback.bot, next_index)
+async def handle_students_complaints(callback, chat_id, user_id):
+    await show_next_complaint(chat_id, callback.bot)
 
 
-async def handle_next_pass_request(callback, chat_id):
-    all_requests = dormitory_requests.get_all_requests()
-    if not all_requests:
-        await callback.message.answer("Заявок на пропуск нет!")
-        return
-    current_index = current_dorm_pass_index.get(chat_id, 0)
-    next_index = (current_index + 1) % len(all_requests)
-    await show_next_pass_request(chat_id, callback.bot, next_index)
+async def handle_pass_requests(callback, chat_id, user_id):
+    await show_next_pass_request(chat_id, callback.bot)
 
 
-async def handle_next_unban_request(callback, chat_id):
-    all_requests = unban_requests.get_all_pending_requests()
-    if not all_requests:
-        await callback.bot.send_message(chat_id=chat_id, text="Заявок на разбан нет!")
-        return
-    current_index = current_unban_request_index.get(chat_id, 0)
-    next_index = (current_index + 1) % len(all_requests)
-    await show_next_unban_request(chat_id, callback.bot, next_index)
+async def handle_show_unban_requests(callback, chat_id, user_id):
+    await show_next_unban_request(chat_id, callback.bot)
+
+
+def stop_viewing(text):
+    """Создает обработчик кнопки остановки просмотра: сообщение и возврат в меню"""
+    async def handler(callback, chat_id, user_id):
+        await callback.bot.send_message(chat_id=chat_id, text=text)
+        await show_menu(chat_id, user_id, callback.bot)
+    return handler
+
+
+async def handle_next_request_dean(callback, chat_id, user_id):
+    cursor = current_dean_request_cursor.get(chat_id)
+    await show_next_request_dean(chat_id, callback.bot, cursor)
+
+
+async def handle_next_request_study(callback, chat_id, user_id):
+    cursor = current_study_request_cursor.get(chat_id)
+    await show_next_request_student_info(chat_id, callback.bot, cursor)
+
+
+async def handle_next_complaint(callback, chat_id, user_id):
+    cursor = current_complaint_cursor.get(chat_id)
+    await show_next_complaint(chat_id, callback.bot, cursor)
+
+
+async def handle_next_pass_request(callback, chat_id, user_id):
+    cursor = current_dorm_pass_cursor.get(chat_id)
+    await show_next_pass_request(chat_id, callback.bot, cursor)
+
+
+async def handle_more_news(callback, chat_id, user_id):
+    await show_news_page(chat_id, callback.bot, current_news_list_cursor.get(chat_id))
+
+
+async def handle_more_blacklist(callback, chat_id, user_id):
+    await show_blacklist_page(chat_id, callback.bot, current_blacklist_cursor.get(chat_id))
+
+
+async def handle_next_unban_request(callback, chat_id, user_id):
+    cursor = current_unban_request_cursor.get(chat_id)
+    await show_next_unban_request(chat_id, callback.bot, cursor)
 
 
 # Action обработчики
 async def handle_information_about_training(callback, chat_id, user_id):
-    user_states[user_id] = "waiting_full_name"
+    user_states[user_id] = UserState(State.WAITING_FULL_NAME)
     await callback.bot.send_message(
         chat_id=chat_id,
         text="Заполните данные для заявки на справку об обучении.\n\nВведите ваше ФИО (Например: Иванов Иван Иванович):"
@@ -1728,12 +2101,12 @@ async def handle_information_about_training(callback, chat_id, user_id):
 
 
 async def handle_submit_problem(callback, chat_id, user_id):
-    user_states[user_id] = "waiting_problem_room"
+    user_states[user_id] = UserState(State.WAITING_PROBLEM_ROOM)
     await callback.message.answer("Введите номер комнаты (Например: 1.4.12):")
 
 
 async def handle_submit_pass_request(callback, chat_id, user_id):
-    user_states[user_id] = "waiting_pass_group"
+    user_states[user_id] = UserState(State.WAITING_PASS_GROUP)
     await callback.message.answer("Введите вашу группу:")
 
 
@@ -1762,8 +2135,8 @@ async def handle_about_university(callback, chat_id, user_id):
     await show_menu(chat_id, user_id, callback.bot)
 
 async def handle_subscribe_news(callback, chat_id, user_id):
-    mailing_university = mailings.is_subscribed(user_id, "university")
-    mailing_dormitory = mailings.is_subscribed(user_id, "dormitory")
+    mailing_university = await mailings.is_subscribed(user_id, "university")
+    mailing_dormitory = await mailings.is_subscribed(user_id, "dormitory")
 
     builder = InlineKeyboardBuilder()
     builder.row(CallbackButton(
@@ -1793,11 +2166,11 @@ async def handle_subscribe_news(callback, chat_id, user_id):
 async def handle_subscribe_news_university(callback, chat_id, user_id):
     await callback.message.delete()
 
-    if mailings.is_subscribed(user_id, "university"):
-        mailings.remove_subscription(user_id, "university")
+    if await mailings.is_subscribed(user_id, "university"):
+        await mailings.remove_subscription(user_id, "university")
         new_status = False
     else:
-        mailings.add_subscription(user_id, callback.chat.chat_id, "university")
+        await mailings.add_subscription(user_id, callback.chat.chat_id, "university")
         new_status = True
 
     builder = InlineKeyboardBuilder()
@@ -1817,11 +2190,11 @@ async def handle_subscribe_news_university(callback, chat_id, user_id):
 async def handle_subscribe_news_dormitory(callback, chat_id, user_id):
     await callback.message.delete()
 
-    if mailings.is_subscribed(user_id, "dormitory"):
-        mailings.remove_subscription(user_id, "dormitory")
+    if await mailings.is_subscribed(user_id, "dormitory"):
+        await mailings.remove_subscription(user_id, "dormitory")
         new_status = False
     else:
-        mailings.add_subscription(user_id, callback.chat.chat_id, "dormitory")
+        await mailings.add_subscription(user_id, callback.chat.chat_id, "dormitory")
         new_status = True
 
     builder = InlineKeyboardBuilder()
@@ -1839,80 +2212,79 @@ async def handle_subscribe_news_dormitory(callback, chat_id, user_id):
 
 
 async def handle_add_news(callback, chat_id, user_id):
-    user_states[user_id] = "waiting_news_title"
+    user_states[user_id] = UserState(State.WAITING_NEWS_TITLE)
     user_temp_data[user_id] = {}
     await callback.bot.send_message(chat_id=chat_id, text="Введите заголовок новости ВУЗа:")
 
 
+async def handle_sending_info(callback, chat_id, user_id):
+    user_states[user_id] = UserState(State.WAITING_NEWS_TITLE)
+    user_temp_data[user_id] = {"news_type": "dormitory"}
+    await callback.bot.send_message(chat_id=chat_id, text="Введите заголовок новости общежития:")
+
+
 async def handle_delete_news(callback, chat_id, user_id):
-    all_news = news.get_all_news()
-    if not all_news:
+    if not await show_news_page(chat_id, callback.bot):
         await callback.bot.send_message(chat_id=chat_id, text="Новостей для удаления не найдено.")
         return
 
-    news_list_text = "Список всех новостей ВУЗа:\n\n"
-    for news_item in all_news:
-        news_list_text += f"ID: {news_item['id']}\n"
-        news_list_text += f"Заголовок: {news_item['title']}\n"
-        news_list_text += f"Дата: {news_item['publication_date']}\n"
-        news_list_text += "─" * 30 + "\n"
-
-    await callback.bot.send_message(chat_id=chat_id, text=news_list_text)
-
-    user_states[user_id] = "waiting_news_id_for_delete"
+    user_states[user_id] = UserState(State.WAITING_NEWS_ID_FOR_DELETE)
     await callback.bot.send_message(chat_id=chat_id, text="Введите ID новости для удаления:")
 
 
 async def handle_reedit_news(callback, chat_id, user_id):
-    all_news = news.get_all_news()
-    if not all_news:
+    if not await show_news_page(chat_id, callback.bot):
         await callback.bot.send_message(chat_id=chat_id, text="Новостей для редактирования не найдено.")
         return
 
-    news_list_text = "Список всех новостей ВУЗа:\n\n"
-    for news_item in all_news:
-        news_list_text += f"ID: {news_item['id']}\n"
-        news_list_text += f"Заголовок: {news_item['title']}\n"
-        news_list_text += f"Дата: {news_item['publication_date']}\n"
-        news_list_text += "─" * 30 + "\n"
+    user_states[user_id] = UserState(State.WAITING_NEWS_ID_FOR_EDIT)
+    await callback.bot.send_message(chat_id=chat_id, text="Введите ID новости для редактирования:")
 
-    await callback.bot.send_message(chat_id=chat_id, text=news_list_text)
 
-    user_states[user_id] = "waiting_news_id_for_edit"
-    await callback.bot.send_message(chat_id=chat_id, text="Введите ID новости для редактирования:")
+async def handle_broadcast_stats(callback, chat_id, user_id):
+    stats = await news.get_broadcast_stats(limit=10)
+    if not stats:
+        await callback.bot.send_message(chat_id=chat_id, text="Рассылок пока не было.")
+        return
+
+    kinds = {"publish": "рассылка", "edit": "правка", "recall": "удаление"}
+    stats_text = "Последние рассылки:\n\n"
+    for item in stats:
+        p50 = f"{item['latency_p50'] * 1000:.0f}" if item['latency_p50'] is not None else "-"
+        p95 = f"{item['latency_p95'] * 1000:.0f}" if item['latency_p95'] is not None else "-"
+        stats_text += (
+            f"Новость {item['news_id']} ({item['title'] or 'удалена'}), {kinds[item['kind']]}, {item['date_finished']}\n"
+            f"Обработано: {item['attempted']}, успешно: {item['delivered']}, ошибок: {item['failed']}\n"
+            f"Задержка p50/p95: {p50}/{p95} мс, скорость: {item['messages_per_second']:.1f} сообщ./с\n"
+        )
+        if item['failures']:
+            stats_text += f"Ошибки: {format_failures(item['failures'])}\n"
+        stats_text += "\n"
+
+    await callback.bot.send_message(chat_id=chat_id, text=stats_text)
 
 
 async def handle_publish_news(callback, chat_id, user_id):
     user_data = user_temp_data.get(user_id, {})
     title = user_data.get("title")
     description = user_data.get("description")
+    news_type = user_data.get("news_type", "university")
 
     if not title or not description:
         await callback.bot.send_message(chat_id=chat_id, text="Ошибка: данные новости не найдены.")
         return
 
-    news_id = news.add_news(title, description, "university")
-    if news_id:
-        subscribers = mailings.get_subscribers_by_type("university")
-        message_ids = []
-
-        if subscribers:
-            news_text = f"Новость ВУЗа\n\nЗаголовок: {title}\n\n{description}"
-            for subscriber in subscribers:
-                try:
-                    message = await callback.bot.send_message(
-                        user_id=subscriber['user_id'],
-                        text=news_text
-                    )
-                    message_ids.append(str(message.message.body.mid))
-                except Exception as e:
-                    logging.error(f"Ошибка отправки пользователю {subscriber['user_id']}: {e}")
-
-            news.update_news(news_id, message_ids=message_ids)
+    job_id = await run_in_database(publish_news, title, description, news_type, chat_id)
+    job = await broadcast_jobs.get_job(job_id) if job_id else None
+    if job:
+        total = job['total']
+
+        if total:
+            start_broadcast_job(callback.bot, job)
 
         await callback.bot.send_message(
             chat_id=chat_id,
-            text=f"Новость ВУЗа успешно опубликована и отправлена {len(subscribers)} подписчикам!"
+            text=f"{NEWS_TYPE_TITLES[news_type]} сохранена, рассылка {total} подписчикам запущена."
         )
 
         if user_id in user_temp_data:
@@ -1923,9 +2295,25 @@ async def handle_publish_news(callback, chat_id, user_id):
         await callback.bot.send_message(chat_id=chat_id, text="Ошибка при сохранении новости.")
 
 
+async def handle_schedule_news(callback, chat_id, user_id):
+    user_data = user_temp_data.get(user_id, {})
+    if not user_data.get("title") or not user_data.get("description"):
+        await callback.bot.send_message(chat_id=chat_id, text="Ошибка: данные новости не найдены.")
+        return
+
+    user_states[user_id] = UserState(State.WAITING_NEWS_PUBLISH_AT)
+    await callback.bot.send_message(
+        chat_id=chat_id,
+        text="Введите дату и время рассылки (формат: ДД.ММ.ГГГГ ЧЧ:ММ):"
+    )
+
+
 async def handle_edit_news(callback, chat_id, user_id):
-    user_states[user_id] = "waiting_news_title"
-    await callback.bot.send_message(chat_id=chat_id, text="Введите новый заголовок новости ВУЗа:")
+    user_states[user_id] = UserState(State.WAITING_NEWS_TITLE)
+    news_type = user_temp_data.get(user_id, {}).get("news_type", "university")
+    await callback.bot.send_message(
+        chat_id=chat_id, text=f"Введите новый заголовок ({NEWS_TYPE_TITLES[news_type].lower()}):"
+    )
 
 
 async def handle_cancel_news(callback, chat_id, user_id):
@@ -1935,17 +2323,17 @@ async def handle_cancel_news(callback, chat_id, user_id):
 
 
 async def handle_edit_news_title(callback, chat_id, user_id):
-    user_states[user_id] = "waiting_news_title_edit"
+    user_states[user_id] = UserState(State.WAITING_NEWS_TITLE_EDIT)
     await callback.bot.send_message(chat_id=chat_id, text="Введите новый заголовок новости:")
 
 
 async def handle_edit_news_description(callback, chat_id, user_id):
-    user_states[user_id] = "waiting_news_description_edit"
+    user_states[user_id] = UserState(State.WAITING_NEWS_DESCRIPTION_EDIT)
     await callback.bot.send_message(chat_id=chat_id, text="Введите новый текст новости:")
 
 
 async def handle_edit_news_both(callback, chat_id, user_id):
-    user_states[user_id] = "waiting_news_title_edit_both"
+    user_states[user_id] = UserState(State.WAITING_NEWS_TITLE_EDIT_BOTH)
     await callback.bot.send_message(chat_id=chat_id, text="Введите новый заголовок новости:")
 
 
@@ -1956,7 +2344,7 @@ async def handle_cancel_news_edit(callback, chat_id, user_id):
 
 
 async def handle_add_user_to_black_list(callback, chat_id, user_id):
-    user_states[user_id] = "waiting_blacklist_user_id"
+    user_states[user_id] = UserState(State.WAITING_BLACKLIST_USER_ID)
     await callback.bot.send_message(
         chat_id=chat_id,
         text="Введите ID пользователя для добавления в черный список:"
@@ -1964,36 +2352,19 @@ async def handle_add_user_to_black_list(callback, chat_id, user_id):
 
 
 async def handle_show_blacklist(callback, chat_id, user_id):
-    blacklisted_users = black_list.get_all_blacklisted()
-    if not blacklisted_users:
+    if not await show_blacklist_page(chat_id, callback.bot):
         await callback.bot.send_message(chat_id=chat_id, text="Черный список пуст.")
         return
 
-    message_text = "Черный список пользователей:\n\n"
-    for user in blacklisted_users:
-        message_text += f"ID: {user['user_id']}\n"
-        message_text += f"Причина: {user['reason']}\n"
-        message_text += f"Дата добавления: {user['date_added']}\n"
-        message_text += "─" * 30 + "\n"
-
-    await callback.bot.send_message(chat_id=chat_id, text=message_text)
     await show_menu(chat_id, user_id, callback.bot)
 
 
 async def handle_remove_from_blacklist(callback, chat_id, user_id):
-    blacklisted_users = black_list.get_all_blacklisted()
-    if not blacklisted_users:
+    if not await show_blacklist_page(chat_id, callback.bot):
         await callback.bot.send_message(chat_id=chat_id, text="Черный список пуст.")
         return
 
-    message_text = "Пользователи в черном списке:\n\n"
-    for user in blacklisted_users:
-        message_text += f"ID: {user['user_id']}\n"
-        message_text += f"Причина: {user['reason']}\n\n"
-
-    await callback.bot.send_message(chat_id=chat_id, text=message_text)
-
-    user_states[user_id] = "waiting_blacklist_remove_id"
+    user_states[user_id] = UserState(State.WAITING_BLACKLIST_REMOVE_ID)
     await callback.bot.send_message(
         chat_id=chat_id,
         text="Введите ID пользователя для удаления из черного списка:"
@@ -2017,10 +2388,10 @@ async def handle_add_role(callback, chat_id, user_id):
 
 
 async def handle_remove_role(callback, chat_id, user_id):
-    admin_users = users.get_users_by_role("admin")
-    dean_users = users.get_users_by_role("dean")
-    smm_users = users.get_users_by_role("smm")
-    head_dormitory_users = users.get_users_by_role("head_dormitory")
+    admin_users = await users.get_users_by_role("admin")
+    dean_users = await users.get_users_by_role("dean")
+    smm_users = await users.get_users_by_role("smm")
+    head_dormitory_users = await users.get_users_by_role("head_dormitory")
 
     message_text = "Пользователи с ролями:\n\n"
 
@@ -2057,7 +2428,7 @@ async def handle_remove_role(callback, chat_id, user_id):
     builder.row(CallbackButton(text="Отмена", payload="cancel_operation"))
 
     user_temp_data[user_id] = {"action_type": "remove"}
-    user_states[user_id] = "waiting_user_id"
+    user_states[user_id] = UserState(State.WAITING_USER_ID)
 
     await callback.bot.send_message(
         chat_id=chat_id,
@@ -2067,8 +2438,10 @@ async def handle_remove_role(callback, chat_id, user_id):
 
 
 async def handle_set_applicant(callback, chat_id, user_id):
-    if not users.has_role(user_id, "admin"):
-        users.add_user(user_id, "applicant")
+    context = await get_user_context(user_id)
+    if context.role != "admin":
+        await users.add_user(user_id, "applicant")
+        forget_user_context()
         await callback.bot.send_message(
             chat_id=chat_id,
             text=f"Ваша роль сменена на Абитуриент\nИспользуйте /menu"
@@ -2076,8 +2449,10 @@ async def handle_set_applicant(callback, chat_id, user_id):
 
 
 async def handle_set_student(callback, chat_id, user_id):
-    if not users.has_role(user_id, "admin"):
-        users.add_user(user_id, "student")
+    context = await get_user_context(user_id)
+    if context.role != "admin":
+        await users.add_user(user_id, "student")
+        forget_user_context()
         await callback.bot.send_message(
             chat_id=chat_id,
             text=f"Ваша роль сменена на Студент\nИспользуйте /menu"
@@ -2090,12 +2465,11 @@ async def handle_confirm_user(callback, chat_id, user_id):
     target_user_id = user_data.get("target_user_id")
 
     if role and target_user_id:
-        if role == "admin":
-            admins.add_admin(target_user_id)
-        elif role == "dean":
-            dean_representatives.add_representative(target_user_id)
-        users.add_user(target_user_id, role)
-        await callback.bot.send_message(chat_id=chat_id, text=f"Пользователю назначена роль {role}")
+        if await run_in_database(assign_role, target_user_id, role):
+            forget_user_context()
+            await callback.bot.send_message(chat_id=chat_id, text=f"Пользователю назначена роль {role}")
+        else:
+            await callback.bot.send_message(chat_id=chat_id, text="Ошибка при назначении роли")
     else:
         await callback.bot.send_message(chat_id=chat_id, text="Ошибка: данные не найдены")
 
@@ -2104,7 +2478,7 @@ async def handle_confirm_user(callback, chat_id, user_id):
 
 
 async def handle_deny_user(callback, chat_id, user_id):
-    user_states[user_id] = "waiting_user_id"
+    user_states[user_id] = UserState(State.WAITING_USER_ID)
     await callback.bot.send_message(chat_id=chat_id, text="Введите ID пользователя снова:")
 
 
@@ -2113,15 +2487,17 @@ async def handle_confirm_remove(callback, chat_id, user_id):
     target_user_id = user_data.get("target_user_id")
 
     if target_user_id:
-        current_role = users.get_user_role(target_user_id)
-        admins.remove_admin(target_user_id)
-        dean_representatives.remove_representative(target_user_id)
-        users.update_user_role(target_user_id, "user")
-
-        await callback.bot.send_message(
-            chat_id=chat_id,
-            text=f"Пользователю {target_user_id} удалена роль {current_role}"
-        )
+        revoked, current_role = await run_in_database(revoke_role, target_user_id)
+        forget_user_context()
+        if revoked and current_role:
+            await callback.bot.send_message(
+                chat_id=chat_id,
+                text=f"Пользователю {target_user_id} удалена роль {current_role}"
+            )
+        elif revoked:
+            await callback.bot.send_message(chat_id=chat_id, text=f"У пользователя {target_user_id} нет роли")
+        else:
+            await callback.bot.send_message(chat_id=chat_id, text="Ошибка при удалении роли")
     else:
         await callback.bot.send_message(chat_id=chat_id, text="Ошибка: данные не найдены")
 
@@ -2130,7 +2506,7 @@ async def handle_confirm_remove(callback, chat_id, user_id):
 
 
 async def handle_deny_remove(callback, chat_id, user_id):
-    user_states[user_id] = "waiting_user_id"
+    user_states[user_id] = UserState(State.WAITING_USER_ID)
     await callback.bot.send_message(chat_id=chat_id, text="Введите ID пользователя снова:")
 
 
@@ -2141,7 +2517,7 @@ async def handle_cancel_operation(callback, chat_id, user_id):
 
 
 async def handle_future_events(callback, chat_id, user_id):
-    upcoming_events = events_db.get_upcoming_events()
+    upcoming_events = await events_db.get_upcoming_events()
     if not upcoming_events:
         await callback.bot.send_message(
             chat_id=chat_id,
@@ -2172,7 +2548,7 @@ async def handle_manage_events(callback, chat_id, user_id):
         CallbackButton(text="Удалить событие", payload="delete_event")
     )
 
-    events_count = events_db.get_events_count()
+    events_count = await events_db.get_events_count()
 
     await callback.bot.send_message(
         chat_id=chat_id,
@@ -2182,13 +2558,13 @@ async def handle_manage_events(callback, chat_id, user_id):
 
 
 async def handle_add_event(callback, chat_id, user_id):
-    user_states[user_id] = "waiting_event_title"
+    user_states[user_id] = UserState(State.WAITING_EVENT_TITLE)
     user_temp_data[user_id] = {}
     await callback.bot.send_message(chat_id=chat_id, text="Введите заголовок события:")
 
 
 async def handle_list_events(callback, chat_id, user_id):
-    all_events = events_db.get_all_events(limit=10)
+    all_events = await events_db.get_all_events(limit=10)
     if not all_events:
         await callback.bot.send_message(chat_id=chat_id, text="Событий пока нет.")
         return
@@ -2205,7 +2581,7 @@ async def handle_list_events(callback, chat_id, user_id):
 
 
 async def handle_edit_event(callback, chat_id, user_id):
-    all_events = events_db.get_all_events(limit=10)
+    all_events = await events_db.get_all_events(limit=10)
     if not all_events:
         await callback.bot.send_message(chat_id=chat_id, text="Событий для редактирования не найдено.")
         return
@@ -2219,12 +2595,12 @@ async def handle_edit_event(callback, chat_id, user_id):
 
     await callback.bot.send_message(chat_id=chat_id, text=events_list_text)
 
-    user_states[user_id] = "waiting_event_id_for_edit"
+    user_states[user_id] = UserState(State.WAITING_EVENT_ID_FOR_EDIT)
     await callback.bot.send_message(chat_id=chat_id, text="Введите ID события для редактирования:")
 
 
 async def handle_delete_event(callback, chat_id, user_id):
-    all_events = events_db.get_all_events(limit=10)
+    all_events = await events_db.get_all_events(limit=10)
     if not all_events:
         await callback.bot.send_message(chat_id=chat_id, text="Событий для удаления не найдено.")
         return
@@ -2238,32 +2614,32 @@ async def handle_delete_event(callback, chat_id, user_id):
 
     await callback.bot.send_message(chat_id=chat_id, text=events_list_text)
 
-    user_states[user_id] = "waiting_event_id_for_delete"
+    user_states[user_id] = UserState(State.WAITING_EVENT_ID_FOR_DELETE)
     await callback.bot.send_message(chat_id=chat_id, text="Введите ID события для удаления:")
 
 
 async def handle_edit_event_title(callback, chat_id, user_id):
-    user_states[user_id] = "waiting_event_title_edit"
+    user_states[user_id] = UserState(State.WAITING_EVENT_TITLE_EDIT)
     await callback.bot.send_message(chat_id=chat_id, text="Введите новый заголовок события:")
 
 
 async def handle_edit_event_description(callback, chat_id, user_id):
-    user_states[user_id] = "waiting_event_description_edit"
+    user_states[user_id] = UserState(State.WAITING_EVENT_DESCRIPTION_EDIT)
     await callback.bot.send_message(chat_id=chat_id, text="Введите новое описание события:")
 
 
 async def handle_edit_event_date(callback, chat_id, user_id):
-    user_states[user_id] = "waiting_event_date_edit"
+    user_states[user_id] = UserState(State.WAITING_EVENT_DATE_EDIT)
     await callback.bot.send_message(chat_id=chat_id, text="Введите новую дату события (формат: ДД.ММ.ГГГГ ЧЧ:ММ):")
 
 
 async def handle_edit_event_location(callback, chat_id, user_id):
-    user_states[user_id] = "waiting_event_location_edit"
+    user_states[user_id] = UserState(State.WAITING_EVENT_LOCATION_EDIT)
     await callback.bot.send_message(chat_id=chat_id, text="Введите новое место проведения события:")
 
 
 async def handle_edit_event_all(callback, chat_id, user_id):
-    user_states[user_id] = "waiting_event_title_edit_all"
+    user_states[user_id] = UserState(State.WAITING_EVENT_TITLE_EDIT_ALL)
     await callback.bot.send_message(chat_id=chat_id, text="Введите новый заголовок события:")
 
 
@@ -2284,12 +2660,11 @@ async def handle_cancel_delete_event(callback, chat_id, user_id):
 
 
 # Обработчики с префиксами
-async def handle_approve_dean(callback, payload, chat_id, user_id):
-    user_id_payload = int(payload.split("_")[1])
-    if request_dean.get_user(user_id_payload):
-        request_dean.delete_user(user_id=user_id_payload)
-        dean_representatives.add_representative(user_id=user_id_payload)
-        users.add_user(user_id_payload, "dean")
+async def handle_approve_dean(callback, user_id_payload, chat_id, user_id):
+    if await request_dean.get_user(user_id_payload):
+        if not await run_in_database(approve_dean_request, user_id_payload):
+            await callback.bot.send_message(chat_id=chat_id, text="Ошибка при принятии заявки")
+            return
 
         await callback.bot.send_message(
             chat_id=chat_id,
@@ -2300,19 +2675,17 @@ async def handle_approve_dean(callback, payload, chat_id, user_id):
             text="Вашу заявку приняли! Вам доступны новые возможности!"
         )
 
-        all_requests = request_dean.get_all_users()
-        if all_requests:
-            current_index = current_dean_request_index.get(chat_id, 0)
-            await show_next_request_dean(chat_id, callback.bot, current_index)
+        if await request_dean.get_users_count():
+            cursor = current_dean_request_cursor.get(chat_id)
+            await show_next_request_dean(chat_id, callback.bot, cursor)
         else:
             await callback.bot.send_message(chat_id=chat_id, text=f"Заявки закончились!")
             await show_menu(chat_id, user_id, callback.bot)
 
 
-async def handle_reject_dean(callback, payload, chat_id, user_id):
-    user_id_payload = int(payload.split("_")[1])
-    if request_dean.get_user(user_id_payload):
-        request_dean.delete_user(user_id=user_id_payload)
+async def handle_reject_dean(callback, user_id_payload, chat_id, user_id):
+    if await request_dean.get_user(user_id_payload):
+        await request_dean.delete_user(user_id=user_id_payload)
 
         await callback.bot.send_message(
             chat_id=chat_id,
@@ -2323,19 +2696,17 @@ async def handle_reject_dean(callback, payload, chat_id, user_id):
             text="Вашу заявку отклонили!"
         )
 
-        all_requests = request_dean.get_all_users()
-        if all_requests:
-            current_index = current_dean_request_index.get(chat_id, 0)
-            await show_next_request_dean(chat_id, callback.bot, current_index)
+        if await request_dean.get_users_count():
+            cursor = current_dean_request_cursor.get(chat_id)
+            await show_next_request_dean(chat_id, callback.bot, cursor)
         else:
             await callback.bot.send_message(chat_id=chat_id, text=f"Заявки закончились!")
             await show_menu(chat_id, user_id, callback.bot)
 
 
-async def handle_approve_study(callback, payload, chat_id, user_id):
-    user_id_payload = int(payload.split("_")[1])
-    if study_certificate_requests.is_request_exists(user_id_payload):
-        study_certificate_requests.delete_request(request_id=user_id_payload)
+async def handle_approve_study(callback, user_id_payload, chat_id, user_id):
+    if await study_certificate_requests.is_request_exists(user_id_payload):
+        await study_certificate_requests.delete_request(request_id=user_id_payload)
 
         await callback.bot.send_message(
             chat_id=chat_id,
@@ -2346,19 +2717,17 @@ async def handle_approve_study(callback, payload, chat_id, user_id):
             text="Ваша справка готова к получению!"
         )
 
-        all_requests = study_certificate_requests.get_all_requests()
-        if all_requests:
-            current_index = current_study_request_index.get(chat_id, 0)
-            await show_next_request_student_info(chat_id, callback.bot, current_index)
+        if await study_certificate_requests.get_requests_count():
+            cursor = current_study_request_cursor.get(chat_id)
+            await show_next_request_student_info(chat_id, callback.bot, cursor)
         else:
             await callback.bot.send_message(chat_id=chat_id, text=f"Заявки закончились!")
             await show_menu(chat_id, user_id, callback.bot)
 
 
-async def handle_reject_study(callback, payload, chat_id, user_id):
-    user_id_payload = int(payload.split("_")[1])
-    if study_certificate_requests.is_request_exists(user_id_payload):
-        study_certificate_requests.delete_request(request_id=user_id_payload)
+async def handle_reject_study(callback, user_id_payload, chat_id, user_id):
+    if await study_certificate_requests.is_request_exists(user_id_payload):
+        await study_certificate_requests.delete_request(request_id=user_id_payload)
 
         await callback.bot.send_message(
             chat_id=chat_id,
@@ -2369,27 +2738,25 @@ async def handle_reject_study(callback, payload, chat_id, user_id):
             text="Вам отказали в выдаче справки! Обратитесь в деканат!"
         )
 
-        all_requests = study_certificate_requests.get_all_requests()
-        if all_requests:
-            current_index = current_study_request_index.get(chat_id, 0)
-            await show_next_request_student_info(chat_id, callback.bot, current_index)
+        if await study_certificate_requests.get_requests_count():
+            cursor = current_study_request_cursor.get(chat_id)
+            await show_next_request_student_info(chat_id, callback.bot, cursor)
         else:
             await callback.bot.send_message(chat_id=chat_id, text=f"Заявки закончились!")
             await show_menu(chat_id, user_id, callback.bot)
 
 
-async def handle_approve_unban(callback, payload, chat_id, user_id):
-    request_id = int(payload.split("_")[2])
-    success = unban_requests.approve_request(
+async def handle_approve_unban(callback, request_id, chat_id, user_id):
+    success = await unban_requests.approve_request(
         request_id=request_id,
         admin_id=user_id,
         notes="Заявка одобрена администратором"
     )
 
     if success:
-        request = unban_requests.get_request_by_id(request_id)
+        request = await unban_requests.get_request_by_id(request_id)
         if request:
-            black_list.remove_from_blacklist(request['user_id'])
+            await black_list.remove_from_blacklist(request['user_id'])
             try:
                 await callback.bot.send_message(
                     user_id=request['user_id'],
@@ -2408,86 +2775,79 @@ async def handle_approve_unban(callback, payload, chat_id, user_id):
             text="Ошибка при одобрении заявки. Возможно, заявка уже обработана."
         )
 
-    all_requests = unban_requests.get_all_pending_requests()
-    if all_requests:
-        current_index = current_unban_request_index.get(chat_id, 0)
-        await show_next_unban_request(chat_id, callback.bot, current_index)
+    if await unban_requests.get_pending_requests_count():
+        cursor = current_unban_request_cursor.get(chat_id)
+        await show_next_unban_request(chat_id, callback.bot, cursor)
     else:
         await callback.bot.send_message(chat_id=chat_id, text="Заявки на разбан закончились!")
         await show_menu(chat_id, user_id, callback.bot)
 
 
-async def handle_reject_unban(callback, payload, chat_id, user_id):
-    request_id = int(payload.split("_")[2])
-    user_states[user_id] = f"waiting_unban_reject_reason_{request_id}"
+async def handle_reject_unban(callback, request_id, chat_id, user_id):
+    user_states[user_id] = UserState(State.WAITING_UNBAN_REJECT_REASON, request_id)
     await callback.bot.send_message(
         chat_id=chat_id,
         text="Введите причину отклонения заявки:"
     )
 
 
-async def handle_reply_complaint(callback, payload):
-    complaint_id = int(payload.split("_")[1])
-    complaint = student_complaints.get_complaint(complaint_id)
+async def handle_reply_complaint(callback, complaint_id, chat_id, user_id):
+    complaint = await student_complaints.get_complaint(complaint_id)
     if not complaint:
         await callback.message.answer("Жалоба не найдена.")
         return
 
-    user_states[callback.from_user.user_id] = f"waiting_reply_text_{complaint_id}"
+    user_states[callback.from_user.user_id] = UserState(State.WAITING_REPLY_TEXT, complaint_id)
     await callback.message.answer("Введите текст ответа студенту:")
 
 
-async def handle_close_complaint(callback, payload, chat_id):
-    complaint_id = int(payload.split("_")[1])
-    if student_complaints.delete_complaint(complaint_id):
+async def handle_close_complaint(callback, complaint_id, chat_id, user_id):
+    if await student_complaints.delete_complaint(complaint_id):
         await callback.message.answer("Жалоба закрыта.")
-        complaints = student_complaints.get_all_complaints()
-        if complaints:
-            current_index = current_complaint_index.get(chat_id, 0)
-            await show_next_complaint(chat_id, callback.bot, current_index % len(complaints))
+        if await student_complaints.get_complaints_count():
+            cursor = current_complaint_cursor.get(chat_id)
+            await show_next_complaint(chat_id, callback.bot, cursor)
         else:
             await callback.message.answer("Жалобы закончились!")
     else:
         await callback.message.answer("Не удалось закрыть жалобу.")
 
 
-async def handle_reply_pass(callback, payload):
-    request_id = int(payload.split("_")[1])
-    user_states[callback.from_user.user_id] = f"waiting_pass_reply_{request_id}"
+async def handle_reply_pass(callback, request_id, chat_id, user_id):
+    user_states[callback.from_user.user_id] = UserState(State.WAITING_PASS_REPLY, request_id)
     await callback.message.answer("Введите текст ответа студенту:")
 
 
-async def handle_auto_reply_pass(callback, payload):
-    request_id = int(payload.split("_")[1])
-    all_requests = dormitory_requests.get_all_requests()
-    target = next((r for r in all_requests if r["id"] == request_id), None)
+async def handle_auto_reply_pass(callback, request_id, chat_id, user_id):
+    target = await dormitory_requests.get_request(request_id)
 
     if target:
         await callback.bot.send_message(
             chat_id=target["chat_id"],
             text="Ваша заявка принята. Получите пропуск в кабинете 2.1.06, с 8:00 до 20:00 пн-пт, с 10:00 до 18:00 сб-вс"
         )
-        dormitory_requests.delete_request(request_id)
+        await dormitory_requests.delete_request(request_id)
         await callback.message.answer("Автоответ отправлен студенту, заявка закрыта.")
 
 
-async def handle_reject_pass(callback, payload):
-    request_id = int(payload.split("_")[1])
-    if dormitory_requests.delete_request(request_id):
+async def handle_reject_pass(callback, request_id, chat_id, user_id):
+    if await dormitory_requests.delete_request(request_id):
         await callback.message.answer("Заявка отклонена и удалена.")
     else:
         await callback.message.answer("Не удалось удалить заявку.")
 
 
-async def handle_confirm_delete_news(callback, payload, chat_id, user_id):
-    news_id = int(payload.split("_")[3])
-    message_ids = news.get_news(news_id)["message_ids"]
-    success = news.delete_news(news_id)
-
-    for message_id in message_ids:
-        await bot.delete_message(message_id)
+async def handle_confirm_delete_news(callback, news_id, chat_id, user_id):
+    # Рассылка удаляемой новости отменяется до снимка доставок, иначе
+    # сообщения, отправленные после снимка, остались бы у подписчиков
+    await stop_news_jobs(news_id, cancel=True)
+    deliveries = await news.get_deliveries(news_id, status="sent")
+    success = await news.delete_news(news_id, keep_deliveries=True)
 
     if success:
+        if deliveries:
+            run_in_background(recall_news_messages(callback.bot, chat_id, news_id, deliveries))
+        await news.delete_deliveries(news_id, status="failed")
         await callback.bot.send_message(
             chat_id=chat_id,
             text=f"Новость с ID {news_id} успешно удалена!"
@@ -2501,9 +2861,8 @@ async def handle_confirm_delete_news(callback, payload, chat_id, user_id):
     await show_menu(chat_id, user_id, callback.bot)
 
 
-async def handle_confirm_delete_event(callback, payload, chat_id, user_id):
-    event_id = int(payload.split("_")[3])
-    success = events_db.delete_event(event_id)
+async def handle_confirm_delete_event(callback, event_id, chat_id, user_id):
+    success = await events_db.delete_event(event_id)
 
     if success:
         await callback.bot.send_message(
@@ -2519,10 +2878,9 @@ async def handle_confirm_delete_event(callback, payload, chat_id, user_id):
     await show_menu(chat_id, user_id, callback.bot)
 
 
-async def handle_role_selection(callback, payload, chat_id, user_id):
-    selected_role = "_".join(payload.split("_")[1:])
+async def handle_role_selection(callback, selected_role, chat_id, user_id):
     user_temp_data[user_id] = {"selected_role": selected_role, "action_type": "add"}
-    user_states[user_id] = "waiting_user_id"
+    user_states[user_id] = UserState(State.WAITING_USER_ID)
 
     builder = InlineKeyboardBuilder()
     builder.row(CallbackButton(text="Отмена", payload="cancel_operation"))
@@ -2534,8 +2892,142 @@ async def handle_role_selection(callback, payload, chat_id, user_id):
     )
 
 
+# Таблица обработчиков кнопок собирается один раз при импорте
+callback_router = CallbackRouter()
+
+for callback_payload, callback_handler in {
+    "requests_dean": handle_requests_dean,
+    "requests_student": handle_requests_student,
+    "students_complaints": handle_students_complaints,
+    "pass_requests": handle_pass_requests,
+    "show_unban_requests": handle_show_unban_requests,
+    "next_requestDean": handle_next_request_dean,
+    "next_requestStudy": handle_next_request_study,
+    "next_complaint": handle_next_complaint,
+    "next_pass_request": handle_next_pass_request,
+    "next_unban_request": handle_next_unban_request,
+    "more_news": handle_more_news,
+    "more_blacklist": handle_more_blacklist,
+    "stop_requests": stop_viewing("Просмотр заявок остановлен."),
+    "stop_complaints": stop_viewing("Просмотр жалоб остановлен."),
+    "stop_pass_requests": stop_viewing("Просмотр заявок на пропуск остановлен."),
+    "stop_unban_requests": stop_viewing("Просмотр заявок на разбан остановлен."),
+    "information_about_training": handle_information_about_training,
+    "submit_problem": handle_submit_problem,
+    "submit_pass_request": handle_submit_pass_request,
+    "electronic_library": handle_electronic_library,
+    "about_university": handle_about_university,
+    "subscribe_news": handle_subscribe_news,
+    "subscribe_news_university": handle_subscribe_news_university,
+    "subscribe_news_dormitory": handle_subscribe_news_dormitory,
+    "add_news": handle_add_news,
+    "sending_info": handle_sending_info,
+    "delete_news": handle_delete_news,
+    "reedit_news": handle_reedit_news,
+    "broadcast_stats": handle_broadcast_stats,
+    "publish_news": handle_publish_news,
+    "schedule_news": handle_schedule_news,
+    "edit_news": handle_edit_news,
+    "cancel_news": handle_cancel_news,
+    "edit_news_title": handle_edit_news_title,
+    "edit_news_description": handle_edit_news_description,
+    "edit_news_both": handle_edit_news_both,
+    "cancel_news_edit": handle_cancel_news_edit,
+    "add_user_to_black_list": handle_add_user_to_black_list,
+    "show_blacklist": handle_show_blacklist,
+    "remove_from_blacklist": handle_remove_from_blacklist,
+    "add_role": handle_add_role,
+    "remove_role": handle_remove_role,
+    "set_applicant": handle_set_applicant,
+    "set_student": handle_set_student,
+    "confirm_user": handle_confirm_user,
+    "deny_user": handle_deny_user,
+    "confirm_remove": handle_confirm_remove,
+    "deny_remove": handle_deny_remove,
+    "cancel_operation": handle_cancel_operation,
+    "future_events": handle_future_events,
+    "manage_events": handle_manage_events,
+    "add_event": handle_add_event,
+    "list_events": handle_list_events,
+    "edit_event": handle_edit_event,
+    "delete_event": handle_delete_event,
+    "edit_event_title": handle_edit_event_title,
+    "edit_event_description": handle_edit_event_description,
+    "edit_event_date": handle_edit_event_date,
+    "edit_event_location": handle_edit_event_location,
+    "edit_event_all": handle_edit_event_all,
+    "cancel_event_edit": handle_cancel_event_edit,
+    "cancel_delete_news": handle_cancel_delete_news,
+    "cancel_delete_event": handle_cancel_delete_event,
+}.items():
+    callback_router.add(callback_payload, callback_handler)
+
+# Payload с параметром: остаток после префикса передается обработчику вторым аргументом
+for callback_prefix, callback_handler, callback_parser in (
+    ("approveDean_", handle_approve_dean, int),
+    ("rejectDean_", handle_reject_dean, int),
+    ("approveStudy_", handle_approve_study, int),
+    ("rejectStudy_", handle_reject_study, int),
+    ("approve_unban_", handle_approve_unban, int),
+    ("reject_unban_", handle_reject_unban, int),
+    ("replyComplaint_", handle_reply_complaint, int),
+    ("closeComplaint_", handle_close_complaint, int),
+    ("replyPass_", handle_reply_pass, int),
+    ("autoReplyPass_", handle_auto_reply_pass, int),
+    ("rejectPass_", handle_reject_pass, int),
+    ("confirm_delete_news_", handle_confirm_delete_news, int),
+    ("confirm_delete_event_", handle_confirm_delete_event, int),
+    ("role_", handle_role_selection, str),
+):
+    callback_router.add_prefix(callback_prefix, callback_handler, callback_parser)
+
+
+async def log_cache_stats():
+    """Периодически записывает в лог статистику кэша ролей и исходящих запросов"""
+    while True:
+        await asyncio.sleep(CACHE_STATS_INTERVAL)
+        stats = users.sync.get_cache_stats()
+        logging.info(
+            f"Кэш ролей: попаданий {stats['hits']}, промахов {stats['misses']}, "
+            f"доля попаданий {stats['hit_rate']:.1%}, записей {stats['size']}/{stats['max_size']}"
+        )
+        outbound = bot.outbound_stats
+        logging.info(
+            f"Исходящие запросы: всего {outbound['calls']}, ограничено сервером {outbound['throttled']}, "
+            f"повторено {outbound['retried']}, с ошибкой {outbound['failed']}, "
+            f"текущий лимит {rate_limiter.global_bucket.rate:.1f}/с"
+        )
+
+
+async def publish_due_news(bot: Bot) -> None:
+    """Запускает рассылку отложенных новостей, время публикации которых наступило"""
+    for news_item in await news.get_due_news(datetime.now().strftime("%Y-%m-%d %H:%M:%S")):
+        job_id = await run_in_database(publish_scheduled_news, news_item)
+        job = await broadcast_jobs.get_job(job_id) if job_id else None
+        logging.info(f"Публикация отложенной новости {news_item['id']}: {job['total'] if job else 0} получателей")
+        if job and job['total']:
+            start_broadcast_job(bot, job)
+
+
+async def run_news_scheduler():
+    """Периодически публикует отложенные новости"""
+    while True:
+        try:
+            await publish_due_news(bot)
+        except Exception as e:
+            logging.error(f"Ошибка при публикации отложенных новостей: {e}")
+        await asyncio.sleep(NEWS_SCHEDULER_INTERVAL)
+
+
 async def main():
-    await dp.start_polling(bot)
+    cache_stats_task = asyncio.create_task(log_cache_stats())
+    await resume_broadcast_jobs(bot)
+    news_scheduler_task = asyncio.create_task(run_news_scheduler())
+    try:
+        await dp.start_polling(bot)
+    finally:
+        cache_stats_task.cancel()
+        news_scheduler_task.cancel()
 
 
 if __name__ == '__main__':
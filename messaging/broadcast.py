@@ -0,0 +1,240 @@
+import asyncio
+import logging
+import math
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from maxapi.exceptions.max import MaxConnection
+from maxapi.types.errors import Error
+
+from messaging.rate_limiter import RateLimiter, bulk_traffic
+
+
+class DeliveryError(Exception):
+    def __init__(self, reason: str, message: str = '', transient: bool = False):
+        """
+        Ошибка доставки одного сообщения рассылки
+
+        Args:
+            reason: Короткая причина для статистики (например, http_403)
+            message: Подробности для лога
+            transient: Временная ошибка, запрос имеет смысл повторить
+        """
+        super().__init__(message or reason)
+        self.reason = reason
+        self.transient = transient
+
+
+def check_response(response):
+    """
+    Проверяет ответ метода Bot и возвращает его
+
+    maxapi не выбрасывает исключение при ошибке API, а возвращает объект Error,
+    поэтому рассылка проверяет ответ явно.
+
+    Raises:
+        DeliveryError: Если API вернул ошибку
+    """
+    if isinstance(response, Error):
+        # 429 - превышен лимит запросов, 5xx - сбой на стороне сервера
+        transient = response.code == 429 or response.code >= 500
+        raise DeliveryError(f"http_{response.code}", str(response.raw), transient)
+    return response
+
+
+def is_transient(error: Exception) -> bool:
+    """Проверяет, что ошибку отправки стоит повторить"""
+    if isinstance(error, DeliveryError):
+        return error.transient
+    return isinstance(error, (MaxConnection, asyncio.TimeoutError))
+
+
+class BroadcastResult:
+    def __init__(self, total: Optional[int] = None):
+        """
+        Итоги рассылки, обновляемые по мере отправки
+
+        Args:
+            total: Ожидаемое количество получателей, если известно заранее
+        """
+        self.total = total
+        self.attempted = 0
+        self.delivered = 0
+        self.failed = 0
+        self.failures: Dict[str, int] = {}
+        # (получатель, результат deliver или None, причина ошибки или None)
+        self.deliveries: List[tuple] = []
+        # Длительность каждого вызова deliver в секундах (с ожиданием ограничителя бота)
+        self.latencies: List[float] = []
+        self.started = time.monotonic()
+        self.finished: Optional[float] = None
+
+    @property
+    def duration(self) -> float:
+        return (self.finished or time.monotonic()) - self.started
+
+    @property
+    def messages_per_second(self) -> float:
+        duration = self.duration
+        return self.attempted / duration if duration > 0 else 0.0
+
+    def latency_percentile(self, percent: float) -> Optional[float]:
+        """
+        Возвращает перцентиль длительности запросов (ближайший ранг)
+
+        Args:
+            percent: Перцентиль от 0 до 100
+
+        Returns:
+            Длительность в секундах или None, если запросов не было
+        """
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        rank = max(1, math.ceil(percent / 100 * len(ordered)))
+        return ordered[rank - 1]
+
+    def add_success(self, recipient, value) -> None:
+        self.attempted += 1
+        self.delivered += 1
+        self.deliveries.append((recipient, value, None))
+
+    def add_failure(self, recipient, reason: str) -> None:
+        self.attempted += 1
+        self.failed += 1
+        self.failures[reason] = self.failures.get(reason, 0) + 1
+        self.deliveries.append((recipient, None, reason))
+
+
+class BroadcastEngine:
+    def __init__(self, limiter: Optional[RateLimiter] = None, concurrency: int = 20,
+                 retries: int = 2, retry_delay: float = 1.0):
+        """
+        Движок массовой отправки с ограниченным параллелизмом
+
+        Получателей обрабатывают concurrency рабочих задач, каждая отправка
+        проходит через ограничитель скорости в классе массового трафика. Временные ошибки (лимит
+        запросов, сбой сервера или соединения) повторяются с растущей
+        паузой. Ошибка доставки одному получателю не прерывает рассылку,
+        а учитывается в итогах.
+
+        Args:
+            limiter: Ограничитель скорости исходящих запросов
+            concurrency: Количество одновременных отправок
+            retries: Сколько раз повторять отправку при временной ошибке
+                (0, если deliver уже повторяет запросы сам, как ThrottledBot)
+            retry_delay: Пауза перед первым повтором в секундах, далее удваивается
+        """
+        self.limiter = limiter
+        self.concurrency = concurrency
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.logger = logging.getLogger(__name__)
+
+    async def run(self, recipients, deliver: Callable[[Any], Awaitable[Any]],
+                  chat_key: Callable[[Any], Optional[int]] = lambda recipient: recipient.get('user_id'),
+                  on_progress: Optional[Callable[[BroadcastResult], Awaitable[None]]] = None,
+                  progress_interval: float = 3.0, total: Optional[int] = None,
+                  on_result: Optional[Callable[[Any, Any, Optional[str]], Awaitable[None]]] = None
+                  ) -> BroadcastResult:
+        """
+        Выполняет deliver для каждого получателя
+
+        Args:
+            recipients: Получатели (список, генератор или асинхронный итератор)
+            deliver: Корутина отправки одному получателю; ее результат сохраняется
+                в итогах, ошибка доставки - исключение
+            chat_key: Возвращает чат получателя для лимита на чат
+            on_progress: Корутина, которой периодически передаются текущие итоги
+            progress_interval: Период вызова on_progress в секундах
+            total: Количество получателей для отчета о прогрессе
+            on_result: Корутина, которой передается окончательный итог по каждому
+                получателю (получатель, результат deliver, причина ошибки)
+
+        Returns:
+            Итоги рассылки
+        """
+        if total is None and hasattr(recipients, '__len__'):
+            total = len(recipients)
+        result = BroadcastResult(total)
+        iterator = recipients.__aiter__() if hasattr(recipients, '__aiter__') else iter(recipients)
+        iterator_lock = asyncio.Lock()
+
+        async def next_recipient():
+            async with iterator_lock:
+                try:
+                    if hasattr(iterator, '__anext__'):
+                        return True, await iterator.__anext__()
+                    return True, next(iterator)
+                except (StopIteration, StopAsyncIteration):
+                    return False, None
+
+        async def attempt(recipient):
+            for retry in range(self.retries + 1):
+                if self.limiter is not None:
+                    await self.limiter.acquire(chat_key(recipient))
+                started = time.monotonic()
+                try:
+                    value = await deliver(recipient)
+                except Exception as e:
+                    result.latencies.append(time.monotonic() - started)
+                    if retry == self.retries or not is_transient(e):
+                        raise
+                    self.logger.info(f"Повтор отправки {recipient} после ошибки: {e}")
+                    await asyncio.sleep(self.retry_delay * 2 ** retry)
+                else:
+                    result.latencies.append(time.monotonic() - started)
+                    return value
+
+        async def worker():
+            while True:
+                has_next, recipient = await next_recipient()
+                if not has_next:
+                    return
+                try:
+                    value = await attempt(recipient)
+                except DeliveryError as e:
+                    self.logger.warning(f"Не удалось доставить сообщение {recipient}: {e}")
+                    result.add_failure(recipient, e.reason)
+                    await self._notify_result(on_result, recipient, None, e.reason)
+                except Exception as e:
+                    self.logger.error(f"Ошибка при отправке сообщения {recipient}: {e}")
+                    result.add_failure(recipient, type(e).__name__)
+                    await self._notify_result(on_result, recipient, None, type(e).__name__)
+                else:
+                    result.add_success(recipient, value)
+                    await self._notify_result(on_result, recipient, value, None)
+
+        async def report_progress():
+            while True:
+                await asyncio.sleep(progress_interval)
+                await self._notify(on_progress, result)
+
+        # Отправки рассылки идут в массовом классе трафика и уступают
+        # ограничитель ответам обработчиков
+        with bulk_traffic():
+            reporter = asyncio.create_task(report_progress()) if on_progress else None
+            try:
+                await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+            finally:
+                result.finished = time.monotonic()
+                if reporter:
+                    reporter.cancel()
+            await self._notify(on_progress, result)
+        return result
+
+    async def _notify(self, on_progress, result: BroadcastResult) -> None:
+        if on_progress is None:
+            return
+        try:
+            await on_progress(result)
+        except Exception as e:
+            self.logger.error(f"Ошибка при отправке прогресса рассылки: {e}")
+
+    async def _notify_result(self, on_result, recipient, value, reason: Optional[str]) -> None:
+        if on_result is None:
+            return
+        try:
+            await on_result(recipient, value, reason)
+        except Exception as e:
+            self.logger.error(f"Ошибка при сохранении итога отправки {recipient}: {e}")
@@ -0,0 +1,152 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, List, Optional, Set
+
+from messaging.broadcast import BroadcastEngine, BroadcastResult
+
+
+class BroadcastJobRunner:
+    def __init__(self, jobs, engine: BroadcastEngine, page_size: int = 500, flush_size: int = 20):
+        """
+        Выполнение сохраненных заданий рассылки
+
+        Получатели читаются из таблицы задания страницами, а итог каждой
+        отправки записывается в нее небольшими пачками по ходу рассылки.
+        Поэтому после перезапуска задание продолжается с неотправленных
+        получателей: повторно могут уйти только сообщения последней
+        несохраненной пачки, а не вся уже выполненная часть рассылки.
+
+        Выполнение можно остановить (stop): новые получатели больше не
+        выдаются, начатые отправки завершаются и их итоги записываются.
+        Остановленное задание снова становится pending и может быть
+        продолжено, а отмененное (cancelled в базе) завершается.
+
+        Args:
+            jobs: AsyncDatabase над BroadcastJobsDatabase
+            engine: Движок рассылки
+            page_size: Сколько получателей читать из базы за один запрос
+            flush_size: Сколько итогов отправки накапливать перед записью
+        """
+        self.jobs = jobs
+        self.engine = engine
+        self.page_size = page_size
+        self.flush_size = flush_size
+        # Задания, которым запрошена остановка
+        self._stopping: Set[int] = set()
+        self.logger = logging.getLogger(__name__)
+
+    def stop(self, job_id: int) -> None:
+        """Запрашивает остановку задания: следующие получатели ему не выдаются"""
+        self._stopping.add(job_id)
+
+    def release(self, job_id: int) -> None:
+        """Снимает запрос остановки, чтобы задание можно было запустить снова"""
+        self._stopping.discard(job_id)
+
+    async def _pending_recipients(self, job_id: int):
+        """Асинхронно перебирает неотправленных получателей задания"""
+        after_id = 0
+        while job_id not in self._stopping:
+            page = await self.jobs.get_pending_recipients(job_id, after_id, self.page_size)
+            if not page:
+                return
+            for recipient in page:
+                if job_id in self._stopping:
+                    return
+                yield recipient
+            after_id = page[-1]['id']
+
+    async def run(self, job: dict, deliver: Callable[[Any], Awaitable[Any]],
+                  on_record: Optional[Callable[[List[tuple]], Awaitable[None]]] = None,
+                  on_progress: Optional[Callable[[BroadcastResult], Awaitable[None]]] = None) -> BroadcastResult:
+        """
+        Выполняет задание рассылки до конца
+
+        Args:
+            job: Строка задания из BroadcastJobsDatabase
+            deliver: Корутина отправки одному получателю, возвращает id сообщения
+            on_record: Корутина, получающая каждую записанную пачку итогов
+                (user_id, state, message_id, error)
+            on_progress: Корутина, которой периодически передаются итоги
+
+        Returns:
+            Итоги выполнения (только по получателям, обработанным в этом запуске)
+        """
+        job_id = job['id']
+        buffer = []
+        # Записи итогов, которые еще выполняются (в том числе после отмены ожидавшей их задачи)
+        writes: Set[asyncio.Task] = set()
+        if job.get('cancelled'):
+            await self.jobs.set_job_state(job_id, 'done')
+            self.logger.info(f"Задание рассылки {job_id} отменено")
+            result = BroadcastResult(0)
+            result.finished = result.started
+            return result
+
+        async def write(outcomes):
+            await self.jobs.mark_recipients(job_id, outcomes)
+            if on_record is not None:
+                try:
+                    await on_record(outcomes)
+                except Exception as e:
+                    self.logger.error(f"Ошибка при обработке итогов задания {job_id}: {e}")
+
+        async def flush():
+            nonlocal buffer
+            outcomes, buffer = buffer, []
+            if not outcomes:
+                return
+            # Отмена рабочей задачи (остановка бота) не должна прервать запись между
+            # mark_recipients и on_record: иначе получатель отмечен, а доставка потеряна
+            task = asyncio.ensure_future(write(outcomes))
+            writes.add(task)
+            task.add_done_callback(writes.discard)
+            await asyncio.shield(task)
+
+        async def interrupt():
+            await flush()
+            # Отмена могла прийти во время записи: дожидаемся ее, иначе
+            # состояние задания сменится раньше, чем итоги попадут в базу
+            await asyncio.gather(*writes, return_exceptions=True)
+            await self.jobs.set_job_state(job_id, 'pending')
+            self.logger.info(f"Выполнение задания рассылки {job_id} прервано, оно будет продолжено")
+
+        async def record(recipient, message_id, reason):
+            state = 'sent' if reason is None else 'failed'
+            buffer.append((recipient['user_id'], state, message_id, reason))
+            if len(buffer) >= self.flush_size:
+                await flush()
+
+        async def report(result):
+            # Вместе с прогрессом записываем накопленное, чтобы при медленной
+            # рассылке итоги не задерживались в памяти
+            await flush()
+            if on_progress is not None:
+                await on_progress(result)
+
+        counts = await self.jobs.get_job_counts(job_id)
+        await self.jobs.set_job_state(job_id, 'running')
+        try:
+            result = await self.engine.run(
+                self._pending_recipients(job_id), deliver,
+                on_progress=report, total=counts.get('pending'), on_result=record
+            )
+            await flush()
+        except BaseException:
+            # Прерванное задание (остановка бота, ошибка) возвращается в pending,
+            # а не остается running: его продолжит следующий запуск
+            await asyncio.shield(interrupt())
+            raise
+
+        if job_id in self._stopping:
+            # Отмену могли отметить в базе уже во время выполнения
+            current = await self.jobs.get_job(job_id)
+            if not (current or job).get('cancelled'):
+                await self.jobs.set_job_state(job_id, 'pending')
+                self.logger.info(f"Задание рассылки {job_id} остановлено: доставлено {result.delivered}")
+                return result
+        await self.jobs.set_job_state(job_id, 'done')
+        self.logger.info(
+            f"Задание рассылки {job_id} завершено: доставлено {result.delivered}, ошибок {result.failed}"
+        )
+        return result
@@ -0,0 +1,163 @@
+import asyncio
+import heapq
+import itertools
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+# Классы исходящего трафика: меньшее значение обслуживается первым
+INTERACTIVE = 0
+BULK = 1
+
+# Класс трафика текущей задачи; задачи, созданные внутри bulk_traffic(), наследуют его
+outbound_priority: ContextVar[int] = ContextVar('outbound_priority', default=INTERACTIVE)
+
+
+@contextmanager
+def bulk_traffic():
+    """Помечает запросы внутри блока (и созданных в нем задач) как массовые"""
+    token = outbound_priority.set(BULK)
+    try:
+        yield
+    finally:
+        outbound_priority.reset(token)
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        Корзина токенов: не более rate операций в секунду с всплеском до capacity
+
+        Ожидающие токена обслуживаются по приоритету, а при равном
+        приоритете - в порядке очереди.
+
+        Args:
+            rate: Скорость пополнения, токенов в секунду
+            capacity: Емкость корзины (по умолчанию равна rate)
+        """
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._waiters = []
+        self._order = itertools.count()
+        self._dispatcher: Optional[asyncio.Task] = None
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def set_rate(self, rate: float) -> None:
+        """Меняет скорость пополнения, сохраняя накопленные токены"""
+        self._refill()
+        self.rate = rate
+
+    async def acquire(self, priority: int = INTERACTIVE) -> None:
+        """
+        Ждет, пока в корзине появится токен, и забирает его
+
+        Args:
+            priority: Класс трафика (INTERACTIVE обслуживается раньше BULK)
+        """
+        self._refill()
+        if not self._waiters and self.tokens >= 1:
+            self.tokens -= 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._order), waiter))
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        await waiter
+
+    async def _dispatch(self) -> None:
+        """Раздает токены ожидающим по мере пополнения корзины"""
+        while self._waiters:
+            self._refill()
+            if self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                continue
+            _, _, waiter = heapq.heappop(self._waiters)
+            if not waiter.done():
+                self.tokens -= 1
+                waiter.set_result(None)
+
+
+class RateLimiter:
+    def __init__(self, global_rate: float = 25, per_chat_rate: float = 1, per_chat_capacity: float = 3,
+                 max_chats: int = 10000, min_rate: float = 1):
+        """
+        Ограничитель исходящих запросов к API: общий лимит и лимит на каждый чат
+
+        Общий лимит адаптивный: после ответа 429 скорость снижается вдвое
+        (но не ниже min_rate) и все запросы ждут паузу, которую запросил
+        сервер, а каждый успешный запрос понемногу возвращает скорость к global_rate.
+
+        Args:
+            global_rate: Общее количество запросов в секунду
+            per_chat_rate: Количество запросов в секунду в один чат
+            per_chat_capacity: Всплеск запросов в один чат
+            max_chats: Сколько корзин чатов держать в памяти (самые старые вытесняются)
+            min_rate: Нижняя граница общей скорости при снижении
+        """
+        self.global_rate = global_rate
+        self.min_rate = min(min_rate, global_rate)
+        self.global_bucket = TokenBucket(global_rate)
+        self.paused_until = 0.0
+        self.per_chat_rate = per_chat_rate
+        self.per_chat_capacity = per_chat_capacity
+        self.max_chats = max_chats
+        self._chat_buckets = OrderedDict()
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._chat_buckets[chat_id] = TokenBucket(self.per_chat_rate, self.per_chat_capacity)
+            if len(self._chat_buckets) > self.max_chats:
+                # Вытесняем самую старую корзину; если ею пользовались недавно,
+                # новая корзина того же чата просто начнет с полного запаса
+                self._chat_buckets.popitem(last=False)
+        else:
+            self._chat_buckets.move_to_end(chat_id)
+        return bucket
+
+    async def acquire(self, chat_id: Optional[int] = None, priority: Optional[int] = None) -> None:
+        """
+        Ждет разрешения на один запрос
+
+        Интерактивные запросы (ответы обработчиков) получают токен общего
+        лимита раньше массовых (рассылок), поэтому идущая рассылка не
+        задерживает ответы пользователям.
+
+        Args:
+            chat_id: Чат или пользователь, которому адресован запрос (None - только общий лимит)
+            priority: Класс трафика (по умолчанию берется из outbound_priority)
+        """
+        if priority is None:
+            priority = outbound_priority.get()
+        if chat_id is not None:
+            await self._chat_bucket(chat_id).acquire(priority)
+        delay = self.paused_until - time.monotonic()
+        while delay > 0:
+            await asyncio.sleep(delay)
+            delay = self.paused_until - time.monotonic()
+        await self.global_bucket.acquire(priority)
+
+    def throttled(self, retry_after: float) -> None:
+        """
+        Учитывает ответ 429: приостанавливает все запросы и снижает общую скорость
+
+        Args:
+            retry_after: Пауза в секундах, после которой можно повторять запросы
+        """
+        self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+        self.global_bucket.set_rate(max(self.min_rate, self.global_bucket.rate / 2))
+
+    def succeeded(self) -> None:
+        """Учитывает успешный запрос: постепенно восстанавливает общую скорость"""
+        rate = self.global_bucket.rate
+        if rate < self.global_rate:
+            self.global_bucket.set_rate(min(self.global_rate, rate + self.global_rate * 0.01))
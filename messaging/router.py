@@ -0,0 +1,93 @@
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+Handler = Callable[..., Awaitable[Any]]
+Parser = Callable[[str], Any]
+
+
+class _PrefixNode:
+    __slots__ = ('children', 'route')
+
+    def __init__(self):
+        self.children: Dict[str, '_PrefixNode'] = {}
+        self.route: Optional[Tuple[Handler, Parser]] = None
+
+
+class CallbackRouter:
+    def __init__(self):
+        """
+        Таблица обработчиков payload кнопок, собираемая один раз при импорте
+
+        Точные payload ищутся в словаре. Payload с параметром (approveDean_42,
+        confirm_delete_news_7) ищутся в префиксном дереве по символам payload:
+        стоимость поиска зависит только от длины payload, а не от количества
+        зарегистрированных префиксов. При пересечении префиксов выбирается
+        самый длинный. Остаток payload после префикса разбирается парсером
+        префикса и передается обработчику вторым аргументом.
+        """
+        self._exact: Dict[str, Handler] = {}
+        self._root = _PrefixNode()
+        self.logger = logging.getLogger(__name__)
+
+    def add(self, payload: str, handler: Handler) -> None:
+        """
+        Регистрирует обработчик точного payload
+
+        Args:
+            payload: Payload кнопки
+            handler: Обработчик handler(callback, chat_id, user_id)
+        """
+        if payload in self._exact:
+            raise ValueError(f'Обработчик payload {payload} уже зарегистрирован')
+        self._exact[payload] = handler
+
+    def add_prefix(self, prefix: str, handler: Handler, parser: Parser = int) -> None:
+        """
+        Регистрирует обработчик payload с параметром
+
+        Args:
+            prefix: Префикс payload, например "approveDean_"
+            handler: Обработчик handler(callback, argument, chat_id, user_id)
+            parser: Разбор остатка payload в аргумент (по умолчанию int)
+        """
+        node = self._root
+        for char in prefix:
+            node = node.children.setdefault(char, _PrefixNode())
+        if node.route is not None:
+            raise ValueError(f'Обработчик префикса {prefix} уже зарегистрирован')
+        node.route = (handler, parser)
+
+    def resolve(self, payload: str) -> Optional[Tuple[Handler, Tuple[Any, ...]]]:
+        """
+        Находит обработчик payload
+
+        Args:
+            payload: Payload нажатой кнопки
+
+        Returns:
+            Пара (обработчик, аргументы после callback) или None, если payload
+            не зарегистрирован или его параметр не разбирается
+        """
+        handler = self._exact.get(payload)
+        if handler is not None:
+            return handler, ()
+
+        node = self._root
+        match = None
+        for position, char in enumerate(payload):
+            node = node.children.get(char)
+            if node is None:
+                break
+            if node.route is not None:
+                match = (position + 1, node.route)
+
+        if match is None:
+            return None
+
+        length, (handler, parser) = match
+        try:
+            argument = parser(payload[length:])
+        except ValueError:
+            self.logger.warning(f"Некорректный параметр в payload {payload}")
+            return None
+        return handler, (argument,)
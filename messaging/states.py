@@ -0,0 +1,111 @@
+import enum
+from typing import Any, Awaitable, Callable, Dict, NamedTuple, Optional
+
+Handler = Callable[..., Awaitable[Any]]
+
+
+class State(enum.Enum):
+    """Состояния диалога: бот ждет от пользователя текстовый ввод"""
+    # Роли
+    WAITING_USER_ID = "waiting_user_id"
+    # Новости
+    WAITING_NEWS_TITLE = "waiting_news_title"
+    WAITING_NEWS_DESCRIPTION = "waiting_news_description"
+    WAITING_NEWS_PUBLISH_AT = "waiting_news_publish_at"
+    WAITING_NEWS_ID_FOR_EDIT = "waiting_news_id_for_edit"
+    WAITING_NEWS_ID_FOR_DELETE = "waiting_news_id_for_delete"
+    WAITING_NEWS_TITLE_EDIT = "waiting_news_title_edit"
+    WAITING_NEWS_DESCRIPTION_EDIT = "waiting_news_description_edit"
+    WAITING_NEWS_TITLE_EDIT_BOTH = "waiting_news_title_edit_both"
+    WAITING_NEWS_DESCRIPTION_EDIT_BOTH = "waiting_news_description_edit_both"
+    # Справки об обучении
+    WAITING_FULL_NAME = "waiting_full_name"
+    WAITING_GROUP = "waiting_group"
+    WAITING_COUNT = "waiting_count"
+    # Жалобы и пропуски в общежитии
+    WAITING_PROBLEM_ROOM = "waiting_problem_room"
+    WAITING_PROBLEM_DESCRIPTION = "waiting_problem_description"
+    WAITING_PASS_GROUP = "waiting_pass_group"
+    WAITING_PASS_BIRTHDATE = "waiting_pass_birthdate"
+    WAITING_PASS_REASON = "waiting_pass_reason"
+    WAITING_REPLY_TEXT = "waiting_reply_text"  # аргумент: id жалобы
+    WAITING_PASS_REPLY = "waiting_pass_reply"  # аргумент: id заявки на пропуск
+    # Черный список
+    WAITING_BLACKLIST_USER_ID = "waiting_blacklist_user_id"
+    WAITING_BLACKLIST_REASON = "waiting_blacklist_reason"
+    WAITING_BLACKLIST_REMOVE_ID = "waiting_blacklist_remove_id"
+    WAITING_UNBAN_DESCRIPTION = "waiting_unban_description"
+    WAITING_UNBAN_REJECT_REASON = "waiting_unban_reject_reason"  # аргумент: id заявки на разбан
+    # События
+    WAITING_EVENT_TITLE = "waiting_event_title"
+    WAITING_EVENT_DESCRIPTION = "waiting_event_description"
+    WAITING_EVENT_DATE = "waiting_event_date"
+    WAITING_EVENT_LOCATION = "waiting_event_location"
+    WAITING_EVENT_ID_FOR_EDIT = "waiting_event_id_for_edit"
+    WAITING_EVENT_ID_FOR_DELETE = "waiting_event_id_for_delete"
+    WAITING_EVENT_TITLE_EDIT = "waiting_event_title_edit"
+    WAITING_EVENT_DESCRIPTION_EDIT = "waiting_event_description_edit"
+    WAITING_EVENT_DATE_EDIT = "waiting_event_date_edit"
+    WAITING_EVENT_LOCATION_EDIT = "waiting_event_location_edit"
+    WAITING_EVENT_TITLE_EDIT_ALL = "waiting_event_title_edit_all"
+    WAITING_EVENT_DESCRIPTION_EDIT_ALL = "waiting_event_description_edit_all"
+    WAITING_EVENT_DATE_EDIT_ALL = "waiting_event_date_edit_all"
+    WAITING_EVENT_LOCATION_EDIT_ALL = "waiting_event_location_edit_all"
+
+
+class UserState(NamedTuple):
+    """Текущее состояние диалога пользователя и его аргумент (например, id жалобы)"""
+    state: State
+    argument: Optional[int] = None
+
+
+class StateRegistry:
+    def __init__(self):
+        """
+        Реестр обработчиков текстового ввода по состояниям диалога
+
+        Обработчики регистрируются декоратором on при импорте модуля, поиск
+        обработчика - одно обращение к словарю по члену State. Обработчик
+        вызывается как handler(event, user_id, user_input), а для состояний
+        с аргументом - handler(event, user_id, user_input, argument).
+        """
+        self._handlers: Dict[State, Handler] = {}
+
+    def on(self, state: State) -> Callable[[Handler], Handler]:
+        """
+        Декоратор, регистрирующий обработчик состояния
+
+        Args:
+            state: Состояние диалога
+
+        Returns:
+            Декоратор, возвращающий обработчик без изменений
+        """
+        def decorator(handler: Handler) -> Handler:
+            if state in self._handlers:
+                raise ValueError(f'Обработчик состояния {state.value} уже зарегистрирован')
+            self._handlers[state] = handler
+            return handler
+        return decorator
+
+    async def dispatch(self, user_state: UserState, event: Any, user_id: int, user_input: str) -> bool:
+        """
+        Вызывает обработчик состояния пользователя
+
+        Args:
+            user_state: Состояние диалога пользователя
+            event: Событие входящего сообщения
+            user_id: ID пользователя
+            user_input: Текст сообщения
+
+        Returns:
+            True, если для состояния зарегистрирован обработчик
+        """
+        handler = self._handlers.get(user_state.state)
+        if handler is None:
+            return False
+        if user_state.argument is None:
+            await handler(event, user_id, user_input)
+        else:
+            await handler(event, user_id, user_input, user_state.argument)
+        return True
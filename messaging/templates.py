@@ -0,0 +1,130 @@
+import json
+from typing import Any, Dict, List, Optional
+
+from maxapi.connection.base import BaseConnection
+from maxapi.enums.api_path import ApiPath
+from maxapi.enums.http_method import HTTPMethod
+from maxapi.enums.parse_mode import ParseMode
+from maxapi.methods.types.edited_message import EditedMessage
+from maxapi.methods.types.sended_message import SendedMessage
+
+# Подписи новостей по типу рассылки (news_type совпадает с типом подписки)
+NEWS_TYPE_TITLES = {"university": "Новость ВУЗа", "dormitory": "Новость общежития"}
+
+JSON_HEADERS = {'Content-Type': 'application/json'}
+
+
+def format_news_text(news_type: str, title: str, description: str) -> str:
+    """Формирует текст новости для подписчиков"""
+    return f"{NEWS_TYPE_TITLES[news_type]}\n\nЗаголовок: {title}\n\n{description}"
+
+
+def format_news_preview(news_type: str, title: str, description: str) -> str:
+    """Формирует текст предпросмотра новости для SMM"""
+    return (
+        f"Предпросмотр: {NEWS_TYPE_TITLES[news_type]}\n\n"
+        f"Заголовок: {title}\n\n"
+        f"Текст:\n{description}\n\n"
+        "---\nВыберите действие:"
+    )
+
+
+class MessageTemplate:
+    def __init__(self, text: str, attachments: Optional[List[Any]] = None, notify: Optional[bool] = None,
+                 parse_mode: Optional[ParseMode] = None, disable_link_preview: Optional[bool] = None):
+        """
+        Сообщение, тело запроса которого сериализуется один раз
+
+        При рассылке всем получателям уходит одно и то же сообщение,
+        поэтому вложения (клавиатуры) и JSON тела запроса готовятся при
+        создании шаблона, а на каждого получателя меняется только параметр
+        user_id/chat_id в адресе запроса. Поля тела совпадают с теми, что
+        формирует maxapi.methods.send_message.SendMessage.
+
+        Args:
+            text: Текст сообщения
+            attachments: Вложения без загрузки файлов (например, InlineKeyboardBuilder.as_markup())
+            notify: Уведомлять ли получателя
+            parse_mode: Режим разметки текста
+            disable_link_preview: Отключить превью ссылок
+        """
+        if not len(text) < 4000:
+            raise ValueError('text должен быть меньше 4000 символов')
+
+        payload: Dict[str, Any] = {
+            'attachments': [attachment.model_dump() for attachment in attachments or []],
+            'text': text,
+        }
+        if notify:
+            payload['notify'] = notify
+        if disable_link_preview:
+            payload['disable_link_preview'] = disable_link_preview
+        if parse_mode is not None:
+            payload['format'] = parse_mode.value
+
+        self.text = text
+        self.body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+
+
+class SendTemplate(BaseConnection):
+    def __init__(self, bot, template: MessageTemplate, chat_id: Optional[int] = None,
+                 user_id: Optional[int] = None):
+        """
+        Отправка готового шаблона в чат или пользователю
+
+        Args:
+            bot: Экземпляр бота
+            template: Шаблон сообщения
+            chat_id: Идентификатор чата
+            user_id: Идентификатор пользователя
+        """
+        super().__init__()
+        self.bot = bot
+        self.template = template
+        self.chat_id = chat_id
+        self.user_id = user_id
+
+    async def fetch(self):
+        params = self.bot.params.copy()
+        if self.chat_id:
+            params['chat_id'] = self.chat_id
+        elif self.user_id:
+            params['user_id'] = self.user_id
+
+        return await super().request(
+            method=HTTPMethod.POST,
+            path=ApiPath.MESSAGES,
+            model=SendedMessage,
+            params=params,
+            data=self.template.body,
+            headers=JSON_HEADERS
+        )
+
+
+class EditTemplate(BaseConnection):
+    def __init__(self, bot, message_id: str, template: MessageTemplate):
+        """
+        Замена содержимого отправленного сообщения готовым шаблоном
+
+        Args:
+            bot: Экземпляр бота
+            message_id: Идентификатор сообщения
+            template: Шаблон сообщения
+        """
+        super().__init__()
+        self.bot = bot
+        self.message_id = message_id
+        self.template = template
+
+    async def fetch(self):
+        params = self.bot.params.copy()
+        params['message_id'] = self.message_id
+
+        return await super().request(
+            method=HTTPMethod.PUT,
+            path=ApiPath.MESSAGES,
+            model=EditedMessage,
+            params=params,
+            data=self.template.body,
+            headers=JSON_HEADERS
+        )
@@ -0,0 +1,134 @@
+import asyncio
+import logging
+import random
+from typing import Dict, Optional
+
+from aiohttp import ClientConnectorError
+from maxapi import Bot
+from maxapi.exceptions.max import MaxConnection
+from maxapi.types.errors import Error
+
+from messaging.rate_limiter import RateLimiter
+from messaging.templates import EditTemplate, MessageTemplate, SendTemplate
+
+
+class ThrottledBot(Bot):
+    def __init__(self, *args, limiter: Optional[RateLimiter] = None, retries: int = 3,
+                 retry_delay: float = 1.0, **kwargs):
+        """
+        Bot, все исходящие сообщения которого проходят через общий ограничитель
+
+        send_message, edit_message и delete_message ждут разрешения
+        ограничителя (общий лимит и лимит чата). На ответ 429 бот сообщает
+        ограничителю о превышении лимита и повторяет запрос после паузы
+        retry_after из ответа (или экспоненциальной паузы) со случайным
+        разбросом, чтобы повторы разных задач не совпадали.
+
+        Это единственный уровень повторов исходящих запросов. Ответ 429
+        означает, что запрос отклонен, поэтому повторяется всегда. После
+        ответа 5xx или обрыва соединения сообщение могло быть доставлено,
+        поэтому такие ошибки повторяются только для идемпотентных правок и
+        удалений; отправка повторяется лишь если соединение с сервером не
+        было установлено. Ошибка, возвращенная после повторов, окончательная.
+
+        Args:
+            *args: Аргументы maxapi.Bot
+            limiter: Ограничитель исходящих запросов (None - без ограничения)
+            retries: Сколько раз повторять запрос
+            retry_delay: Пауза перед первым повтором в секундах, далее удваивается
+            **kwargs: Именованные аргументы maxapi.Bot
+        """
+        super().__init__(*args, **kwargs)
+        self.limiter = limiter
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.outbound_stats: Dict[str, int] = {'calls': 0, 'throttled': 0, 'retried': 0, 'failed': 0}
+        self.logger = logging.getLogger(__name__)
+
+    def _retry_after(self, error: Error, retry: int) -> float:
+        """Пауза перед повтором: из ответа сервера или экспоненциальная, с разбросом"""
+        retry_after = error.raw.get('retry_after') if isinstance(error.raw, dict) else None
+        try:
+            delay = float(retry_after)
+        except (TypeError, ValueError):
+            delay = self.retry_delay * 2 ** retry
+        return delay * random.uniform(1, 1.5)
+
+    @staticmethod
+    def _not_sent(error: MaxConnection) -> bool:
+        """Проверяет, что запрос не ушел на сервер: соединение не было установлено"""
+        return isinstance(error.__context__, ClientConnectorError)
+
+    async def _call(self, method, chat_key: Optional[int], idempotent: bool, *args, **kwargs):
+        """
+        Выполняет метод Bot с учетом ограничителя и повторами
+
+        Args:
+            method: Метод Bot или fetch запроса
+            chat_key: Чат для лимита на чат (None - только общий лимит)
+            idempotent: Можно ли повторять запрос, который мог дойти до сервера
+            *args: Позиционные аргументы method
+            **kwargs: Именованные аргументы method
+        """
+        self.outbound_stats['calls'] += 1
+        for retry in range(self.retries + 1):
+            if self.limiter is not None:
+                await self.limiter.acquire(chat_key)
+            try:
+                response = await method(*args, **kwargs)
+            except MaxConnection as e:
+                if retry == self.retries or not (idempotent or self._not_sent(e)):
+                    self.outbound_stats['failed'] += 1
+                    raise
+                delay = self.retry_delay * 2 ** retry * random.uniform(1, 1.5)
+                self.logger.warning(f"Ошибка соединения, повтор через {delay:.1f} с: {e}")
+            else:
+                if not isinstance(response, Error):
+                    if self.limiter is not None:
+                        self.limiter.succeeded()
+                    return response
+
+                if response.code == 429:
+                    self.outbound_stats['throttled'] += 1
+                    delay = self._retry_after(response, retry)
+                    if self.limiter is not None:
+                        self.limiter.throttled(delay)
+                    message = "Превышен лимит запросов к API"
+                elif response.code >= 500 and idempotent:
+                    delay = self.retry_delay * 2 ** retry * random.uniform(1, 1.5)
+                    message = f"Сбой сервера API ({response.code})"
+                else:
+                    self.outbound_stats['failed'] += 1
+                    return response
+
+                if retry == self.retries:
+                    self.outbound_stats['failed'] += 1
+                    return response
+                self.logger.warning(f"{message}, повтор через {delay:.1f} с")
+
+            self.outbound_stats['retried'] += 1
+            await asyncio.sleep(delay)
+
+    async def send_message(self, chat_id: Optional[int] = None, user_id: Optional[int] = None, **kwargs):
+        return await self._call(
+            super().send_message, chat_id if chat_id is not None else user_id, False,
+            chat_id=chat_id, user_id=user_id, **kwargs
+        )
+
+    async def edit_message(self, message_id: str, **kwargs):
+        return await self._call(super().edit_message, None, True, message_id=message_id, **kwargs)
+
+    async def delete_message(self, message_id: str):
+        return await self._call(super().delete_message, None, True, message_id=message_id)
+
+    async def send_template(self, template: MessageTemplate, chat_id: Optional[int] = None,
+                            user_id: Optional[int] = None):
+        """Отправляет заранее сериализованный шаблон сообщения"""
+        return await self._call(
+            SendTemplate(self, template, chat_id=chat_id, user_id=user_id).fetch,
+            chat_id if chat_id is not None else user_id, False
+        )
+
+    async def edit_template(self, message_id: str, template: MessageTemplate):
+        """Заменяет содержимое сообщения заранее сериализованным шаблоном"""
+        return await self._call(EditTemplate(self, message_id, template).fetch, None, True)
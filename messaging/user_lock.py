@@ -0,0 +1,49 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from maxapi.filters.middleware import BaseMiddleware
+
+
+class UserLockMiddleware(BaseMiddleware):
+    def __init__(self):
+        """
+        Последовательная обработка обновлений одного пользователя
+
+        Диспетчер с use_create_task обрабатывает каждое обновление в своей
+        задаче, поэтому два быстрых нажатия одного пользователя могли бы
+        одновременно читать и менять его состояние диалога (user_states,
+        user_temp_data). Middleware держит блокировку пользователя на время
+        обработки его обновления: обновления разных пользователей
+        по-прежнему обрабатываются параллельно. Блокировка удаляется, когда
+        ее больше никто не ждет.
+        """
+        self._locks: Dict[int, asyncio.Lock] = {}
+        # Сколько обновлений пользователя обрабатывается или ждет блокировки
+        self._waiting: Dict[int, int] = {}
+
+    @staticmethod
+    def _user_id(event_object: Any) -> Optional[int]:
+        """Возвращает ID пользователя, от которого пришло обновление"""
+        user = getattr(event_object, 'from_user', None) or getattr(event_object, 'user', None)
+        return getattr(user, 'user_id', None)
+
+    async def __call__(
+        self,
+        handler: Callable[[Any, Dict[str, Any]], Awaitable[Any]],
+        event_object: Any,
+        data: Dict[str, Any]
+    ) -> Any:
+        user_id = self._user_id(event_object)
+        if user_id is None:
+            return await handler(event_object, data)
+
+        lock = self._locks.setdefault(user_id, asyncio.Lock())
+        self._waiting[user_id] = self._waiting.get(user_id, 0) + 1
+        try:
+            async with lock:
+                return await handler(event_object, data)
+        finally:
+            self._waiting[user_id] -= 1
+            if not self._waiting[user_id]:
+                del self._waiting[user_id]
+                del self._locks[user_id]